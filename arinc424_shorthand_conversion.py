@@ -1,5 +1,16 @@
+import csv
+import os
 import re
 import sys
+from collections import namedtuple
+
+try:
+    from .lazy import LazyPattern
+except ImportError:
+    from lazy import LazyPattern
+
+# Result of conversion of one row in bulk mode, value is None and error is message if row is invalid
+ConversionResult = namedtuple('ConversionResult', 'value error')
 
 
 class Arinc424CoordinatesConversion:
@@ -18,23 +29,41 @@ class Arinc424CoordinatesConversion:
     LON_LESS_HUNDRED_TMPL = '{lat}{lon}{letter}'
     LON_EQUAL_GRATER_HUNDRED_TMPL = '{lat}{letter}{lon}'
 
-    LON_DMH_FULL_DEGREES_REGEX = re.compile(r'''(180|1[0-7]\d|0\d{2}|0{2}\d)
+    LON_DMH_FULL_DEGREES_REGEX = LazyPattern(r'''(180|1[0-7]\d|0\d{2}|0{2}\d)
                                (00[EW])
                                ''', re.VERBOSE)
 
-    LAT_DMH_FULL_DEGREES_REGEX = re.compile(r'''(90|[0-8]\d|)
+    LAT_DMH_FULL_DEGREES_REGEX = LazyPattern(r'''(90|[0-8]\d|)
                                    (00[NS])
                                    ''', re.VERBOSE)
 
-    ARINC424_REGEXS = {'LON_LESS_HUNDRED_REGEX': re.compile(r'''(?P<lat>\d{2})  # First two of latitude
+    ARINC424_REGEXS = {'LON_LESS_HUNDRED_REGEX': LazyPattern(r'''(?P<lat>\d{2})  # First two of latitude
                                                                 (?P<lon>\d{2})  # Second and third of longitude
                                                                 (?P<letter>[NSEW])  # Letter designator 
                                                             ''', re.VERBOSE),
-                       'LON_EQUAL_GRATER_HUNDRED_REGEX': re.compile(r'''(?P<lat>\d{2})  # First two of latitude
+                       'LON_EQUAL_GRATER_HUNDRED_REGEX': LazyPattern(r'''(?P<lat>\d{2})  # First two of latitude
                                                                         (?P<letter>[NSEW])  # Letter designator 
                                                                         (?P<lon>\d{2})  # Second and third of longitude
                                                                      ''', re.VERBOSE)}
 
+    # Both ARINC424 code layouts in one pattern, used by bulk conversion
+    ARINC424_REGEX = LazyPattern(r'''(?P<lat>\d{2})  # First two of latitude
+                                   (?:(?P<lon_less>\d{2})(?P<letter_less>[NSEW])  # Longitude less than hundred
+                                   |(?P<letter_greater>[NSEW])(?P<lon_greater>\d{2}))  # Longitude hundred and more
+                                ''', re.VERBOSE)
+
+    # Error messages of bulk conversion
+    ARINC424_CODE_ERROR = 'Input is not ARINC424 code for full degrees.'
+    DMH_COORDINATES_ERROR = 'Input coordinates must be full degrees in DMH format, example: 12200E.'
+
+    # Lookup tables of full degrees code space, built on first use of lookup methods
+    # and used by all conversion methods afterwards:
+    # ARINC424 code -> 'lon lat' in DMH format, (lon, lat) in DMH format -> ARINC424 code
+    arinc424_to_coordinates_table = None
+    coord_to_arinc424_table = None
+    # JSON file the lookup tables were loaded from or saved to, None if they were only built
+    lookup_table_file = None
+
     @staticmethod
     def is_longitude_dmh(lon):
         """ Checks if longitude is in DMH format (Degrees, minutes, hemisphere) and is full degrees.
@@ -73,10 +102,15 @@ class Arinc424CoordinatesConversion:
     @staticmethod
     def coord_to_arinc424(lon, lat):
         """ Converts full degrees coordinates to ARINC424 format.
+        Lookup tables are used if they have been built already (see get_lookup_tables).
         :param lon: str, longitude in DMH format
         :param lat: str, latitude in DMH format
         :return: str: full degrees coordinates in ARINC424 format
         """
+        if Arinc424CoordinatesConversion.coord_to_arinc424_table is not None:
+            arinc424 = Arinc424CoordinatesConversion.coord_to_arinc424_table.get((lon, lat))
+            if arinc424 is not None:
+                return arinc424
         hems = Arinc424CoordinatesConversion.get_hemispheres_from_coord_pair(lon, lat)
         arinc424_letter = Arinc424CoordinatesConversion.ARINC424_LETTER[hems]
         arinc424_format = Arinc424CoordinatesConversion.get_arinc424_format_tmpl(lon)
@@ -91,28 +125,41 @@ class Arinc424CoordinatesConversion:
         :param lat: str, latitude part from ARINC424 code
         :return: bool:
         """
+        msg = Arinc424CoordinatesConversion.get_arinc424_code_range_error(lon, lat)
+
+        if msg:
+            print(msg)
+
+        return not msg
+
+    @staticmethod
+    def get_arinc424_code_range_error(lon, lat):
+        """ Gets error message if longitude and latitude parts of ARINC424 code are not within range.
+        :param lon: str, longitude part from ARINC424 code
+        :param lat: str, latitude part from ARINC424 code
+        :return: str: error message, empty string if parts are within range
+        """
         msg = ''
-        is_within_range = True
 
         if int(lon) > 80:
-            is_within_range = False
             msg = 'Longitude part can\'t be grater the 80. '
 
         if int(lat) > 90:
-            is_within_range = False
             msg += 'Latitude part can\'t be grater the 90.'
 
-        if not is_within_range:
-            print(msg)
-
-        return is_within_range
+        return msg
 
     @staticmethod
     def arinc424_to_coordinates(arinc424):
         """ Converts from ARINC424 shorthand format to DM format
+        Lookup tables are used if they have been built already (see get_lookup_tables).
         :param arinc424: str, coordinates in ARINC424 shorthand code
         :return: str, coordinates in DMH format, e.g.: 16000W 5000N
         """
+        if Arinc424CoordinatesConversion.arinc424_to_coordinates_table is not None:
+            coordinates = Arinc424CoordinatesConversion.arinc424_to_coordinates_table.get(arinc424)
+            if coordinates is not None:
+                return coordinates
         for regex in Arinc424CoordinatesConversion.ARINC424_REGEXS:
             if Arinc424CoordinatesConversion.ARINC424_REGEXS.get(regex).match(arinc424):
                 groups = Arinc424CoordinatesConversion.ARINC424_REGEXS.get(regex).search(arinc424)
@@ -127,8 +174,269 @@ class Arinc424CoordinatesConversion:
                     elif regex == 'LON_EQUAL_GRATER_HUNDRED_REGEX':
                         return '1{}00{} {}00{}'.format(lon, lon_hem, lat, lat_hem)
 
+    @staticmethod
+    def arinc424_to_coordinates_bulk(codes):
+        """ Converts many codes from ARINC424 shorthand format to DMH format in one pass, result of every code
+        is the same as result of arinc424_to_coordinates. Repeated codes are converted once.
+        Lookup tables are used if they have been built already (see get_lookup_tables), building them here
+        would cost more than conversion of all distinct codes of one call.
+        :param codes: iterable of str, coordinates in ARINC424 shorthand code
+        :return: list: ConversionResult for every code, value is coordinates in DMH format, e.g.: 16000W 5000N
+        """
+        table = Arinc424CoordinatesConversion.arinc424_to_coordinates_table or {}
+        results = []
+        converted = {}
+        for arinc424 in codes:
+            value = table.get(arinc424)
+            if value is not None:
+                results.append(ConversionResult(value, ''))
+                continue
+            result = converted.get(arinc424)
+            if result is None:
+                result = Arinc424CoordinatesConversion.convert_arinc424_code(arinc424)
+                converted[arinc424] = result
+            results.append(result)
+        return results
+
+    @staticmethod
+    def convert_arinc424_code(arinc424):
+        """ Converts from ARINC424 shorthand format to DMH format with combined pattern.
+        :param arinc424: str, coordinates in ARINC424 shorthand code
+        :return: ConversionResult
+        """
+        groups = Arinc424CoordinatesConversion.ARINC424_REGEX.match(arinc424)
+        if groups is None:
+            return ConversionResult(None, Arinc424CoordinatesConversion.ARINC424_CODE_ERROR)
+
+        lat = groups.group('lat')
+        if groups.group('lon_less') is not None:
+            lon, letter, lon_hundreds = groups.group('lon_less'), groups.group('letter_less'), '0'
+        else:
+            lon, letter, lon_hundreds = groups.group('lon_greater'), groups.group('letter_greater'), '1'
+
+        msg = Arinc424CoordinatesConversion.get_arinc424_code_range_error(lon, lat)
+        if msg:
+            return ConversionResult(None, msg.strip())
+
+        lon_hem, lat_hem = Arinc424CoordinatesConversion.HEMISPHERES[letter]
+        return ConversionResult('{}{}00{} {}00{}'.format(lon_hundreds, lon, lon_hem, lat, lat_hem), '')
+
+    @staticmethod
+    def coord_to_arinc424_bulk(coordinates):
+        """ Converts many full degrees coordinates to ARINC424 format in one pass, result of every pair
+        is the same as result of coord_to_arinc424. Repeated pairs are converted once.
+        Lookup tables are used if they have been built already, see arinc424_to_coordinates_bulk.
+        :param coordinates: iterable of tuples (str, str), longitude and latitude in DMH format
+        :return: list: ConversionResult for every pair, value is full degrees coordinates in ARINC424 format
+        """
+        table = Arinc424CoordinatesConversion.coord_to_arinc424_table or {}
+        results = []
+        converted = {}
+        for lon, lat in coordinates:
+            value = table.get((lon, lat))
+            if value is not None:
+                results.append(ConversionResult(value, ''))
+                continue
+            result = converted.get((lon, lat))
+            if result is None:
+                if Arinc424CoordinatesConversion.is_longitude_dmh(lon) and \
+                        Arinc424CoordinatesConversion.is_latitude_dmh(lat):
+                    result = ConversionResult(Arinc424CoordinatesConversion.coord_to_arinc424(lon, lat), '')
+                else:
+                    result = ConversionResult(None, Arinc424CoordinatesConversion.DMH_COORDINATES_ERROR)
+                converted[(lon, lat)] = result
+            results.append(result)
+        return results
+
+    @staticmethod
+    def build_lookup_tables():
+        """ Builds lookup tables of the whole full degrees code space (91 latitudes x 181 longitudes x 4 quadrants)
+        with coord_to_arinc424. Codes of longitudes 81-99 are only in the coordinates -> code direction,
+        arinc424_to_coordinates does not accept them.
+        :return: dict, dict: ARINC424 code -> 'lon lat' in DMH format, (lon, lat) in DMH format -> ARINC424 code
+        """
+        arinc424_to_coordinates_table = {}
+        coord_to_arinc424_table = {}
+        for lat_deg in range(91):
+            for lat_hem in 'NS':
+                lat = '{:02d}00{}'.format(lat_deg, lat_hem)
+                for lon_deg in range(181):
+                    for lon_hem in 'EW':
+                        lon = '{:03d}00{}'.format(lon_deg, lon_hem)
+                        arinc424 = Arinc424CoordinatesConversion.coord_to_arinc424(lon, lat)
+                        coord_to_arinc424_table[(lon, lat)] = arinc424
+                        # Longitude parts greater than 80 are rejected by arinc424_to_coordinates
+                        if int(lon[1:3]) <= 80:
+                            arinc424_to_coordinates_table[arinc424] = '{} {}'.format(lon, lat)
+        return arinc424_to_coordinates_table, coord_to_arinc424_table
+
+    @staticmethod
+    def load_lookup_tables(table_file):
+        """ Loads lookup tables saved with save_lookup_tables.
+        :param table_file: str, JSON file path
+        :return: dict, dict: ARINC424 code -> 'lon lat' in DMH format, (lon, lat) in DMH format -> ARINC424 code
+        """
+        import json
+        with open(table_file) as f:
+            tables = json.load(f)
+        coord_to_arinc424_table = {tuple(coordinates.split()): arinc424
+                                   for coordinates, arinc424 in tables['coord_to_arinc424'].items()}
+        return tables['arinc424_to_coordinates'], coord_to_arinc424_table
+
+    @staticmethod
+    def save_lookup_tables(table_file, arinc424_to_coordinates_table, coord_to_arinc424_table):
+        """ Saves lookup tables to JSON file.
+        :param table_file: str, JSON file path
+        :param arinc424_to_coordinates_table: dict, ARINC424 code -> 'lon lat' in DMH format
+        :param coord_to_arinc424_table: dict, (lon, lat) in DMH format -> ARINC424 code
+        """
+        import json
+        with open(table_file, 'w') as f:
+            json.dump({'arinc424_to_coordinates': arinc424_to_coordinates_table,
+                       'coord_to_arinc424': {'{} {}'.format(*coordinates): arinc424
+                                             for coordinates, arinc424 in coord_to_arinc424_table.items()}}, f)
+
+    @staticmethod
+    def get_lookup_tables(table_file=None):
+        """ Gets lookup tables of full degrees code space, tables are built on the first call.
+        Once tables are built, they are used by scalar and bulk conversion methods as well.
+        :param table_file: str, optional JSON file path, tables are loaded from it if it exists,
+        otherwise tables are saved to it. File given after tables have been built is honoured the same way:
+        tables in memory are replaced with tables of existing file or saved to new file.
+        :return: dict, dict: ARINC424 code -> 'lon lat' in DMH format, (lon, lat) in DMH format -> ARINC424 code
+        """
+        cls = Arinc424CoordinatesConversion
+        if cls.arinc424_to_coordinates_table is None or \
+                (table_file is not None and table_file != cls.lookup_table_file):
+            if table_file is not None and os.path.exists(table_file):
+                tables = cls.load_lookup_tables(table_file)
+            else:
+                tables = (cls.arinc424_to_coordinates_table, cls.coord_to_arinc424_table)
+                if tables[0] is None:
+                    tables = cls.build_lookup_tables()
+                if table_file is not None:
+                    cls.save_lookup_tables(table_file, *tables)
+            cls.arinc424_to_coordinates_table, cls.coord_to_arinc424_table = tables
+            cls.lookup_table_file = table_file
+        return cls.arinc424_to_coordinates_table, cls.coord_to_arinc424_table
+
+    @staticmethod
+    def lookup_arinc424_to_coordinates(arinc424):
+        """ Converts from ARINC424 shorthand format to DMH format with lookup table, codes outside of
+        the table are converted with combined pattern. Result is the same as result of arinc424_to_coordinates.
+        :param arinc424: str, coordinates in ARINC424 shorthand code
+        :return: str, coordinates in DMH format, e.g.: 16000W 5000N, None if code is invalid
+        """
+        table, _ = Arinc424CoordinatesConversion.get_lookup_tables()
+        coordinates = table.get(arinc424)
+        if coordinates is None:
+            return Arinc424CoordinatesConversion.convert_arinc424_code(arinc424).value
+        return coordinates
+
+    @staticmethod
+    def lookup_coord_to_arinc424(lon, lat):
+        """ Converts full degrees coordinates to ARINC424 format with lookup table, coordinates outside of
+        the table are converted with coord_to_arinc424.
+        :param lon: str, longitude in DMH format
+        :param lat: str, latitude in DMH format
+        :return: str: full degrees coordinates in ARINC424 format
+        """
+        _, table = Arinc424CoordinatesConversion.get_lookup_tables()
+        arinc424 = table.get((lon, lat))
+        if arinc424 is None:
+            return Arinc424CoordinatesConversion.coord_to_arinc424(lon, lat)
+        return arinc424
+
+
+# Number of rows converted at once in stream mode
+STREAM_CHUNK_ROWS = 10000
+
+
+def convert_rows(rows):
+    """ Converts rows in both directions: rows with one field are ARINC424 codes, rows with two fields
+    are longitude and latitude in DMH format.
+    :param rows: list, rows (lists of str)
+    :return: list: ConversionResult for every row
+    """
+    codes = [(i, row[0]) for i, row in enumerate(rows) if len(row) == 1]
+    pairs = [(i, tuple(row)) for i, row in enumerate(rows) if len(row) == 2]
+    results = [ConversionResult(None, 'Row should have 1 field (ARINC424 code) or 2 fields (longitude, latitude).')
+               for _ in rows]
+    for (i, _), result in zip(codes, Arinc424CoordinatesConversion.arinc424_to_coordinates_bulk(
+            code for _, code in codes)):
+        results[i] = result
+    for (i, _), result in zip(pairs, Arinc424CoordinatesConversion.coord_to_arinc424_bulk(
+            pair for _, pair in pairs)):
+        results[i] = result
+    return results
+
+
+def convert_stream(in_file, out_file, chunk_rows=STREAM_CHUNK_ROWS):
+    """ Converts rows of text stream, fields are separated with whitespace, comma or tab.
+    Every output row is tab separated: input fields, result and error message.
+    :param in_file: file object, input text stream
+    :param out_file: file object, output text stream
+    :param chunk_rows: int, number of rows converted at once
+    :return: int, int: number of converted rows, number of rows with errors
+    """
+    writer = csv.writer(out_file, delimiter='\t', lineterminator='\n')
+    converted, errors = 0, 0
+    chunk = []
+    for line in in_file:
+        row = line.replace(',', ' ').split()
+        if row:
+            chunk.append(row)
+        if len(chunk) == chunk_rows:
+            # Stream has more than one chunk, lookup tables pay off for the rest of it
+            Arinc424CoordinatesConversion.get_lookup_tables()
+            converted, errors = write_rows(writer, chunk, converted, errors)
+            chunk = []
+    if chunk:
+        converted, errors = write_rows(writer, chunk, converted, errors)
+    return converted, errors
+
+
+def convert_values(values, out_file):
+    """ Converts many values given as command line arguments in one process, every value is ARINC424 code
+    or longitude and latitude in DMH format separated with whitespace or comma. Output is the same as output
+    of convert_stream.
+    :param values: iterable of str, values to convert
+    :param out_file: file object, output text stream
+    :return: int, int: number of converted values, number of values with errors
+    """
+    writer = csv.writer(out_file, delimiter='\t', lineterminator='\n')
+    rows = [row for row in (value.replace(',', ' ').split() for value in values) if row]
+    return write_rows(writer, rows, 0, 0)
+
+
+def write_rows(writer, rows, converted, errors):
+    """ Converts chunk of rows and writes results.
+    :return: int, int: updated number of converted rows and number of rows with errors
+    """
+    for row, result in zip(rows, convert_rows(rows)):
+        writer.writerow([' '.join(row), result.value or '', result.error])
+        if result.error:
+            errors += 1
+        else:
+            converted += 1
+    return converted, errors
+
 
 def main(args):
+    if len(args) == 2 and args[0] == '--stream':
+        if args[1] == '-':
+            converted, errors = convert_stream(sys.stdin, sys.stdout)
+        else:
+            with open(args[1]) as in_file:
+                converted, errors = convert_stream(in_file, sys.stdout)
+        print('{} rows converted, {} rows with errors.'.format(converted, errors), file=sys.stderr)
+        return None
+
+    if len(args) > 1 and args[0] == '--values':
+        converted, errors = convert_values(args[1:], sys.stdout)
+        print('{} values converted, {} values with errors.'.format(converted, errors), file=sys.stderr)
+        return None
+
     if len(args) == 1:  # ARINC424 -> Lon, Lat
         coordinates = Arinc424CoordinatesConversion.arinc424_to_coordinates(args[0])
         if coordinates is not None:
@@ -147,10 +455,17 @@ def main(args):
         usage_msg = 'Usage if you want to convert from ARINC424 code to Longitude and latitude:\n' \
                     'arinc424_shorthand_conversion.py <arinc424_code>\n' \
                     'Usage if you want to convert from Longitude and latitude ARINC424 code:\n' \
-                    'arinc424_shorthand_conversion.py <longitude_dmh> <latitude_dmh>)'
+                    'arinc424_shorthand_conversion.py <longitude_dmh> <latitude_dmh>)\n' \
+                    'Usage if you want to convert rows of file (ARINC424 code or longitude and latitude\n' \
+                    'in every row), use - as input_file to read standard input:\n' \
+                    'arinc424_shorthand_conversion.py --stream <input_file>\n' \
+                    'Usage if you want to convert many values in one run (ARINC424 code or "longitude latitude"\n' \
+                    'in every value):\n' \
+                    'arinc424_shorthand_conversion.py --values <value> [<value> ...]'
         return usage_msg
 
 
 if __name__ == '__main__':
     result = main(sys.argv[1:])
-    print(result)
+    if result is not None:
+        print(result)
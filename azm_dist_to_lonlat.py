@@ -1,11 +1,102 @@
+import csv
+import itertools
 import re
 import math
+import sys
+import time
+from collections import namedtuple
+
+try:
+    from . import instrumentation
+    from .lazy import LazyModule, LazyPattern
+except ImportError:
+    import instrumentation
+    from lazy import LazyModule, LazyPattern
+
+# NumPy is imported on first use, so that scalar conversions (e.g. single conversion from command line)
+# do not pay for its import
+np = LazyModule('numpy')
 
 # Parameters of WGS84 ellipsoid
 WGS84_A = 6378137.0  # semi-major axis of the WGS84 ellipsoid in m
 WGS84_B = 6356752.3141  # semi-minor axis of the WGS84 ellipsoid in m
 WGS84_F = 1 / 298.25722210088  # flattening of the WGS84 ellipsoid
 
+# Names of ellipsoids
+ELLIPSOID_WGS84 = 'WGS84'
+ELLIPSOID_GRS80 = 'GRS80'
+ELLIPSOID_WGS72 = 'WGS72'
+ELLIPSOID_CLARKE1866 = 'CLARKE1866'
+ELLIPSOID_CLARKE1880 = 'CLARKE1880'
+ELLIPSOID_INTERNATIONAL1924 = 'INTERNATIONAL1924'
+ELLIPSOID_BESSEL1841 = 'BESSEL1841'
+ELLIPSOID_AIRY1830 = 'AIRY1830'
+ELLIPSOID_KRASSOWSKY1940 = 'KRASSOWSKY1940'
+
+# Registry of ellipsoids: name -> semi-major axis (m), semi-minor axis (m), flattening,
+# None is computed from the other two parameters, see register_ellipsoid
+ELLIPSOID_PARAMETERS = {ELLIPSOID_WGS84: (WGS84_A, WGS84_B, WGS84_F),
+                        ELLIPSOID_GRS80: (6378137.0, None, 1 / 298.257222101),
+                        ELLIPSOID_WGS72: (6378135.0, None, 1 / 298.26),
+                        ELLIPSOID_CLARKE1866: (6378206.4, 6356583.8, None),
+                        ELLIPSOID_CLARKE1880: (6378249.145, None, 1 / 293.465),
+                        ELLIPSOID_INTERNATIONAL1924: (6378388.0, None, 1 / 297),
+                        ELLIPSOID_BESSEL1841: (6377397.155, None, 1 / 299.1528128),
+                        ELLIPSOID_AIRY1830: (6377563.396, 6356256.909, None),
+                        ELLIPSOID_KRASSOWSKY1940: (6378245.0, None, 1 / 298.3)}
+
+# Ellipsoid with constants derived from its parameters once, see get_ellipsoid
+# ep_sq - square of the second eccentricity (a^2 - b^2) / b^2, mean_radius - (2a + b) / 3
+Ellipsoid = namedtuple('Ellipsoid', 'name a b f ep_sq mean_radius')
+
+# Ellipsoids created by get_ellipsoid, by name and by tuple of parameters (a, b, f)
+ELLIPSOIDS = {}
+
+# Accuracy modes of direct geodetic problem solution, maximum error is given relative to full Vincenty solution
+ACCURACY_FULL = 'FULL'  # Iterate sigma until change is below 1e-12 (default)
+ACCURACY_MM = 'MM'  # 3 iterations of sigma, max error below 0.1 mm
+ACCURACY_CM = 'CM'  # 2 iterations of sigma, max error 0.5 mm up to 100 km, 5 mm up to 1000 km, 2 cm for any distance
+ACCURACY_M = 'M'  # 1 iteration of sigma, max error 0.3 m up to 100 km, 3 m up to 1000 km, 12 m for any distance
+ACCURACY_SPHERE = 'SPHERE'  # Sphere with mean radius, max error 0.6 % of distance (e.g. 560 m at 100 km)
+
+# Maximum number of iterations of sigma for accuracy modes of Vincenty direct solution
+ACCURACY_ITERATIONS = {ACCURACY_FULL: None,
+                       ACCURACY_MM: 3,
+                       ACCURACY_CM: 2,
+                       ACCURACY_M: 1}
+
+# Maximum number of iterations of sigma in Vincenty direct solution (full accuracy), inputs which do not converge
+# are solved with series expansion (vincenty_direct_series_sigma). Typical inputs converge in 2-5 iterations.
+VINCENTY_DIRECT_MAX_ITERATIONS = 50
+
+# Maximum number of iterations of lambda in Vincenty inverse solution
+VINCENTY_INVERSE_MAX_ITERATIONS = 200
+
+# Number of intervals of lambda searched for roots in fallback solution for nearly antipodal points
+ANTIPODAL_LAMBDA_INTERVALS = 64
+
+# Points with absolute latitude (decimal degrees) not greater than this value are treated as lying on the equator
+# by the fallback solution for nearly antipodal points
+EQUATOR_TOLERANCE = 1e-7
+
+# Default number of point pairs computed at once by vincenty_inverse_matrix
+MATRIX_CHUNK_PAIRS = 2 ** 18
+
+# Number of rows of batch input solved at once
+BATCH_CHUNK_ROWS = 10000
+
+# Number of azimuths with terms cached by GeodesicOrigin.azimuth_terms, the oldest one is dropped
+AZIMUTH_TERMS_CACHE_SIZE = 4096
+
+# Number of arrays of azimuths with terms cached by GeodesicOrigin.azimuth_terms_batch, the oldest one is dropped
+AZIMUTH_TERMS_BATCH_CACHE_SIZE = 8
+
+# Number of corrections of along track distance of the closest point of geodesic, see vincenty_cross_track_batch
+CROSS_TRACK_ITERATIONS = 1
+
+# Terms of Vincenty direct solution which depend only on the initial point and azimuth
+AzimuthTerms = namedtuple('AzimuthTerms', 'sin_alfa1 cos_alfa1 sigma1 sin_alfa cos_sq_alfa A B C')
+
 # Units of measure
 UOM_M = 'M'
 UOM_KM = 'KM'
@@ -13,12 +104,28 @@ UOM_FEET = 'FEET'
 UOM_SM = 'SM'
 UOM_NM = 'NM'
 
+# Meters in unit of measure
+UOM_TO_METERS = {UOM_M: 1.0,
+                 UOM_KM: 1000.0,
+                 UOM_FEET: 0.3048,
+                 UOM_SM: 1609.344,
+                 UOM_NM: 1852.0}
+
+# Distance optionally followed by unit of measure, e.g. 5.4 NM, 1200FEET
+DISTANCE_UOM_PATTERN = LazyPattern(r'^(?P<dist>.*?)\s*(?P<uom>KM|FEET|SM|NM|M)?$', re.IGNORECASE)
+
 # Types of angle
 A_LON = 'LON'
 A_LAT = 'LAT'
 
+# Number of decimal places of seconds in DMSH format produced by dd2_to_dmsh
+DMSH_SECONDS_DECIMALS = 4
+
+# Maximum number of decimal places of seconds converted on the fixed width path of dms_to_dd_bulk
+DMSH_FAST_DECIMALS = 12
+
 # Longitude and latitude regular expression,  format DMSH space separated
-LON_DMSH_PATTERN = re.compile(r'''(?P<deg>\d{3})  # Degrees
+LON_DMSH_PATTERN = LazyPattern(r'''(?P<deg>\d{3})  # Degrees
                                   (\s)  # Delimiter
                                   (?P<min>[0-5]\d)  # Minutes
                                   (\s)  # Delimiter
@@ -27,7 +134,7 @@ LON_DMSH_PATTERN = re.compile(r'''(?P<deg>\d{3})  # Degrees
                                   (?P<hem>[EW])  # Hemisphere indicator
                                ''', re.VERBOSE)
 
-LAT_DMSH_PATTERN = re.compile(r'''(?P<deg>\d{2}) # Degrees
+LAT_DMSH_PATTERN = LazyPattern(r'''(?P<deg>\d{2}) # Degrees
                                   (\s)  # Delimiter
                                   (?P<min>[0-5]\d) # Minutes
                                   (\s)  # Delimiter
@@ -51,6 +158,107 @@ def check_distance(dist):
         return bool(d > 0)
 
 
+def register_ellipsoid(name, a, b=None, f=None):
+    """ Adds ellipsoid to registry (or replaces ellipsoid with the same name).
+    :param name: str, name of ellipsoid
+    :param a: float, semi-major axis of ellipsoid in meters
+    :param b: float, semi-minor axis of ellipsoid in meters, None - computed from a and f
+    :param f: float, flattening of ellipsoid, None - computed from a and b
+    :return: Ellipsoid
+    """
+    if b is None and f is None:
+        raise ValueError('Semi-minor axis or flattening of ellipsoid {} is required.'.format(name))
+    ELLIPSOID_PARAMETERS[name.upper()] = (a, b, f)
+    ELLIPSOIDS.pop(name.upper(), None)
+    return get_ellipsoid(name)
+
+
+def get_ellipsoid(a, b=None, f=None):
+    """ Gets ellipsoid with derived constants from registry or from parameters, ellipsoids are created once.
+    :param a: Ellipsoid, str - name of ellipsoid (one of ELLIPSOID_PARAMETERS keys, case insensitive)
+    or float - semi-major axis of ellipsoid in meters
+    :param b: float, semi-minor axis of ellipsoid in meters (ignored if a is Ellipsoid or name)
+    :param f: float, flattening of ellipsoid (ignored if a is Ellipsoid or name)
+    :return: Ellipsoid
+    """
+    if isinstance(a, Ellipsoid):
+        return a
+    key = a.upper() if isinstance(a, str) else (a, b, f)
+    ellipsoid = ELLIPSOIDS.get(key)
+    if ellipsoid is None:
+        if isinstance(a, str):
+            try:
+                name, (a, b, f) = key, ELLIPSOID_PARAMETERS[key]
+            except KeyError:
+                raise ValueError('Ellipsoid should be one of {}: {}'.format(', '.join(ELLIPSOID_PARAMETERS), key))
+        else:
+            name = ''
+        if b is None:
+            b = a * (1 - f)
+        elif f is None:
+            f = (a - b) / a
+        ellipsoid = Ellipsoid(name, a, b, f, (a * a - b * b) / (b * b), (2 * a + b) / 3)
+        ELLIPSOIDS[key] = ellipsoid
+    return ellipsoid
+
+
+def get_uom_factor(uom):
+    """ Gets factor which converts distance in unit of measure to meters.
+    :param uom: str or array_like of str, unit of measure (one of UOM_TO_METERS keys, case insensitive),
+    array for unit per element
+    :return: float or numpy.ndarray: meters in unit of measure
+    """
+    if isinstance(uom, str):
+        try:
+            return UOM_TO_METERS[uom.upper()]
+        except KeyError:
+            raise ValueError('Unit of measure should be one of {}: {}'.format(', '.join(UOM_TO_METERS), uom))
+    uom = np.asarray(uom)
+    units, inverse = np.unique(uom, return_inverse=True)
+    factors = np.array([get_uom_factor(str(unit)) for unit in units.tolist()])
+    return factors[inverse].reshape(uom.shape)
+
+
+def to_meters(distance, uom=UOM_M):
+    """ Converts distance in unit of measure to meters.
+    :param distance: float or array_like, distance in unit of measure
+    :param uom: str or array_like of str, unit of measure, see get_uom_factor
+    :return: float or numpy.ndarray: distance in meters, distance itself if uom is UOM_M
+    """
+    if isinstance(uom, str):
+        if uom == UOM_M:
+            return distance
+        if isinstance(distance, (int, float)):
+            return distance * get_uom_factor(uom)
+    return np.multiply(distance, get_uom_factor(uom))
+
+
+def get_max_iterations(accuracy):
+    """ Gets maximum number of iterations of sigma for accuracy mode of direct solution.
+    :param accuracy: str, accuracy mode, one of ACCURACY_ITERATIONS keys or ACCURACY_SPHERE
+    :return: int: maximum number of iterations, None for ACCURACY_FULL and ACCURACY_SPHERE
+    """
+    if accuracy == ACCURACY_SPHERE:
+        return None
+    try:
+        return ACCURACY_ITERATIONS[accuracy]
+    except (KeyError, TypeError):
+        raise ValueError('Accuracy should be one of {}: {}'.format(
+            ', '.join(list(ACCURACY_ITERATIONS) + [ACCURACY_SPHERE]), accuracy))
+
+
+def split_distance_uom(distance, uom=UOM_M):
+    """ Splits distance given as text into number and unit of measure, e.g. 5.4 NM -> 5.4, NM.
+    :param distance: str, distance optionally followed by unit of measure
+    :param uom: str, unit of measure used if distance has no unit of measure
+    :return: dist, uom: str, str - distance without unit of measure, unit of measure (upper case)
+    """
+    match = DISTANCE_UOM_PATTERN.match(distance.strip())
+    if match.group('uom') is None:
+        return match.group('dist'), uom
+    return match.group('dist'), match.group('uom').upper()
+
+
 def check_azimuth(azm):
     """ Checks if azimuth is valid.
     Assumption: valid azimuth is a float or integer number within interval <0, 360>
@@ -145,48 +353,335 @@ def dd2_to_dmsh(dd, ang_type):
     return dmsh
 
 
-def vincenty_direct_solution(lon_initial, lat_initial_, azimuth_initial, distance, a, b, f):
-    """ Computes the latitude and longitude of the second point based on latitude, longitude,
-    of the first point and distance and azimuth from first point to second point.
-    Uses the algorithm by Thaddeus Vincenty for direct geodetic problem.
-    For more information refer to: http://www.ngs.noaa.gov/PUBS_LIB/inverse.pdf
-    :param lon_initial: float, longitude of the initial  point in decimal degrees format
-    :param lat_initial_: float, latitude of the initial point in decimal degrees format
-    :param azimuth_initial, azimuth from the initial point to the end point in decimal degrees format
+def dms_to_dd_fixed_width(codes, length, deg_width, hemispheres):
+    """ Converts coordinates in DMSH format of the same length given as matrix of character codes.
+    Only values in the canonical layout (ASCII digits, single spaces, decimal seconds with at most
+    DMSH_FAST_DECIMALS digits) are converted, the others are left for the regular expression path.
+    :param codes: numpy.ndarray, matrix (values, characters) of unicode code points
+    :param length: int, length of values
+    :param deg_width: int, number of digits of degrees
+    :param hemispheres: str, hemisphere letters, the first one positive, e.g. 'EW'
+    :return: dd, converted: numpy.ndarray, numpy.ndarray: decimal degrees (NaN if out of range),
+    mask of values converted on the fast path
+    """
+    # Number of decimal places of seconds, -1 if seconds have no decimal point
+    decimals = length - deg_width - 9
+    if decimals > DMSH_FAST_DECIMALS or decimals == 0 or decimals < -1:
+        return np.full(len(codes), np.nan), np.zeros(len(codes), dtype=bool)
+
+    digits = codes[:, :length].astype(np.int64) - ord('0')
+    sec_digits = list(range(deg_width + 4, deg_width + 6)) + list(range(deg_width + 7, length - 2))
+    digit_positions = list(range(deg_width)) + [deg_width + 1, deg_width + 2] + sec_digits
+    converted = np.all((digits[:, digit_positions] >= 0) & (digits[:, digit_positions] <= 9), axis=1)
+    for position in (deg_width, deg_width + 3, length - 2):
+        converted &= codes[:, position] == ord(' ')
+    if decimals > 0:
+        converted &= codes[:, deg_width + 6] == ord('.')
+    converted &= (digits[:, deg_width + 1] <= 5) & (digits[:, deg_width + 4] <= 5)
+    positive = codes[:, length - 1] == ord(hemispheres[0])
+    converted &= positive | (codes[:, length - 1] == ord(hemispheres[1]))
+
+    def to_int(positions):
+        value = np.zeros(len(codes), dtype=np.int64)
+        for position in positions:
+            value = value * 10 + digits[:, position]
+        return value
+
+    d = to_int(range(deg_width)).astype(np.float64)
+    m = to_int([deg_width + 1, deg_width + 2]).astype(np.float64)
+    # Integer divided by exact power of ten is correctly rounded, the same as float() of the seconds string
+    s = to_int(sec_digits).astype(np.float64) / 10.0 ** max(decimals, 0)
+    dd = d + m / 60 + s / 3600
+    max_deg = 180 if deg_width == 3 else 90
+    dd[(d > max_deg) | ((d == max_deg) & ((m > 0) | (s > 0)))] = np.nan
+    return np.where(positive, dd, -dd), converted
+
+
+def dms_to_dd_bulk(values, ang_type):
+    """ Converts array of coordinates in DMSH format to decimal degrees format, result is identical to
+    lon_dms_to_dd or lat_dms_to_dd applied to every value.
+    :param values: array_like, coordinates in DMSH format
+    :param ang_type: string, coordinate type
+    :return: numpy.ndarray: coordinates in decimal degrees format, NaN if value is invalid coordinate
+    """
+    if ang_type == A_LON:
+        deg_width, hemispheres, scalar_function = 3, 'EW', lon_dms_to_dd
+    elif ang_type == A_LAT:
+        deg_width, hemispheres, scalar_function = 2, 'NS', lat_dms_to_dd
+    else:
+        raise ValueError('Unknown angle type: {}'.format(ang_type))
+
+    values = np.asarray(values, dtype=np.str_).ravel()
+    dd = np.full(len(values), np.nan)
+    if len(values) == 0:
+        return dd
+    width = values.dtype.itemsize // 4
+    codes = np.ascontiguousarray(values).view(np.uint32).reshape(len(values), width)
+    lengths = np.char.str_len(values)
+    converted = np.zeros(len(values), dtype=bool)
+    for length in np.unique(lengths).tolist():
+        rows = np.flatnonzero(lengths == length)
+        dd[rows], converted[rows] = dms_to_dd_fixed_width(codes[rows], length, deg_width, hemispheres)
+
+    for i in np.flatnonzero(~converted).tolist():
+        value = scalar_function(str(values[i]))
+        dd[i] = np.nan if value is None else value
+    return dd
+
+
+def lon_dms_to_dd_bulk(values):
+    """ Converts array of longitudes in DMSH format to decimal degrees format, see dms_to_dd_bulk. """
+    return dms_to_dd_bulk(values, A_LON)
+
+
+def lat_dms_to_dd_bulk(values):
+    """ Converts array of latitudes in DMSH format to decimal degrees format, see dms_to_dd_bulk. """
+    return dms_to_dd_bulk(values, A_LAT)
+
+
+def dd_to_dmsh_bulk(dd, ang_type):
+    """ Converts array of coordinates in decimal degrees format to DMSH format, result is identical to
+    dd2_to_dmsh applied to every value.
+    :param dd: array_like, latitudes or longitudes in decimal degrees format
+    :param ang_type: string, coordinate type
+    :return: numpy.ndarray: coordinates in DMSH format, empty string for values which are not finite
+    """
+    if ang_type == A_LON:
+        deg_width, hemispheres = 3, 'EW'
+    elif ang_type == A_LAT:
+        deg_width, hemispheres = 2, 'NS'
+    else:
+        raise ValueError('Unknown angle type: {}'.format(ang_type))
+
+    dd = np.asarray(dd, dtype=np.float64).ravel()
+    finite = np.isfinite(dd)
+    abs_dd = np.where(finite, np.fabs(dd), 0)
+    d = np.floor(abs_dd)
+    m = np.floor((abs_dd - d) * 60)
+    s = (((abs_dd - d) * 60) - m) * 60
+    # Seconds rounded to 4 decimal places, values close to the half are rounded with round() like in dd2_to_dmsh
+    s_scaled = s * 10 ** DMSH_SECONDS_DECIMALS
+    s_int = np.rint(s_scaled)
+    for i in np.flatnonzero(np.fabs(np.fabs(s_scaled - np.floor(s_scaled)) - 0.5) < 1e-6).tolist():
+        s_int[i] = round(round(float(s[i]), DMSH_SECONDS_DECIMALS) * 10 ** DMSH_SECONDS_DECIMALS)
+    s_int = s_int.astype(np.int64)
+    d = d.astype(np.int64)
+    m = m.astype(np.int64)
+
+    width = deg_width + DMSH_SECONDS_DECIMALS + 9
+    chars = np.full((len(dd), width), ord(' '), dtype=np.uint8)
+    for i in range(deg_width):
+        chars[:, i] = d // 10 ** (deg_width - 1 - i) % 10
+    chars[:, deg_width + 1] = m // 10
+    chars[:, deg_width + 2] = m % 10
+    sec_start = deg_width + 4
+    sec_end = sec_start + DMSH_SECONDS_DECIMALS + 3
+    for i, position in enumerate(p for p in range(sec_start, sec_end) if p != sec_start + 2):
+        chars[:, position] = s_int // 10 ** (DMSH_SECONDS_DECIMALS + 1 - i) % 10
+    digit_positions = [p for p in range(sec_end) if p not in (deg_width, deg_width + 3, sec_start + 2)]
+    chars[:, digit_positions] += ord('0')
+    chars[:, sec_start + 2] = ord('.')
+    chars[:, width - 1] = np.where(dd < 0, ord(hemispheres[1]), ord(hemispheres[0]))
+
+    dmsh = chars.view('S{}'.format(width)).ravel().astype(np.str_)
+    dmsh[~finite] = ''
+    # Values which do not fit fixed width (degrees out of range) are formatted with dd2_to_dmsh
+    wide = np.flatnonzero(finite & (d >= 10 ** deg_width)).tolist()
+    if wide:
+        wide_dmsh = [dd2_to_dmsh(float(dd[i]), ang_type) for i in wide]
+        dmsh = dmsh.astype('U{}'.format(max(width, max(len(value) for value in wide_dmsh))))
+        dmsh[wide] = wide_dmsh
+    return dmsh
+
+
+def spherical_direct_solution(lon_initial, lat_initial, azimuth_initial, distance, radius):
+    """ Computes the latitude and longitude of the second point on sphere, fast approximation of direct
+    geodetic problem solution.
+    :param lon_initial: float, longitude of the initial point in decimal degrees format
+    :param lat_initial: float, latitude of the initial point in decimal degrees format
+    :param azimuth_initial: float, azimuth from the initial point to the end point in decimal degrees format
     :param distance: float, distance from first point to second point; meters
-    :param a: float, semi-major axis of ellipsoid in meters
-    :param b: float, semi-minor axis of ellipsoid in meters
-    :param f: float, flattening of ellipsoid
+    :param radius: float, radius of sphere in meters
     :return lon_end, lat_end: float, float longitude and longitude of the end point in decimal degrees format
     """
-    # Convert latitude, longitude, azimuth of the initial point to radians
-    lon1 = math.radians(lon_initial)
-    lat1 = math.radians(lat_initial_)
+    lat1 = math.radians(lat_initial)
+    alfa1 = math.radians(azimuth_initial)
+    delta = distance / radius
+
+    sin_lat2 = math.sin(lat1) * math.cos(delta) + math.cos(lat1) * math.sin(delta) * math.cos(alfa1)
+    lat2 = math.asin(max(-1.0, min(1.0, sin_lat2)))
+    lon2 = math.radians(lon_initial) + math.atan2(math.sin(alfa1) * math.sin(delta) * math.cos(lat1),
+                                                  math.cos(delta) - math.sin(lat1) * sin_lat2)
+    lon2 = (lon2 + 3 * math.pi) % (2 * math.pi) - math.pi
+    return math.degrees(lon2), math.degrees(lat2)
+
+
+def spherical_direct_solution_batch(lon_initial, lat_initial, azimuth_initial, distance, radius):
+    """ Vectorized version of spherical_direct_solution, arguments are broadcast against each other.
+    :param lon_initial: float or array_like, longitudes of the initial points in decimal degrees format
+    :param lat_initial: float or array_like, latitudes of the initial points in decimal degrees format
+    :param azimuth_initial: float or array_like, azimuths from the initial points to the end points in decimal degrees
+    :param distance: float or array_like, distances from initial points to end points; meters
+    :param radius: float, radius of sphere in meters
+    :return lon_end, lat_end: numpy.ndarray, numpy.ndarray, longitudes and latitudes of the end points
+    in decimal degrees format
+    """
+    lat1 = np.radians(np.asarray(lat_initial, dtype=np.float64))
+    alfa1 = np.radians(np.asarray(azimuth_initial, dtype=np.float64))
+    delta = np.asarray(distance, dtype=np.float64) / radius
+
+    sin_lat2 = np.sin(lat1) * np.cos(delta) + np.cos(lat1) * np.sin(delta) * np.cos(alfa1)
+    lat2 = np.arcsin(np.clip(sin_lat2, -1, 1))
+    lon2 = np.radians(np.asarray(lon_initial, dtype=np.float64)) + np.arctan2(
+        np.sin(alfa1) * np.sin(delta) * np.cos(lat1), np.cos(delta) - np.sin(lat1) * sin_lat2)
+    lon2 = (lon2 + 3 * math.pi) % (2 * math.pi) - math.pi
+    return np.degrees(lon2), np.degrees(lat2)
+
+
+def spherical_segment_distance_batch(lon_initial, lat_initial, lon_end, lat_end, lon, lat, radius):
+    """ Computes distances of points from great circle segments on sphere, fast approximation of distances
+    computed with vincenty_cross_track_batch. Arguments are broadcast against each other.
+    :param lon_initial: float or array_like, longitudes of the initial points of segments in decimal degrees format
+    :param lat_initial: float or array_like, latitudes of the initial points of segments in decimal degrees format
+    :param lon_end: float or array_like, longitudes of the end points of segments in decimal degrees format
+    :param lat_end: float or array_like, latitudes of the end points of segments in decimal degrees format
+    :param lon: float or array_like, longitudes of points in decimal degrees format
+    :param lat: float or array_like, latitudes of points in decimal degrees format
+    :param radius: float, radius of sphere in meters
+    :return: numpy.ndarray: distances from segments (from the end points if the closest point of great circle
+    is beyond segment) in meters
+    """
+    def unit_vectors(lon_dd, lat_dd):
+        lon_rad = np.radians(np.asarray(lon_dd, dtype=np.float64))
+        lat_rad = np.radians(np.asarray(lat_dd, dtype=np.float64))
+        cos_lat = np.cos(lat_rad)
+        return np.stack(np.broadcast_arrays(cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)),
+                        axis=-1)
+
+    initial = unit_vectors(lon_initial, lat_initial)
+    end = unit_vectors(lon_end, lat_end)
+    point = unit_vectors(lon, lat)
+    normal = np.cross(initial, end)
+    initial_cross = np.cross(initial, point)
+    end_cross = np.cross(end, point)
+
+    cross_track = np.fabs(np.arcsin(np.clip(np.sum(normal * point, axis=-1) /
+                                            np.maximum(np.linalg.norm(normal, axis=-1), 1e-300), -1, 1)))
+    # The closest point of great circle is within segment if the point is between planes perpendicular
+    # to the segment plane through the end points
+    within = ((np.sum(initial_cross * normal, axis=-1) >= 0) & (np.sum(end_cross * normal, axis=-1) <= 0) &
+              np.any(normal != 0, axis=-1))
+    distance_initial = np.arctan2(np.linalg.norm(initial_cross, axis=-1), np.sum(initial * point, axis=-1))
+    distance_end = np.arctan2(np.linalg.norm(end_cross, axis=-1), np.sum(end * point, axis=-1))
+    return radius * np.where(within, cross_track, np.minimum(distance_initial, distance_end))
+
+
+def vincenty_direct_azimuth_terms(tan_u1, azimuth_initial, ellipsoid):
+    """ Computes terms of Vincenty direct solution which depend only on the initial point and azimuth.
+    :param tan_u1: float, tangent of reduced latitude of the initial point
+    :param azimuth_initial: float, azimuth from the initial point in decimal degrees format
+    :param ellipsoid: Ellipsoid
+    :return: AzimuthTerms
+    """
     alfa1 = math.radians(azimuth_initial)
 
     sin_alfa1 = math.sin(alfa1)
     cos_alfa1 = math.cos(alfa1)
 
-    # U1 - reduced latitude
-    tan_u1 = (1 - f) * math.tan(lat1)
     cos_u1 = 1 / math.sqrt(1 + tan_u1 * tan_u1)
-    sin_u1 = tan_u1 * cos_u1
 
     # sigma1 - angular distance on the sphere from the equator to initial point
-    sigma1 = math.atan2(tan_u1, math.cos(alfa1))
+    sigma1 = math.atan2(tan_u1, cos_alfa1)
 
     # sin_alfa - azimuth of the geodesic at the equator
     sin_alfa = cos_u1 * sin_alfa1
     cos_sq_alfa = 1 - sin_alfa * sin_alfa
-    u_sq = cos_sq_alfa * (a * a - b * b) / (b * b)
+    u_sq = cos_sq_alfa * ellipsoid.ep_sq
     A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
     B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    f = ellipsoid.f
+    C = f / 16 * cos_sq_alfa * (4 + f * (4 - 3 * cos_sq_alfa))
+
+    return AzimuthTerms(sin_alfa1, cos_alfa1, sigma1, sin_alfa, cos_sq_alfa, A, B, C)
+
+
+def vincenty_direct_series_sigma(sigma1, cos_sq_alfa, distance, b, f):
+    """ Computes angular distance sigma of direct geodetic problem without iteration, with series expansion
+    in terms of epsilon to order 6 (C. F. F. Karney, Algorithms for geodesics, 2013, eq. 17-21).
+    Used as fallback when iteration of sigma does not converge, difference from converged Vincenty
+    sigma is below 1e-11 rad.
+    :param sigma1: float or numpy.ndarray, angular distance from the equator to the initial point in radians
+    :param cos_sq_alfa: float or numpy.ndarray, square of cosine of azimuth of geodesic at the equator
+    :param distance: float or numpy.ndarray, distance from the initial point to the end point; meters
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :return: float or numpy.ndarray: sigma in radians
+    """
+    # Scalar inputs are computed with math, so that the scalar solution does not import NumPy
+    sqrt, sin = (math.sqrt, math.sin) if isinstance(sigma1, float) else (np.sqrt, np.sin)
+    k_sq = f * (2 - f) / ((1 - f) * (1 - f)) * cos_sq_alfa
+    eps = k_sq / ((sqrt(1 + k_sq) + 1) ** 2)
+    eps2 = eps * eps
+    A1 = (1 + eps2 * (1 / 4 + eps2 * (1 / 64 + eps2 / 256))) / (1 - eps)
+    C1 = [eps * (-1 / 2 + eps2 * (3 / 16 - eps2 / 32)),
+          eps2 * (-1 / 16 + eps2 * (1 / 32 - eps2 * 9 / 2048)),
+          eps * eps2 * (-1 / 48 + eps2 * 3 / 256),
+          eps2 * eps2 * (-5 / 512 + eps2 * 3 / 512),
+          eps * eps2 * eps2 * -7 / 1280,
+          eps2 * eps2 * eps2 * -7 / 2048]
+    C1p = [eps * (1 / 2 + eps2 * (-9 / 32 + eps2 * 205 / 1536)),
+           eps2 * (5 / 16 + eps2 * (-37 / 96 + eps2 * 1335 / 4096)),
+           eps * eps2 * (29 / 96 - eps2 * 75 / 128),
+           eps2 * eps2 * (539 / 1536 - eps2 * 2391 / 2560),
+           eps * eps2 * eps2 * 3467 / 7680,
+           eps2 * eps2 * eps2 * 38081 / 61440]
+    # tau - distance along geodesic normalized to the unit sphere
+    tau1 = sigma1 + sum(c * sin(2 * order * sigma1) for order, c in enumerate(C1, 1))
+    tau2 = tau1 + distance / (b * A1)
+    sigma2 = tau2 + sum(c * sin(2 * order * tau2) for order, c in enumerate(C1p, 1))
+    return sigma2 - sigma1
+
+
+def vincenty_direct_from_terms(lon_initial, tan_u1, terms, distance, ellipsoid, max_iterations=None):
+    """ Computes end point of Vincenty direct solution from precomputed terms of the initial point and azimuth.
+    :param lon_initial: float, longitude of the initial point in decimal degrees format
+    :param tan_u1: float, tangent of reduced latitude of the initial point
+    :param terms: AzimuthTerms, terms computed with vincenty_direct_azimuth_terms
+    :param distance: float, distance from first point to second point; meters
+    :param ellipsoid: Ellipsoid
+    :param max_iterations: int, maximum number of iterations of sigma, None - iterate until convergence,
+    at most VINCENTY_DIRECT_MAX_ITERATIONS times, then sigma is computed with vincenty_direct_series_sigma
+    :return lon_end, lat_end: float, float longitude and longitude of the end point in decimal degrees format
+    """
+    sin_alfa1, cos_alfa1, sigma1, sin_alfa, cos_sq_alfa, A, B, C = terms
+    b, f = ellipsoid.b, ellipsoid.f
+    lon1 = math.radians(lon_initial)
+
+    # U1 - reduced latitude
+    cos_u1 = 1 / math.sqrt(1 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
 
     sigma = distance / (b * A)
     sigmap = 1
     sin_sigma, cos_sigma, cos2sigma_m = None, None, None
+    iterations = 0
+    converged = True
+    fallback = False
+    iterations_limit = VINCENTY_DIRECT_MAX_ITERATIONS if max_iterations is None else max_iterations
 
     while math.fabs(sigma - sigmap) > 1e-12:
+        if iterations == iterations_limit:
+            if max_iterations is None:
+                # Iteration stalled - sigma from series expansion
+                sigma = float(vincenty_direct_series_sigma(sigma1, cos_sq_alfa, distance, b, f))
+                fallback = True
+            # Iteration stopped before convergence - terms for the last value of sigma
+            cos2sigma_m = math.cos(2 * sigma1 + sigma)
+            sin_sigma = math.sin(sigma)
+            cos_sigma = math.cos(sigma)
+            converged = False
+            break
+        iterations += 1
         cos2sigma_m = math.cos(2 * sigma1 + sigma)
         sin_sigma = math.sin(sigma)
         cos_sigma = math.cos(sigma)
@@ -196,6 +691,16 @@ def vincenty_direct_solution(lon_initial, lat_initial_, azimuth_initial, distanc
         sigmap = sigma
         sigma = distance / (b * A) + d_sigma
 
+    collector = instrumentation.ACTIVE
+    if collector is not None:
+        collector.count('vincenty_direct.calls')
+        collector.count('vincenty_direct.iterations', iterations)
+        collector.add_histogram('vincenty_direct.iterations', iterations)
+        if fallback:
+            collector.count('vincenty_direct.fallbacks')
+        elif not converged:
+            collector.count('vincenty_direct.not_converged')
+
     var_aux = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alfa1  # Auxiliary variable
 
     # Latitude of the end point in radians
@@ -203,7 +708,6 @@ def vincenty_direct_solution(lon_initial, lat_initial_, azimuth_initial, distanc
                       (1 - f) * math.sqrt(sin_alfa * sin_alfa + var_aux * var_aux))
 
     lamb = math.atan2(sin_sigma * sin_alfa1, cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alfa1)
-    C = f / 16 * cos_sq_alfa * (4 + f * (4 - 3 * cos_sq_alfa))
     L = lamb - (1 - C) * f * sin_alfa * (
                 sigma + C * sin_sigma * (cos2sigma_m + C * cos_sigma * (-1 + 2 * cos2sigma_m * cos2sigma_m)))
     # Longitude of the end point in radians
@@ -216,39 +720,854 @@ def vincenty_direct_solution(lon_initial, lat_initial_, azimuth_initial, distanc
     return lon_end, lat_end
 
 
-def compute_position(lon_dmsh, lat_dmsh, azimuth, distance):
-    """ Computes position of end point based on position of initial point and initial azimuth.
+def vincenty_direct_solution(lon_initial, lat_initial_, azimuth_initial, distance, a, b=None, f=None,
+                             accuracy=ACCURACY_FULL, uom=UOM_M):
+    """ Computes the latitude and longitude of the second point based on latitude, longitude,
+    of the first point and distance and azimuth from first point to second point.
+    Uses the algorithm by Thaddeus Vincenty for direct geodetic problem.
+    For more information refer to: http://www.ngs.noaa.gov/PUBS_LIB/inverse.pdf
+    :param lon_initial: float, longitude of the initial  point in decimal degrees format
+    :param lat_initial_: float, latitude of the initial point in decimal degrees format
+    :param azimuth_initial, azimuth from the initial point to the end point in decimal degrees format
+    :param distance: float, distance from first point to second point in uom units
+    :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f omitted),
+    see get_ellipsoid
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :param accuracy: str, accuracy mode, one of ACCURACY_ITERATIONS keys or ACCURACY_SPHERE
+    :param uom: str, unit of measure of distance, one of UOM_TO_METERS keys
+    :return lon_end, lat_end: float, float longitude and longitude of the end point in decimal degrees format
+    """
+    ellipsoid = get_ellipsoid(a, b, f)
+    max_iterations = get_max_iterations(accuracy)
+    if uom != UOM_M:
+        distance = distance * get_uom_factor(uom)
+    if accuracy == ACCURACY_SPHERE:
+        return spherical_direct_solution(lon_initial, lat_initial_, azimuth_initial, distance, ellipsoid.mean_radius)
+
+    # U1 - reduced latitude
+    tan_u1 = (1 - ellipsoid.f) * math.tan(math.radians(lat_initial_))
+    terms = vincenty_direct_azimuth_terms(tan_u1, azimuth_initial, ellipsoid)
+    return vincenty_direct_from_terms(lon_initial, tan_u1, terms, distance, ellipsoid, max_iterations)
+
+
+def vincenty_direct_azimuth_terms_batch(tan_u1, azimuth_initial, ellipsoid):
+    """ Vectorized version of vincenty_direct_azimuth_terms.
+    :param tan_u1: numpy.ndarray, tangents of reduced latitudes of the initial points
+    :param azimuth_initial: numpy.ndarray, azimuths from the initial points in decimal degrees format
+    :param ellipsoid: Ellipsoid
+    :return: AzimuthTerms: terms as arrays
+    """
+    alfa1 = np.radians(azimuth_initial)
+
+    sin_alfa1 = np.sin(alfa1)
+    cos_alfa1 = np.cos(alfa1)
+
+    cos_u1 = 1 / np.sqrt(1 + tan_u1 * tan_u1)
+
+    # sigma1 - angular distance on the sphere from the equator to initial point
+    sigma1 = np.arctan2(tan_u1, cos_alfa1)
+
+    # sin_alfa - azimuth of the geodesic at the equator
+    sin_alfa = cos_u1 * sin_alfa1
+    cos_sq_alfa = 1 - sin_alfa * sin_alfa
+    u_sq = cos_sq_alfa * ellipsoid.ep_sq
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    f = ellipsoid.f
+    C = f / 16 * cos_sq_alfa * (4 + f * (4 - 3 * cos_sq_alfa))
+
+    return AzimuthTerms(sin_alfa1, cos_alfa1, sigma1, sin_alfa, cos_sq_alfa, A, B, C)
+
+
+def vincenty_direct_from_terms_batch(lon_initial, tan_u1, terms, distance, ellipsoid, max_iterations=None,
+                                     return_iterations=False):
+    """ Vectorized version of vincenty_direct_from_terms. Arguments (also arrays of terms) are broadcast
+    against each other, so e.g. terms of azimuths with shape (n, 1) can be combined with distances with shape (1, m).
+    Sigma is iterated for the whole array at once, elements which already converged are masked out
+    of the next iterations.
+    :param lon_initial: float or array_like, longitudes of the initial points in decimal degrees format
+    :param tan_u1: float or array_like, tangents of reduced latitudes of the initial points
+    :param terms: AzimuthTerms, terms computed with vincenty_direct_azimuth_terms_batch
+    :param distance: float or array_like, distances from initial points to end points; meters
+    :param ellipsoid: Ellipsoid
+    :param max_iterations: int, maximum number of iterations of sigma, None - iterate until convergence,
+    at most VINCENTY_DIRECT_MAX_ITERATIONS times, then sigma is computed with vincenty_direct_series_sigma
+    :param return_iterations: bool, return also number of iterations of every element
+    :return lon_end, lat_end[, iterations]: numpy.ndarray, numpy.ndarray, longitudes and latitudes of the end points
+    in decimal degrees format, numbers of iterations of sigma (VINCENTY_DIRECT_MAX_ITERATIONS + 1 for elements
+    solved with series expansion)
+    """
+    arrays = np.broadcast_arrays(np.asarray(lon_initial, dtype=np.float64), np.asarray(tan_u1, dtype=np.float64),
+                                 np.asarray(distance, dtype=np.float64), *terms)
+    shape = arrays[0].shape
+    lon1, tan_u1, distance, sin_alfa1, cos_alfa1, sigma1, sin_alfa, cos_sq_alfa, A, B, C = [
+        array.ravel() for array in arrays]
+    b, f = ellipsoid.b, ellipsoid.f
+    lon1 = np.radians(lon1)
+
+    # U1 - reduced latitude
+    cos_u1 = 1 / np.sqrt(1 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
+
+    sigma_0 = distance / (b * A)
+    sigma = sigma_0.copy()
+    sin_sigma = np.empty_like(sigma)
+    cos_sigma = np.empty_like(sigma)
+    cos2sigma_m = np.empty_like(sigma)
+
+    collector = instrumentation.ACTIVE
+    start = time.perf_counter() if collector is not None else None
+
+    # Indices of elements which have not converged yet
+    active = np.arange(sigma.size)
+    iterations = 0
+    point_iterations = 0
+    iteration_counts = np.zeros(sigma.size, dtype=np.int32)
+    iterations_limit = VINCENTY_DIRECT_MAX_ITERATIONS if max_iterations is None else max_iterations
+    fallbacks = 0
+    while active.size:
+        if iterations == iterations_limit:
+            if max_iterations is None:
+                # Iteration stalled - sigma from series expansion
+                sigma[active] = vincenty_direct_series_sigma(sigma1[active], cos_sq_alfa[active], distance[active],
+                                                             b, f)
+                iteration_counts[active] += 1
+                fallbacks = active.size
+            # Iteration stopped before convergence - terms for the last value of sigma
+            cos2sigma_m[active] = np.cos(2 * sigma1[active] + sigma[active])
+            sin_sigma[active] = np.sin(sigma[active])
+            cos_sigma[active] = np.cos(sigma[active])
+            break
+        iterations += 1
+        point_iterations += active.size
+        iteration_counts[active] += 1
+        sigma_a = sigma[active]
+        B_a = B[active]
+        c2sm = np.cos(2 * sigma1[active] + sigma_a)
+        s_s = np.sin(sigma_a)
+        c_s = np.cos(sigma_a)
+        d_sigma = B_a * s_s * (c2sm + B_a / 4 * (
+                    c_s * (-1 + 2 * c2sm * c2sm) - B_a / 6 * c2sm * (
+                        -3 + 4 * s_s * s_s) * (-3 + 4 * c2sm * c2sm)))
+        cos2sigma_m[active] = c2sm
+        sin_sigma[active] = s_s
+        cos_sigma[active] = c_s
+        sigma[active] = sigma_0[active] + d_sigma
+        active = active[np.fabs(sigma[active] - sigma_a) > 1e-12]
+
+    var_aux = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alfa1  # Auxiliary variable
+
+    # Latitude of the end points in radians
+    lat2 = np.arctan2(sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alfa1,
+                      (1 - f) * np.sqrt(sin_alfa * sin_alfa + var_aux * var_aux))
+
+    lamb = np.arctan2(sin_sigma * sin_alfa1, cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alfa1)
+    L = lamb - (1 - C) * f * sin_alfa * (
+                sigma + C * sin_sigma * (cos2sigma_m + C * cos_sigma * (-1 + 2 * cos2sigma_m * cos2sigma_m)))
+    # Longitude of the end points in radians
+    lon2 = (lon1 + L + 3 * math.pi) % (2 * math.pi) - math.pi
+
+    # Convert to decimal degrees
+    lon_end = np.degrees(lon2).reshape(shape)
+    lat_end = np.degrees(lat2).reshape(shape)
+
+    if collector is not None:
+        collector.add_time('vincenty_direct_batch.total', time.perf_counter() - start)
+        collector.count('vincenty_direct_batch.calls')
+        collector.count('vincenty_direct_batch.points', sigma.size)
+        collector.count('vincenty_direct_batch.iterations', iterations)
+        collector.count('vincenty_direct_batch.point_iterations', point_iterations)
+        collector.count('vincenty_direct_batch.fallbacks', fallbacks)
+        collector.count('vincenty_direct_batch.not_converged', active.size - fallbacks)
+        for value, count in zip(*np.unique(iteration_counts, return_counts=True)):
+            collector.add_histogram('vincenty_direct_batch.iterations', int(value), int(count))
+
+    if return_iterations:
+        return lon_end, lat_end, iteration_counts.reshape(shape)
+    return lon_end, lat_end
+
+
+def vincenty_direct_solution_batch(lon_initial, lat_initial, azimuth_initial, distance, a, b=None, f=None,
+                                   accuracy=ACCURACY_FULL, return_iterations=False, uom=UOM_M):
+    """ Vectorized version of vincenty_direct_solution - computes end points for arrays of initial points,
+    azimuths and distances in one call. Arguments are broadcast against each other, so e.g. single origin
+    can be combined with arrays of azimuths and distances.
+    Sigma is iterated for the whole array at once, elements which already converged are masked out
+    of the next iterations.
+    :param lon_initial: float or array_like, longitudes of the initial points in decimal degrees format
+    :param lat_initial: float or array_like, latitudes of the initial points in decimal degrees format
+    :param azimuth_initial: float or array_like, azimuths from the initial points to the end points in decimal degrees
+    :param distance: float or array_like, distances from initial points to end points in uom units
+    :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f omitted),
+    see get_ellipsoid
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :param accuracy: str, accuracy mode, one of ACCURACY_ITERATIONS keys or ACCURACY_SPHERE
+    :param return_iterations: bool, return also number of iterations of sigma of every element,
+    see vincenty_direct_from_terms_batch (zeros for ACCURACY_SPHERE)
+    :param uom: str or array_like of str, unit of measure of all distances or of every distance (broadcast
+    against distance), one of UOM_TO_METERS keys
+    :return lon_end, lat_end[, iterations]: numpy.ndarray, numpy.ndarray, longitudes and latitudes of the end points
+    in decimal degrees format
+    """
+    ellipsoid = get_ellipsoid(a, b, f)
+    max_iterations = get_max_iterations(accuracy)
+    distance = to_meters(distance, uom)
+    if accuracy == ACCURACY_SPHERE:
+        lon_end, lat_end = spherical_direct_solution_batch(lon_initial, lat_initial, azimuth_initial, distance,
+                                                           ellipsoid.mean_radius)
+        if return_iterations:
+            return lon_end, lat_end, np.zeros(np.shape(lon_end), dtype=np.int32)
+        return lon_end, lat_end
+
+    # U1 - reduced latitude
+    tan_u1 = (1 - ellipsoid.f) * np.tan(np.radians(np.asarray(lat_initial, dtype=np.float64)))
+    terms = vincenty_direct_azimuth_terms_batch(tan_u1, np.asarray(azimuth_initial, dtype=np.float64), ellipsoid)
+    return vincenty_direct_from_terms_batch(lon_initial, tan_u1, terms, distance, ellipsoid,
+                                            max_iterations, return_iterations)
+
+
+class GeodesicOrigin:
+    """ Initial point of many direct geodetic problem solutions, e.g. range rings, arcs and fans around point.
+    Terms which depend only on the initial point (reduced latitude) are computed once, terms which depend
+    on initial point and azimuth (sigma1, A, B, C...) are computed once per azimuth and cached.
+    Usage:
+        origin = GeodesicOrigin(-85.25, 31.57)
+        lon, lat = origin.direct(45, 1000)
+        ring_lon, ring_lat = origin.ring(9260, 360)
+    """
+
+    def __init__(self, lon, lat, a=WGS84_A, b=WGS84_B, f=WGS84_F, accuracy=ACCURACY_FULL):
+        """
+        :param lon: float, longitude of the initial point in decimal degrees format
+        :param lat: float, latitude of the initial point in decimal degrees format
+        :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f ignored),
+        see get_ellipsoid
+        :param b: float, semi-minor axis of ellipsoid in meters
+        :param f: float, flattening of ellipsoid
+        :param accuracy: str, accuracy mode, one of ACCURACY_ITERATIONS keys or ACCURACY_SPHERE
+        """
+        self.lon = lon
+        self.lat = lat
+        self.ellipsoid = get_ellipsoid(a, b, f)
+        self.a = self.ellipsoid.a
+        self.b = self.ellipsoid.b
+        self.f = self.ellipsoid.f
+        self.accuracy = accuracy
+        self.max_iterations = get_max_iterations(accuracy)
+        # U1 - reduced latitude
+        self.tan_u1 = (1 - self.f) * math.tan(math.radians(lat))
+        self._azimuth_terms = {}
+        # Terms of arrays of azimuths by (shape, bytes of array)
+        self._batch_terms = {}
+
+    def azimuth_terms(self, azimuth):
+        """ Gets terms for azimuth, terms of the last AZIMUTH_TERMS_CACHE_SIZE azimuths are cached.
+        :param azimuth: float, azimuth from the initial point in decimal degrees format
+        :return: AzimuthTerms
+        """
+        terms = self._azimuth_terms.get(azimuth)
+        if terms is None:
+            terms = vincenty_direct_azimuth_terms(self.tan_u1, azimuth, self.ellipsoid)
+            while len(self._azimuth_terms) >= AZIMUTH_TERMS_CACHE_SIZE:
+                del self._azimuth_terms[next(iter(self._azimuth_terms))]
+            self._azimuth_terms[azimuth] = terms
+        return terms
+
+    def azimuth_terms_batch(self, azimuths):
+        """ Gets terms for array of azimuths, terms of the last AZIMUTH_TERMS_BATCH_CACHE_SIZE arrays are cached.
+        :param azimuths: numpy.ndarray, azimuths from the initial point in decimal degrees format
+        :return: AzimuthTerms: terms as arrays
+        """
+        azimuths = np.asarray(azimuths, dtype=np.float64)
+        key = (azimuths.shape, azimuths.tobytes())
+        terms = self._batch_terms.get(key)
+        if terms is None:
+            terms = vincenty_direct_azimuth_terms_batch(self.tan_u1, azimuths, self.ellipsoid)
+            while len(self._batch_terms) >= AZIMUTH_TERMS_BATCH_CACHE_SIZE:
+                del self._batch_terms[next(iter(self._batch_terms))]
+            self._batch_terms[key] = terms
+        return terms
+
+    def direct(self, azimuth, distance, uom=UOM_M):
+        """ Computes end point, result is the same as from vincenty_direct_solution.
+        :param azimuth: float, azimuth from the initial point to the end point in decimal degrees format
+        :param distance: float, distance from the initial point to the end point in uom units
+        :param uom: str, unit of measure of distance, one of UOM_TO_METERS keys
+        :return lon_end, lat_end: float, float longitude and longitude of the end point in decimal degrees format
+        """
+        if uom != UOM_M:
+            distance = distance * get_uom_factor(uom)
+        if self.accuracy == ACCURACY_SPHERE:
+            return spherical_direct_solution(self.lon, self.lat, azimuth, distance, self.ellipsoid.mean_radius)
+        return vincenty_direct_from_terms(self.lon, self.tan_u1, self.azimuth_terms(azimuth), distance,
+                                          self.ellipsoid, self.max_iterations)
+
+    def fan(self, azimuths, distances, uom=UOM_M):
+        """ Computes end points for every combination of azimuth and distance.
+        :param azimuths: array_like, azimuths from the initial point in decimal degrees format
+        :param distances: array_like, distances from the initial point in uom units
+        :param uom: str or array_like of str, unit of measure of all distances or of every distance
+        :return lon_end, lat_end: numpy.ndarray, numpy.ndarray, arrays of shape (azimuths, distances)
+        with longitudes and latitudes of the end points in decimal degrees format
+        """
+        azimuths = np.asarray(azimuths, dtype=np.float64).ravel()
+        distances = np.asarray(to_meters(distances, uom), dtype=np.float64).ravel()
+        if self.accuracy == ACCURACY_SPHERE:
+            return spherical_direct_solution_batch(self.lon, self.lat, azimuths[:, np.newaxis],
+                                                   distances[np.newaxis, :], self.ellipsoid.mean_radius)
+        terms = AzimuthTerms(*[term[:, np.newaxis] for term in self.azimuth_terms_batch(azimuths)])
+        return vincenty_direct_from_terms_batch(self.lon, self.tan_u1, terms, distances[np.newaxis, :],
+                                                self.ellipsoid, self.max_iterations)
+
+    def direct_batch(self, azimuths, distances, uom=UOM_M):
+        """ Computes end points for pairs of azimuth and distance, element by element.
+        :param azimuths: array_like, azimuths from the initial point in decimal degrees format
+        :param distances: array_like, distances from the initial point in uom units, broadcastable with azimuths
+        :param uom: str or array_like of str, unit of measure of all distances or of every distance
+        :return lon_end, lat_end: numpy.ndarray, numpy.ndarray, longitudes and latitudes of the end points
+        in decimal degrees format
+        """
+        azimuths = np.asarray(azimuths, dtype=np.float64)
+        distances = np.asarray(to_meters(distances, uom), dtype=np.float64)
+        if self.accuracy == ACCURACY_SPHERE:
+            return spherical_direct_solution_batch(self.lon, self.lat, azimuths, distances,
+                                                   self.ellipsoid.mean_radius)
+        return vincenty_direct_from_terms_batch(self.lon, self.tan_u1, self.azimuth_terms_batch(azimuths), distances,
+                                                self.ellipsoid, self.max_iterations)
+
+    def arc(self, distance, start_azimuth, end_azimuth, points_count, uom=UOM_M):
+        """ Computes points of arc with constant distance from the initial point, clockwise from start to end azimuth.
+        :param distance: float, radius of arc in uom units
+        :param start_azimuth: float, azimuth of the first point of arc in decimal degrees format
+        :param end_azimuth: float, azimuth of the last point of arc in decimal degrees format
+        :param points_count: int, number of points of arc, including the first and the last one
+        :param uom: str, unit of measure of distance, one of UOM_TO_METERS keys
+        :return lon_end, lat_end: numpy.ndarray, numpy.ndarray, longitudes and latitudes of arc points
+        in decimal degrees format
+        """
+        sweep = (end_azimuth - start_azimuth) % 360 or 360
+        azimuths = (start_azimuth + np.linspace(0, sweep, points_count)) % 360
+        lon_end, lat_end = self.fan(azimuths, distance, uom)
+        return lon_end[:, 0], lat_end[:, 0]
+
+    def ring(self, distance, points_count, uom=UOM_M):
+        """ Computes points of range ring (circle) around the initial point, clockwise from azimuth 0.
+        :param distance: float, radius of ring in uom units
+        :param points_count: int, number of distinct points of ring
+        :param uom: str, unit of measure of distance, one of UOM_TO_METERS keys
+        :return lon_end, lat_end: numpy.ndarray, numpy.ndarray, longitudes and latitudes of ring points
+        in decimal degrees format
+        """
+        azimuths = np.arange(points_count) * (360 / points_count)
+        lon_end, lat_end = self.fan(azimuths, distance, uom)
+        return lon_end[:, 0], lat_end[:, 0]
+
+
+def vincenty_inverse_lambda_terms(lamb, L, sin_u1, cos_u1, sin_u2, cos_u2, f):
+    """ Computes terms of one iteration of lambda in Vincenty inverse solution.
+    :param lamb: float, difference in longitude on auxiliary sphere in radians
+    :param L: float, difference in longitude on ellipsoid in radians
+    :param sin_u1, cos_u1: float, float, sine and cosine of reduced latitude of the initial point
+    :param sin_u2, cos_u2: float, float, sine and cosine of reduced latitude of the end point
+    :param f: float, flattening of ellipsoid
+    :return: tuple: next value of lambda, sin_sigma, cos_sigma, sigma, cos_sq_alfa, cos2sigma_m
+    """
+    sin_lamb = math.sin(lamb)
+    cos_lamb = math.cos(lamb)
+    sin_sigma = math.sqrt((cos_u2 * sin_lamb) ** 2 + (cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lamb) ** 2)
+    cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lamb
+    sigma = math.atan2(sin_sigma, cos_sigma)
+    sin_alfa = 0.0 if sin_sigma == 0 else cos_u1 * cos_u2 * sin_lamb / sin_sigma
+    cos_sq_alfa = 1 - sin_alfa * sin_alfa
+    # Equatorial line: cos_sq_alfa = 0
+    cos2sigma_m = 0.0 if cos_sq_alfa == 0 else cos_sigma - 2 * sin_u1 * sin_u2 / cos_sq_alfa
+    C = f / 16 * cos_sq_alfa * (4 + f * (4 - 3 * cos_sq_alfa))
+    lamb_next = L + (1 - C) * f * sin_alfa * (
+            sigma + C * sin_sigma * (cos2sigma_m + C * cos_sigma * (-1 + 2 * cos2sigma_m * cos2sigma_m)))
+    return lamb_next, sin_sigma, cos_sigma, sigma, cos_sq_alfa, cos2sigma_m
+
+
+def vincenty_inverse_result(lamb, L, sin_u1, cos_u1, sin_u2, cos_u2, ellipsoid):
+    """ Computes distance and azimuths for final value of lambda in Vincenty inverse solution.
+    :return distance, azimuth_initial, azimuth_end: float, float, float, distance in meters,
+    azimuths at the initial and at the end point in decimal degrees within interval <0, 360)
+    """
+    _, sin_sigma, cos_sigma, sigma, cos_sq_alfa, cos2sigma_m = vincenty_inverse_lambda_terms(
+        lamb, L, sin_u1, cos_u1, sin_u2, cos_u2, ellipsoid.f)
+    u_sq = cos_sq_alfa * ellipsoid.ep_sq
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    d_sigma = B * sin_sigma * (cos2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos2sigma_m * cos2sigma_m) - B / 6 * cos2sigma_m * (
+                -3 + 4 * sin_sigma * sin_sigma) * (-3 + 4 * cos2sigma_m * cos2sigma_m)))
+    distance = ellipsoid.b * A * (sigma - d_sigma)
+
+    sin_lamb = math.sin(lamb)
+    cos_lamb = math.cos(lamb)
+    alfa1 = math.atan2(cos_u2 * sin_lamb, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lamb)
+    alfa2 = math.atan2(cos_u1 * sin_lamb, -sin_u1 * cos_u2 + cos_u1 * sin_u2 * cos_lamb)
+    return distance, math.degrees(alfa1) % 360, math.degrees(alfa2) % 360
+
+
+def reduced_latitude(lat, f):
+    """ Computes sine and cosine of reduced latitude.
+    :param lat: float, latitude in decimal degrees format
+    :param f: float, flattening of ellipsoid
+    :return sin_u, cos_u: float, float
+    """
+    tan_u = (1 - f) * math.tan(math.radians(lat))
+    cos_u = 1 / math.sqrt(1 + tan_u * tan_u)
+    return tan_u * cos_u, cos_u
+
+
+def vincenty_inverse_equatorial_antipodal(L, ellipsoid):
+    """ Solves inverse geodetic problem for points on the equator with difference in longitude
+    greater than pi * (1 - f), where the shortest geodesic is not the equator.
+    Geodesic leaves the equator with azimuth alfa and returns to the equator at sigma = pi, so that
+    pi - |L| = (1 - C) * f * pi * sin(alfa), which is solved with fixed point iteration.
+    :param L: float, difference in longitude in radians within interval <-pi, pi>
+    :param ellipsoid: Ellipsoid
+    :return distance, azimuth_initial, azimuth_end: float, float, float, distance in meters,
+    azimuths at the initial and at the end point in decimal degrees within interval <0, 360)
+    """
+    f = ellipsoid.f
+    sin_alfa = (math.pi - math.fabs(L)) / (f * math.pi)
+    cos_sq_alfa = 1 - sin_alfa * sin_alfa
+    for _ in range(VINCENTY_INVERSE_MAX_ITERATIONS):
+        cos_sq_alfa = 1 - sin_alfa * sin_alfa
+        C = f / 16 * cos_sq_alfa * (4 + f * (4 - 3 * cos_sq_alfa))
+        sin_alfa_next = (math.pi - math.fabs(L)) / ((1 - C) * f * math.pi)
+        if math.fabs(sin_alfa_next - sin_alfa) <= 1e-15:
+            sin_alfa = sin_alfa_next
+            break
+        sin_alfa = sin_alfa_next
+
+    cos_sq_alfa = 1 - sin_alfa * sin_alfa
+    u_sq = cos_sq_alfa * ellipsoid.ep_sq
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    distance = ellipsoid.b * A * math.pi
+
+    alfa = math.degrees(math.asin(min(sin_alfa, 1.0)))
+    if L < 0:
+        alfa = -alfa
+    return distance, alfa % 360, (180 - alfa) % 360
+
+
+def vincenty_inverse_antipodal(lon_initial, lat_initial, lon_end, lat_end, ellipsoid):
+    """ Fallback solution of inverse geodetic problem for nearly antipodal points, where iteration
+    of lambda in Vincenty inverse solution does not converge.
+    Instead of fixed point iteration roots of equation lambda = F(lambda) are searched with bisection
+    within interval |lambda - L| <= pi * f, which bounds all solutions. If there are more roots
+    (more geodesics between points), the shortest geodesic is returned.
+    :param lon_initial: float, longitude of the initial point in decimal degrees format
+    :param lat_initial: float, latitude of the initial point in decimal degrees format
+    :param lon_end: float, longitude of the end point in decimal degrees format
+    :param lat_end: float, latitude of the end point in decimal degrees format
+    :param ellipsoid: Ellipsoid
+    :return distance, azimuth_initial, azimuth_end: float, float, float, distance in meters,
+    azimuths at the initial and at the end point in decimal degrees within interval <0, 360)
+    """
+    f = ellipsoid.f
+    L = math.radians(lon_end - lon_initial)
+    L = (L + math.pi) % (2 * math.pi) - math.pi
+
+    if math.fabs(lat_initial) <= EQUATOR_TOLERANCE and math.fabs(lat_end) <= EQUATOR_TOLERANCE:
+        if math.fabs(L) > math.pi * (1 - f):
+            return vincenty_inverse_equatorial_antipodal(L, ellipsoid)
+
+    sin_u1, cos_u1 = reduced_latitude(lat_initial, f)
+    sin_u2, cos_u2 = reduced_latitude(lat_end, f)
+
+    def g(lamb):
+        return vincenty_inverse_lambda_terms(lamb, L, sin_u1, cos_u1, sin_u2, cos_u2, f)[0] - lamb
+
+    half_width = math.pi * f * 1.01
+    nodes = [L - half_width + 2 * half_width * i / ANTIPODAL_LAMBDA_INTERVALS
+             for i in range(ANTIPODAL_LAMBDA_INTERVALS + 1)]
+    values = [g(lamb) for lamb in nodes]
+
+    roots = []
+    for i in range(ANTIPODAL_LAMBDA_INTERVALS):
+        lo, hi, g_lo, g_hi = nodes[i], nodes[i + 1], values[i], values[i + 1]
+        if g_lo == 0:
+            roots.append(lo)
+        elif g_lo * g_hi < 0:
+            while hi - lo > 1e-14:
+                mid = (lo + hi) / 2
+                g_mid = g(mid)
+                if g_mid == 0:
+                    lo = hi = mid
+                elif g_lo * g_mid < 0:
+                    hi = mid
+                else:
+                    lo, g_lo = mid, g_mid
+            roots.append((lo + hi) / 2)
+    if values[-1] == 0:
+        roots.append(nodes[-1])
+
+    results = []
+    for lamb in roots:
+        # Roots with |lambda| > pi are not valid geodesics (equatorial line longer than half of the equator)
+        if math.fabs(lamb) > math.pi + 1e-9:
+            continue
+        sin_sigma = vincenty_inverse_lambda_terms(lamb, L, sin_u1, cos_u1, sin_u2, cos_u2, f)[1]
+        if sin_sigma > 1e-12:
+            results.append(vincenty_inverse_result(lamb, L, sin_u1, cos_u1, sin_u2, cos_u2, ellipsoid))
+        else:
+            # Antipodal points - F(lambda) is not defined at lambda = pi, geodesic is meridian through the pole
+            u_sq = ellipsoid.ep_sq
+            A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+            results.append((ellipsoid.b * A * math.pi, 0.0, 180.0))
+
+    if not results:
+        return math.nan, math.nan, math.nan
+    return min(results)
+
+
+def vincenty_inverse_solution(lon_initial, lat_initial, lon_end, lat_end, a, b=None, f=None):
+    """ Computes distance and azimuths between two points (inverse geodetic problem).
+    Uses the algorithm by Thaddeus Vincenty for inverse geodetic problem,
+    for nearly antipodal points, where iteration does not converge, falls back to vincenty_inverse_antipodal.
+    For more information refer to: http://www.ngs.noaa.gov/PUBS_LIB/inverse.pdf
+    :param lon_initial: float, longitude of the initial point in decimal degrees format
+    :param lat_initial: float, latitude of the initial point in decimal degrees format
+    :param lon_end: float, longitude of the end point in decimal degrees format
+    :param lat_end: float, latitude of the end point in decimal degrees format
+    :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f omitted),
+    see get_ellipsoid
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :return distance, azimuth_initial, azimuth_end: float, float, float, distance in meters,
+    azimuths at the initial and at the end point in decimal degrees within interval <0, 360)
+    """
+    ellipsoid = get_ellipsoid(a, b, f)
+    f = ellipsoid.f
+    L = math.radians(lon_end - lon_initial)
+    L = (L + math.pi) % (2 * math.pi) - math.pi
+    sin_u1, cos_u1 = reduced_latitude(lat_initial, f)
+    sin_u2, cos_u2 = reduced_latitude(lat_end, f)
+
+    collector = instrumentation.ACTIVE
+    lamb = L
+    for iterations in range(1, VINCENTY_INVERSE_MAX_ITERATIONS + 1):
+        lamb_next = vincenty_inverse_lambda_terms(lamb, L, sin_u1, cos_u1, sin_u2, cos_u2, f)[0]
+        if math.fabs(lamb_next - lamb) <= 1e-12 and math.fabs(lamb_next) <= math.pi:
+            if collector is not None:
+                collector.count('vincenty_inverse.calls')
+                collector.count('vincenty_inverse.iterations', iterations)
+            return vincenty_inverse_result(lamb_next, L, sin_u1, cos_u1, sin_u2, cos_u2, ellipsoid)
+        lamb = lamb_next
+
+    result = vincenty_inverse_antipodal(lon_initial, lat_initial, lon_end, lat_end, ellipsoid)
+    if collector is not None:
+        collector.count('vincenty_inverse.calls')
+        collector.count('vincenty_inverse.iterations', VINCENTY_INVERSE_MAX_ITERATIONS)
+        collector.count('vincenty_inverse.antipodal_fallbacks')
+        if math.isnan(result[0]):
+            collector.count('vincenty_inverse.failures')
+    return result
+
+
+def vincenty_inverse_solution_batch(lon_initial, lat_initial, lon_end, lat_end, a, b=None, f=None):
+    """ Computes distances and azimuths between pairs of points (inverse geodetic problem) for arrays of points.
+    Uses the algorithm by Thaddeus Vincenty for inverse geodetic problem, lambda is iterated for the whole
+    array at once, elements which already converged are masked out of the next iterations.
+    Nearly antipodal points, where iteration does not converge, are solved with vincenty_inverse_antipodal.
+    For more information refer to: http://www.ngs.noaa.gov/PUBS_LIB/inverse.pdf
+    :param lon_initial: float or array_like, longitudes of the initial points in decimal degrees format
+    :param lat_initial: float or array_like, latitudes of the initial points in decimal degrees format
+    :param lon_end: float or array_like, longitudes of the end points in decimal degrees format
+    :param lat_end: float or array_like, latitudes of the end points in decimal degrees format
+    :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f omitted),
+    see get_ellipsoid
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :return distance, azimuth_initial, azimuth_end: numpy.ndarray, numpy.ndarray, numpy.ndarray,
+    distances in meters, azimuths at the initial and at the end points in decimal degrees within interval <0, 360)
+    """
+    ellipsoid = get_ellipsoid(a, b, f)
+    f = ellipsoid.f
+    lon_initial, lat_initial, lon_end, lat_end = np.broadcast_arrays(
+        np.asarray(lon_initial, dtype=np.float64),
+        np.asarray(lat_initial, dtype=np.float64),
+        np.asarray(lon_end, dtype=np.float64),
+        np.asarray(lat_end, dtype=np.float64))
+    shape = lon_initial.shape
+
+    L = np.radians(lon_end.ravel() - lon_initial.ravel())
+    L = (L + math.pi) % (2 * math.pi) - math.pi
+    tan_u1 = (1 - f) * np.tan(np.radians(lat_initial.ravel()))
+    cos_u1 = 1 / np.sqrt(1 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
+    tan_u2 = (1 - f) * np.tan(np.radians(lat_end.ravel()))
+    cos_u2 = 1 / np.sqrt(1 + tan_u2 * tan_u2)
+    sin_u2 = tan_u2 * cos_u2
+
+    lamb = L.copy()
+    sin_lamb = np.empty_like(L)
+    cos_lamb = np.empty_like(L)
+    sin_sigma = np.empty_like(L)
+    cos_sigma = np.empty_like(L)
+    sigma = np.empty_like(L)
+    cos_sq_alfa = np.empty_like(L)
+    cos2sigma_m = np.empty_like(L)
+    converged = np.zeros(L.size, dtype=bool)
+
+    collector = instrumentation.ACTIVE
+    start = time.perf_counter() if collector is not None else None
+    iterations = 0
+    point_iterations = 0
+
+    # Indices of elements which have not converged yet
+    active = np.arange(L.size)
+    for _ in range(VINCENTY_INVERSE_MAX_ITERATIONS):
+        if not active.size:
+            break
+        iterations += 1
+        point_iterations += active.size
+        lamb_a = lamb[active]
+        cu1, su1, cu2, su2 = cos_u1[active], sin_u1[active], cos_u2[active], sin_u2[active]
+        s_l = np.sin(lamb_a)
+        c_l = np.cos(lamb_a)
+        s_s = np.sqrt((cu2 * s_l) ** 2 + (cu1 * su2 - su1 * cu2 * c_l) ** 2)
+        c_s = su1 * su2 + cu1 * cu2 * c_l
+        sig = np.arctan2(s_s, c_s)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sin_alfa = np.where(s_s == 0, 0.0, cu1 * cu2 * s_l / s_s)
+            c_sq_a = 1 - sin_alfa * sin_alfa
+            # Equatorial line: cos_sq_alfa = 0
+            c2sm = np.where(c_sq_a == 0, 0.0, c_s - 2 * su1 * su2 / c_sq_a)
+        C = f / 16 * c_sq_a * (4 + f * (4 - 3 * c_sq_a))
+        lamb_new = L[active] + (1 - C) * f * sin_alfa * (
+                sig + C * s_s * (c2sm + C * c_s * (-1 + 2 * c2sm * c2sm)))
+
+        sin_lamb[active] = s_l
+        cos_lamb[active] = c_l
+        sin_sigma[active] = s_s
+        cos_sigma[active] = c_s
+        sigma[active] = sig
+        cos_sq_alfa[active] = c_sq_a
+        cos2sigma_m[active] = c2sm
+        lamb[active] = lamb_new
+
+        done = np.fabs(lamb_new - lamb_a) <= 1e-12
+        # Lambda converged beyond pi is not a valid geodesic - nearly antipodal points on the equator
+        converged[active[done & (np.fabs(lamb_new) <= math.pi)]] = True
+        active = active[~done]
+
+    u_sq = cos_sq_alfa * ellipsoid.ep_sq
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    d_sigma = B * sin_sigma * (cos2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos2sigma_m * cos2sigma_m) - B / 6 * cos2sigma_m * (
+                -3 + 4 * sin_sigma * sin_sigma) * (-3 + 4 * cos2sigma_m * cos2sigma_m)))
+
+    distance = ellipsoid.b * A * (sigma - d_sigma)
+    alfa1 = np.arctan2(cos_u2 * sin_lamb, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lamb)
+    alfa2 = np.arctan2(cos_u1 * sin_lamb, -sin_u1 * cos_u2 + cos_u1 * sin_u2 * cos_lamb)
+    azimuth_initial = np.degrees(alfa1) % 360
+    azimuth_end = np.degrees(alfa2) % 360
+
+    # Fallback for nearly antipodal points
+    lon_initial, lat_initial = lon_initial.ravel(), lat_initial.ravel()
+    lon_end, lat_end = lon_end.ravel(), lat_end.ravel()
+    fallbacks = np.flatnonzero(~converged)
+    for i in fallbacks:
+        distance[i], azimuth_initial[i], azimuth_end[i] = vincenty_inverse_antipodal(
+            lon_initial[i], lat_initial[i], lon_end[i], lat_end[i], ellipsoid)
+
+    if collector is not None:
+        collector.add_time('vincenty_inverse_batch.total', time.perf_counter() - start)
+        collector.count('vincenty_inverse_batch.calls')
+        collector.count('vincenty_inverse_batch.points', L.size)
+        collector.count('vincenty_inverse_batch.iterations', iterations)
+        collector.count('vincenty_inverse_batch.point_iterations', point_iterations)
+        collector.count('vincenty_inverse_batch.antipodal_fallbacks', fallbacks.size)
+        collector.count('vincenty_inverse_batch.failures', int(np.count_nonzero(np.isnan(distance[fallbacks]))))
+
+    return distance.reshape(shape), azimuth_initial.reshape(shape), azimuth_end.reshape(shape)
+
+
+def iter_vincenty_inverse_matrix(lon_initial, lat_initial, lon_end, lat_end, a, b=None, f=None,
+                                 chunk_pairs=MATRIX_CHUNK_PAIRS):
+    """ Computes distances and azimuths between every initial point and every end point in chunks of rows,
+    so that memory used by computation is bounded by chunk_pairs regardless of number of points.
+    :param lon_initial: array_like, longitudes of the initial points in decimal degrees format
+    :param lat_initial: array_like, latitudes of the initial points in decimal degrees format
+    :param lon_end: array_like, longitudes of the end points in decimal degrees format
+    :param lat_end: array_like, latitudes of the end points in decimal degrees format
+    :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f omitted),
+    see get_ellipsoid
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :param chunk_pairs: int, maximum number of point pairs computed at once
+    :return: generator of tuples (row_start, distance, azimuth_initial, azimuth_end), row_start is index
+    of the first initial point of the chunk, arrays have shape (rows of chunk, number of end points)
+    """
+    ellipsoid = get_ellipsoid(a, b, f)
+    lon_initial = np.asarray(lon_initial, dtype=np.float64).ravel()
+    lat_initial = np.asarray(lat_initial, dtype=np.float64).ravel()
+    lon_end = np.asarray(lon_end, dtype=np.float64).ravel()
+    lat_end = np.asarray(lat_end, dtype=np.float64).ravel()
+
+    rows = max(1, chunk_pairs // max(1, lon_end.size))
+    for row_start in range(0, lon_initial.size, rows):
+        row_end = min(row_start + rows, lon_initial.size)
+        distance, azimuth_initial, azimuth_end = vincenty_inverse_solution_batch(
+            lon_initial[row_start:row_end, np.newaxis], lat_initial[row_start:row_end, np.newaxis],
+            lon_end[np.newaxis, :], lat_end[np.newaxis, :], ellipsoid)
+        yield row_start, distance, azimuth_initial, azimuth_end
+
+
+def vincenty_inverse_matrix(lon_initial, lat_initial, lon_end, lat_end, a, b=None, f=None,
+                            chunk_pairs=MATRIX_CHUNK_PAIRS, distance_out=None, azimuth_out=None):
+    """ Computes matrices of distances and initial azimuths between every initial point and every end point.
+    Computation is done in chunks (see iter_vincenty_inverse_matrix), results are written to output arrays,
+    which can be e.g. numpy.memmap or float32 arrays for very large matrices.
+    :param lon_initial: array_like, longitudes of the initial points in decimal degrees format
+    :param lat_initial: array_like, latitudes of the initial points in decimal degrees format
+    :param lon_end: array_like, longitudes of the end points in decimal degrees format
+    :param lat_end: array_like, latitudes of the end points in decimal degrees format
+    :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f omitted),
+    see get_ellipsoid
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :param chunk_pairs: int, maximum number of point pairs computed at once
+    :param distance_out: numpy.ndarray, array of shape (initial points, end points) for distances,
+    None - new float64 array is created
+    :param azimuth_out: numpy.ndarray, array of shape (initial points, end points) for initial azimuths,
+    None - new float64 array is created
+    :return distance, azimuth: numpy.ndarray, numpy.ndarray, distances in meters and azimuths at the initial
+    points in decimal degrees
+    """
+    shape = (np.size(lon_initial), np.size(lon_end))
+    distance = np.empty(shape) if distance_out is None else distance_out
+    azimuth = np.empty(shape) if azimuth_out is None else azimuth_out
+    for row_start, distance_chunk, azimuth_chunk, _ in iter_vincenty_inverse_matrix(
+            lon_initial, lat_initial, lon_end, lat_end, a, b, f, chunk_pairs):
+        distance[row_start:row_start + len(distance_chunk)] = distance_chunk
+        azimuth[row_start:row_start + len(azimuth_chunk)] = azimuth_chunk
+    return distance, azimuth
+
+
+def vincenty_cross_track_batch(lon_initial, lat_initial, lon_end, lat_end, lon, lat, a, b=None, f=None,
+                               iterations=CROSS_TRACK_ITERATIONS):
+    """ Computes cross track and along track distances of points from geodesic segments for arrays of points.
+    The closest point of geodesic is found by iteration: along track distance is estimated on sphere
+    and corrected with ellipsoidal distance and azimuth from the current closest point to the point,
+    each correction solves direct and inverse problems for the whole array at once.
+    :param lon_initial: float or array_like, longitudes of the initial points of segments in decimal degrees format
+    :param lat_initial: float or array_like, latitudes of the initial points of segments in decimal degrees format
+    :param lon_end: float or array_like, longitudes of the end points of segments in decimal degrees format
+    :param lat_end: float or array_like, latitudes of the end points of segments in decimal degrees format
+    :param lon: float or array_like, longitudes of points in decimal degrees format
+    :param lat: float or array_like, latitudes of points in decimal degrees format
+    :param a: float, semi-major axis of ellipsoid in meters, or Ellipsoid or name of ellipsoid (b and f omitted),
+    see get_ellipsoid
+    :param b: float, semi-minor axis of ellipsoid in meters
+    :param f: float, flattening of ellipsoid
+    :param iterations: int, number of corrections of along track distance
+    :return distance, cross_track, along_track: numpy.ndarray, numpy.ndarray, numpy.ndarray,
+    distances from segments (from the end points if the closest point of geodesic is beyond segment) in meters,
+    cross track distances from geodesics in meters (positive to the right of segments),
+    along track distances of the closest points of geodesics from the initial points in meters
+    (negative before the initial points)
+    """
+    ellipsoid = get_ellipsoid(a, b, f)
+    arrays = np.broadcast_arrays(*[np.asarray(value, dtype=np.float64) for value in
+                                   (lon_initial, lat_initial, lon_end, lat_end, lon, lat)])
+    shape = arrays[0].shape
+    lon_initial, lat_initial, lon_end, lat_end, lon, lat = [array.ravel() for array in arrays]
+    count = lon.size
+    radius = ellipsoid.mean_radius
+
+    # Segments and initial points to points in one call
+    distances, azimuths, _ = vincenty_inverse_solution_batch(np.concatenate((lon_initial, lon_initial)),
+                                                             np.concatenate((lat_initial, lat_initial)),
+                                                             np.concatenate((lon_end, lon)),
+                                                             np.concatenate((lat_end, lat)), ellipsoid)
+    length, azimuth = distances[:count], azimuths[:count]
+    distance_initial, azimuth_initial = distances[count:], azimuths[count:]
+    delta = distance_initial / radius
+    along_track = radius * np.arctan2(np.sin(delta) * np.cos(np.radians(azimuth_initial - azimuth)), np.cos(delta))
+
+    distance, track_azimuth, point_azimuth = distance_initial, azimuth, azimuth_initial
+    for i in range(iterations + 1):
+        if i:
+            delta = distance / radius
+            along_track = along_track + radius * np.arctan2(
+                np.sin(delta) * np.cos(np.radians(point_azimuth - track_azimuth)), np.cos(delta))
+        lon_closest, lat_closest = vincenty_direct_solution_batch(lon_initial, lat_initial, azimuth, along_track,
+                                                                  ellipsoid)
+        # Azimuth of geodesic at the closest point and from the closest point to the point
+        distances, azimuths, end_azimuths = vincenty_inverse_solution_batch(
+            np.concatenate((lon_initial, lon_closest)), np.concatenate((lat_initial, lat_closest)),
+            np.concatenate((lon_closest, lon)), np.concatenate((lat_closest, lat)), ellipsoid)
+        track_azimuth = np.where(distances[:count] == 0, azimuth,
+                                 np.where(along_track < 0, end_azimuths[:count] + 180, end_azimuths[:count]))
+        distance, point_azimuth = distances[count:], azimuths[count:]
+
+    cross_track = np.copysign(distance, np.sin(np.radians(point_azimuth - track_azimuth)))
+
+    # The closest point of segment is its end point
+    distance = distance.copy()
+    before = along_track < 0
+    distance[before] = distance_initial[before]
+    beyond = np.flatnonzero(along_track > length)
+    if beyond.size:
+        distance[beyond], _, _ = vincenty_inverse_solution_batch(lon_end[beyond], lat_end[beyond],
+                                                                 lon[beyond], lat[beyond], ellipsoid)
+    return distance.reshape(shape), cross_track.reshape(shape), along_track.reshape(shape)
+
+
+def validate_position_input(lon_dmsh, lat_dmsh, azimuth, distance):
+    """ Validates input of direct geodetic problem.
     :param lon_dmsh: str, initial longitude in DMSH format
-    :param lat_dmsh: str, initial longitude in DMSH format
+    :param lat_dmsh: str, initial latitude in DMSH format
     :param azimuth: str, initial azimuth
     :param distance: str, distance from initial point to end point in meters
+    :return: lon_initial_dd, lat_initial_dd, err_msg: float, float, str: initial longitude and latitude
+    in decimal degrees format, error message (empty string if input is valid)
     """
     err_msg = ''
-    is_input_valid = True
 
     lon_initial_dd = lon_dms_to_dd(lon_dmsh)
     lat_initial_dd = lat_dms_to_dd(lat_dmsh)
 
     if lon_initial_dd is None:
-        is_input_valid = False
         err_msg = 'Longitude should be in format DMSH.\n'
 
     if lat_initial_dd is None:
-        is_input_valid = False
         err_msg += 'Latitude should be in format DMSH.\n'
 
     if check_azimuth(azimuth) is False:
-        is_input_valid = False
         err_msg += 'Azimuth should be a number within interval <0, 360>.\n'
 
     if check_distance(distance) is False:
-        is_input_valid = False
         err_msg += 'Distance should be a positive number.\n'
 
-    if is_input_valid:
+    return lon_initial_dd, lat_initial_dd, err_msg
 
-        lon2_dd, lat2_dd = vincenty_direct_solution(lon_initial_dd, lat_initial_dd,
-                                                    float(azimuth), float(distance), WGS84_A, WGS84_B, WGS84_F)
+
+def compute_position(lon_dmsh, lat_dmsh, azimuth, distance, uom=UOM_M):
+    """ Computes position of end point based on position of initial point and initial azimuth.
+    :param lon_dmsh: str, initial longitude in DMSH format
+    :param lat_dmsh: str, initial longitude in DMSH format
+    :param azimuth: str, initial azimuth
+    :param distance: str, distance from initial point to end point, optionally followed by unit of measure
+    (e.g. 5.4 NM), or float
+    :param uom: str, unit of measure of distance without unit of measure
+    """
+    if isinstance(distance, str):
+        distance, uom = split_distance_uom(distance, uom)
+    lon_initial_dd, lat_initial_dd, err_msg = validate_position_input(lon_dmsh, lat_dmsh, azimuth, distance)
+
+    if not err_msg:
+
+        lon2_dd, lat2_dd = vincenty_direct_solution(lon_initial_dd, lat_initial_dd, float(azimuth), float(distance),
+                                                    WGS84_A, WGS84_B, WGS84_F, uom=uom)
 
         end_lon_dmsh = dd2_to_dmsh(lon2_dd, A_LON)
         end_lat_dmsh = dd2_to_dmsh(lat2_dd, A_LAT)
@@ -258,14 +1577,192 @@ def compute_position(lon_dmsh, lat_dmsh, azimuth, distance):
         print(err_msg)
 
 
-def main():
+def compute_positions_chunk(rows, uom=UOM_M, ellipsoid=ELLIPSOID_WGS84):
+    """ Computes end points for chunk of input rows, valid rows are solved in one vectorized call.
+    Distance can be followed by unit of measure (e.g. 5.4 NM), so that rows with different units are solved together.
+    :param rows: list, rows (lists of str): initial longitude DMSH, initial latitude DMSH, azimuth, distance
+    :param uom: str, unit of measure of distances without unit of measure
+    :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+    :return: list: output rows - input fields followed by end longitude DMSH, end latitude DMSH and error message
+    """
+    fields = [(row + [''] * 4)[:4] for row in rows]
+    lon = lon_dms_to_dd_bulk([row[0] for row in fields])
+    lat = lat_dms_to_dd_bulk([row[1] for row in fields])
+
+    results = []
+    valid_rows = []
+    distances = []
+    for i, row in enumerate(fields):
+        if len(rows[i]) != 4:
+            results.append(row + ['', '', 'Row should have 4 fields: longitude, latitude, azimuth, distance.'])
+            continue
+        err_msg = []
+        if np.isnan(lon[i]):
+            err_msg.append('Longitude should be in format DMSH.')
+        if np.isnan(lat[i]):
+            err_msg.append('Latitude should be in format DMSH.')
+        if check_azimuth(row[2]) is False:
+            err_msg.append('Azimuth should be a number within interval <0, 360>.')
+        distance = split_distance_uom(row[3], uom)
+        if check_distance(distance[0]) is False:
+            err_msg.append('Distance should be a positive number.')
+        if err_msg:
+            results.append(row + ['', '', ' '.join(err_msg)])
+        else:
+            valid_rows.append(i)
+            distances.append(distance)
+            results.append(None)
+
+    if valid_rows:
+        azimuth = np.array([float(fields[i][2]) for i in valid_rows])
+        distance = np.array([float(dist) for dist, _ in distances])
+        units = [dist_uom for _, dist_uom in distances]
+        # Distances in the same unit of measure are converted with single factor
+        if units.count(units[0]) == len(units):
+            units = units[0]
+        lon_end, lat_end = vincenty_direct_solution_batch(lon[valid_rows], lat[valid_rows], azimuth, distance,
+                                                          ellipsoid, uom=units)
+        for i, lon_dmsh, lat_dmsh in zip(valid_rows, dd_to_dmsh_bulk(lon_end, A_LON).tolist(),
+                                         dd_to_dmsh_bulk(lat_end, A_LAT).tolist()):
+            results[i] = fields[i] + [lon_dmsh, lat_dmsh, '']
+    return results
+
+
+def compute_position_row(row, uom=UOM_M, ellipsoid=ELLIPSOID_WGS84):
+    """ Computes end point for one input row with scalar functions, which do not import NumPy.
+    Output row is the same as output row of compute_positions_chunk.
+    :param row: list of str: initial longitude DMSH, initial latitude DMSH, azimuth, distance
+    :param uom: str, unit of measure of distance without unit of measure
+    :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+    :return: list: input fields followed by end longitude DMSH, end latitude DMSH and error message
+    """
+    fields = (row + [''] * 4)[:4]
+    if len(row) != 4:
+        return fields + ['', '', 'Row should have 4 fields: longitude, latitude, azimuth, distance.']
+    distance, dist_uom = split_distance_uom(fields[3], uom)
+    lon_initial_dd, lat_initial_dd, err_msg = validate_position_input(fields[0], fields[1], fields[2], distance)
+    if err_msg:
+        return fields + ['', '', ' '.join(err_msg.split('\n')).strip()]
+    lon_end, lat_end = vincenty_direct_solution(lon_initial_dd, lat_initial_dd, float(fields[2]), float(distance),
+                                                ellipsoid, uom=dist_uom)
+    return fields + [dd2_to_dmsh(lon_end, A_LON), dd2_to_dmsh(lat_end, A_LAT), '']
+
+
+def compute_positions_values(values, out_file, uom=UOM_M, ellipsoid=ELLIPSOID_WGS84):
+    """ Computes end points for many rows given as command line values in one process,
+    e.g. '085 15 06.00 W,31 34 35.00 N,45,5 NM'. Rows are solved one by one with scalar functions,
+    so that NumPy is not imported.
+    :param values: iterable of str, comma separated rows: lon DMSH, lat DMSH, azimuth, distance
+    :param out_file: file object, output text stream
+    :param uom: str, unit of measure of distances without unit of measure
+    :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+    :return: int, int: number of computed rows, number of rows with errors
+    """
+    ellipsoid = get_ellipsoid(ellipsoid)
+    writer = csv.writer(out_file, lineterminator='\n')
+    writer.writerow(['lon_dmsh', 'lat_dmsh', 'azimuth', 'distance', 'end_lon_dmsh', 'end_lat_dmsh', 'error'])
+    computed, errors = 0, 0
+    for row in csv.reader(values):
+        row = compute_position_row([field.strip() for field in row], uom, ellipsoid)
+        writer.writerow(row)
+        if row[-1]:
+            errors += 1
+        else:
+            computed += 1
+    return computed, errors
+
+
+def iter_positions(rows, chunk_rows=BATCH_CHUNK_ROWS, uom=UOM_M, ellipsoid=ELLIPSOID_WGS84):
+    """ Computes end points for stream of input rows in chunks, so that memory use does not depend on input size.
+    The first row is skipped as a header if none of its fields is valid.
+    :param rows: iterable of lists of str: initial longitude DMSH, initial latitude DMSH, azimuth, distance
+    :param chunk_rows: int, number of rows solved at once
+    :param uom: str, unit of measure of distances without unit of measure
+    :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+    :return: generator of output rows, see compute_positions_chunk
+    """
+    ellipsoid = get_ellipsoid(ellipsoid)
+    chunk = []
+    for row_number, row in enumerate(rows):
+        row = [field.strip() for field in row]
+        if not row or row == ['']:
+            continue
+        if row_number == 0 and len(row) == 4 and lon_dms_to_dd(row[0]) is None and lat_dms_to_dd(row[1]) is None \
+                and check_azimuth(row[2]) is False and check_distance(row[3]) is False:
+            continue
+        chunk.append(row)
+        if len(chunk) == chunk_rows:
+            yield from compute_positions_chunk(chunk, uom, ellipsoid)
+            chunk = []
+    if chunk:
+        yield from compute_positions_chunk(chunk, uom, ellipsoid)
+
+
+def compute_positions_file(in_file, out_file, chunk_rows=BATCH_CHUNK_ROWS, uom=UOM_M, ellipsoid=ELLIPSOID_WGS84):
+    """ Computes end points for CSV or TSV rows read from in_file and writes results to out_file.
+    Delimiter of output is the same as delimiter of input (tab if the first line contains tab, comma otherwise).
+    :param in_file: file object, input text stream
+    :param out_file: file object, output text stream
+    :param chunk_rows: int, number of rows solved at once
+    :param uom: str, unit of measure of distance column, distances followed by unit of measure override it
+    :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+    :return: int, int: number of computed rows, number of rows with errors
+    """
+    first_line = in_file.readline()
+    delimiter = '\t' if '\t' in first_line else ','
+    reader = csv.reader(itertools.chain([first_line], in_file), delimiter=delimiter)
+    writer = csv.writer(out_file, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(['lon_dmsh', 'lat_dmsh', 'azimuth', 'distance', 'end_lon_dmsh', 'end_lat_dmsh', 'error'])
+    computed, errors = 0, 0
+    for row in iter_positions(reader, chunk_rows, uom, ellipsoid):
+        writer.writerow(row)
+        if row[-1]:
+            errors += 1
+        else:
+            computed += 1
+    return computed, errors
+
+
+def main(args=None):
+    if args and args[0] == '--values':
+        uom = UOM_M
+        values = args[1:]
+        if values and values[0].upper() in UOM_TO_METERS:
+            uom = values[0].upper()
+            values = values[1:]
+        computed, errors = compute_positions_values(values, sys.stdout, uom)
+        print('{} rows computed, {} rows with errors.'.format(computed, errors), file=sys.stderr)
+        return
+
+    if args:
+        if len(args) in (1, 2) and (len(args) == 1 or args[1].upper() in UOM_TO_METERS):
+            uom = args[1].upper() if len(args) == 2 else UOM_M
+            if args[0] == '-':
+                computed, errors = compute_positions_file(sys.stdin, sys.stdout, uom=uom)
+            else:
+                with open(args[0], newline='') as in_file:
+                    computed, errors = compute_positions_file(in_file, sys.stdout, uom=uom)
+            print('{} rows computed, {} rows with errors.'.format(computed, errors), file=sys.stderr)
+        else:
+            print('Usage if you want to enter single point interactively:\n'
+                  'azm_dist_to_lonlat.py\n'
+                  'Usage if you want to compute rows of CSV/TSV file (lon DMSH, lat DMSH, azimuth, distance),\n'
+                  'use - as input_file to read standard input, uom is unit of distance column ({}, default {}),\n'
+                  'distances followed by unit (e.g. 5.4 NM) override it:\n'
+                  'azm_dist_to_lonlat.py <input_file> [uom]\n'
+                  'Usage if you want to compute many rows given as arguments (comma separated fields),\n'
+                  'e.g. "085 15 06.00 W,31 34 35.00 N,45,5 NM":\n'
+                  'azm_dist_to_lonlat.py --values [uom] <row> [<row> ...]'.format(', '.join(UOM_TO_METERS), UOM_M),
+                  file=sys.stderr)
+        return
+
     lon1_dms = input('Initial Longitude: ')
     lat1_dms = input('Initial Latitude: ')
     azm = input('Initial Azimuth: ')
-    dist = input('Distance in meters: ')
+    dist = input('Distance (meters, or followed by unit of measure, e.g. 5.4 NM): ')
 
     compute_position(lon1_dms, lat1_dms, azm, dist)
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,373 @@
+""" Benchmarks of DOF conversion, geodesic solutions, DMSH codecs and ARINC424 conversion.
+
+    DOF files are generated synthetically, geodesic workloads are random points, azimuths and distances
+    with fixed seed, so that results of runs on the same machine are comparable.
+    Startup benchmarks run command line tools as new processes, single conversion per process
+    and many values per process (--values mode).
+    Results are written as JSON (throughput in items per second for every benchmark) and compared with
+    stored baseline - exit status is 1 if any throughput is lower than baseline by more than threshold,
+    or if throughput of faa_dof2csv on large DOF file is lower than DOF_THROUGHPUT_TARGET.
+
+    Usage:
+        python benchmark.py --output results.json --baseline benchmark_baseline.json
+        python benchmark.py --sizes 10000 --save-baseline benchmark_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    from .arinc424_shorthand_conversion import Arinc424CoordinatesConversion
+    from .azm_dist_to_lonlat import (A_LAT, A_LON, WGS84_A, WGS84_B, WGS84_F, dd2_to_dmsh, dd_to_dmsh_bulk,
+                                     lat_dms_to_dd, lat_dms_to_dd_bulk, lon_dms_to_dd, lon_dms_to_dd_bulk,
+                                     vincenty_direct_solution, vincenty_direct_solution_batch,
+                                     vincenty_inverse_solution_batch)
+    from .faa_dof_dat_to_csv import DOF_HEADER_LINES, DOF_THROUGHPUT_TARGET, faa_dof2csv
+except ImportError:
+    from arinc424_shorthand_conversion import Arinc424CoordinatesConversion
+    from azm_dist_to_lonlat import (A_LAT, A_LON, WGS84_A, WGS84_B, WGS84_F, dd2_to_dmsh, dd_to_dmsh_bulk,
+                                    lat_dms_to_dd, lat_dms_to_dd_bulk, lon_dms_to_dd, lon_dms_to_dd_bulk,
+                                    vincenty_direct_solution, vincenty_direct_solution_batch,
+                                    vincenty_inverse_solution_batch)
+    from faa_dof_dat_to_csv import DOF_HEADER_LINES, DOF_THROUGHPUT_TARGET, faa_dof2csv
+
+# Numbers of records of synthetic DOF files
+DEFAULT_DOF_SIZES = (10000, 100000, 1000000)
+
+# Number of points of geodesic, DMSH and ARINC424 workloads
+DEFAULT_POINTS = 100000
+
+# Scalar (one value per call) functions are measured on smaller workload
+SCALAR_POINTS = 20000
+
+# Number of runs of every benchmark, the fastest one is reported
+DEFAULT_REPEAT = 3
+
+# Allowed relative decrease of throughput against baseline
+DEFAULT_THRESHOLD = 0.25
+
+# faa_dof2csv is checked against DOF_THROUGHPUT_TARGET on DOF files with at least this number of records,
+# conversion of smaller files is dominated by fixed costs
+TARGET_MIN_DOF_SIZE = 100000
+
+# Number of processes started by every startup benchmark
+STARTUP_RUNS = 10
+
+# Number of values converted by one process in multi-value command line mode
+CLI_VALUES = 1000
+
+# Directory of command line tools
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SEED = 424
+
+DOF_RECORD_TMPL = '{oas:02d}-{number:06d} {verif} US {state} {city:<16} {lat} {lon} {obs_type:<18} {quantity} ' \
+                  '{agl:05d} {ams:05d} {lighting} {hor_acc} {vert_acc} {mar} {study:<14} {action} {jdate}'
+
+OBSTACLE_TYPES = ['TOWER', 'BLDG', 'STACK', 'POLE', 'T-L TWR', 'WINDMILL', 'ANTENNA', 'CRANE']
+CITY_NAMES = ['ABBEVILLE', 'ALBERTVILLE', 'ANCHORAGE', 'CHICAGO', 'LOS ANGELES', 'SAN FRANCISCO', 'NEW YORK']
+STATES = ['AL', 'AK', 'CA', 'IL', 'NY', 'TX', 'WA']
+
+
+def get_dof_dms(dd, deg_width, hemispheres):
+    """ Formats coordinate in DOF format, e.g. 31 34 35.00N """
+    hem = hemispheres[0] if dd >= 0 else hemispheres[1]
+    hundredths = int(round(abs(dd) * 360000))
+    d, rest = divmod(hundredths, 360000)
+    m, s = divmod(rest, 6000)
+    return '{d:0{w}d} {m:02d} {s:05.2f}{h}'.format(d=d, w=deg_width, m=m, s=s / 100, h=hem)
+
+
+def generate_dof_file(dof_file, records_count, seed=SEED):
+    """ Writes synthetic Digital Obstacle File with random records.
+    :param dof_file: str, output file path
+    :param records_count: int, number of records
+    :param seed: int, seed of random generator
+    """
+    rng = random.Random(seed)
+    with open(dof_file, 'w') as f:
+        f.write('  CURRENCY DATE = 08/12/18\n')
+        f.write('\n' * (DOF_HEADER_LINES - 2))
+        f.write('-' * 127 + '\n')
+        for i in range(records_count):
+            f.write(DOF_RECORD_TMPL.format(oas=rng.randint(1, 56),
+                                           number=i % 1000000,
+                                           verif=rng.choice('OU'),
+                                           state=rng.choice(STATES),
+                                           city=rng.choice(CITY_NAMES),
+                                           lat=get_dof_dms(rng.uniform(-89.9, 89.9), 2, 'NS'),
+                                           lon=get_dof_dms(rng.uniform(-179.9, 179.9), 3, 'EW'),
+                                           obs_type=rng.choice(OBSTACLE_TYPES),
+                                           quantity=rng.randint(1, 9),
+                                           agl=rng.randint(1, 2000),
+                                           ams=rng.randint(1, 15000),
+                                           lighting=rng.choice('RDHMSFCWLNU'),
+                                           hor_acc=rng.randint(1, 9),
+                                           vert_acc=rng.choice('ABCDEFGHI'),
+                                           mar=rng.choice('MN'),
+                                           study=rng.choice(['', '2012ASO1234OE']),
+                                           action=rng.choice('ACD'),
+                                           jdate='{}{:03d}'.format(rng.randint(1990, 2020), rng.randint(1, 365))))
+            f.write('\n')
+
+
+def get_geodesic_workload(points_count, seed=SEED):
+    """ Gets random initial points, azimuths and distances (up to 1000 km).
+    :return: tuple of numpy.ndarray: lon, lat, azimuth, distance
+    """
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(-180, 180, points_count), rng.uniform(-89, 89, points_count),
+            rng.uniform(0, 360, points_count), rng.uniform(1, 1000000, points_count))
+
+
+def measure(function, repeat):
+    """ Runs function repeat times.
+    :return: float: the shortest time of run in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def get_result(size, seconds, unit):
+    return {'size': size, 'seconds': seconds, 'throughput': size / seconds if seconds else float('inf'), 'unit': unit}
+
+
+def benchmark_faa_dof2csv(dof_sizes, repeat, tmp_dir):
+    results = {}
+    for size in dof_sizes:
+        dof_file = os.path.join(tmp_dir, 'DOF_{}.DAT'.format(size))
+        csv_file = os.path.join(tmp_dir, 'DOF_{}.csv'.format(size))
+        generate_dof_file(dof_file, size)
+        seconds = measure(lambda: faa_dof2csv(dof_file, csv_file), repeat)
+        results['faa_dof2csv_{}'.format(size)] = get_result(size, seconds, 'records/s')
+        os.remove(dof_file)
+        os.remove(csv_file)
+    return results
+
+
+def benchmark_geodesic(points_count, repeat):
+    lon, lat, azimuth, distance = get_geodesic_workload(points_count)
+    scalar_args = list(zip(lon[:SCALAR_POINTS].tolist(), lat[:SCALAR_POINTS].tolist(),
+                           azimuth[:SCALAR_POINTS].tolist(), distance[:SCALAR_POINTS].tolist()))
+    lon_end, lat_end = vincenty_direct_solution_batch(lon, lat, azimuth, distance, WGS84_A, WGS84_B, WGS84_F)
+
+    def direct_scalar():
+        for args in scalar_args:
+            vincenty_direct_solution(*args, WGS84_A, WGS84_B, WGS84_F)
+
+    return {
+        'vincenty_direct_solution': get_result(len(scalar_args), measure(direct_scalar, repeat), 'points/s'),
+        'vincenty_direct_solution_batch': get_result(
+            points_count, measure(lambda: vincenty_direct_solution_batch(lon, lat, azimuth, distance,
+                                                                         WGS84_A, WGS84_B, WGS84_F), repeat),
+            'points/s'),
+        'vincenty_inverse_solution_batch': get_result(
+            points_count, measure(lambda: vincenty_inverse_solution_batch(lon, lat, lon_end, lat_end,
+                                                                          WGS84_A, WGS84_B, WGS84_F), repeat),
+            'points/s')}
+
+
+def benchmark_dmsh(points_count, repeat):
+    lon, lat, _, _ = get_geodesic_workload(points_count)
+    lon_dmsh = dd_to_dmsh_bulk(lon, A_LON).tolist()
+    lat_dmsh = dd_to_dmsh_bulk(lat, A_LAT).tolist()
+    lon_scalar = lon[:SCALAR_POINTS].tolist()
+    lon_dmsh_scalar = lon_dmsh[:SCALAR_POINTS]
+    lat_dmsh_scalar = lat_dmsh[:SCALAR_POINTS]
+
+    return {
+        'dd2_to_dmsh': get_result(len(lon_scalar), measure(lambda: [dd2_to_dmsh(dd, A_LON) for dd in lon_scalar],
+                                                           repeat), 'values/s'),
+        'dd_to_dmsh_bulk': get_result(2 * points_count, measure(lambda: (dd_to_dmsh_bulk(lon, A_LON),
+                                                                         dd_to_dmsh_bulk(lat, A_LAT)), repeat),
+                                      'values/s'),
+        'lon_dms_to_dd': get_result(len(lon_dmsh_scalar), measure(lambda: [lon_dms_to_dd(dmsh)
+                                                                           for dmsh in lon_dmsh_scalar], repeat),
+                                    'values/s'),
+        'lat_dms_to_dd': get_result(len(lat_dmsh_scalar), measure(lambda: [lat_dms_to_dd(dmsh)
+                                                                           for dmsh in lat_dmsh_scalar], repeat),
+                                    'values/s'),
+        'dms_to_dd_bulk': get_result(2 * points_count, measure(lambda: (lon_dms_to_dd_bulk(lon_dmsh),
+                                                                        lat_dms_to_dd_bulk(lat_dmsh)), repeat),
+                                     'values/s')}
+
+
+def benchmark_arinc424(points_count, repeat):
+    rng = random.Random(SEED)
+    coordinates = [('{:03d}00{}'.format(rng.randint(0, 180), rng.choice('EW')),
+                    '{:02d}00{}'.format(rng.randint(0, 90), rng.choice('NS'))) for _ in range(points_count)]
+    codes = [Arinc424CoordinatesConversion.coord_to_arinc424(lon, lat) for lon, lat in coordinates]
+    codes_scalar = codes[:SCALAR_POINTS]
+    coordinates_scalar = coordinates[:SCALAR_POINTS]
+    # Lookup tables are built once, outside of measured time
+    Arinc424CoordinatesConversion.get_lookup_tables()
+
+    def decode_scalar():
+        stdout = sys.stdout
+        # Out of range codes are reported with print
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            for code in codes_scalar:
+                Arinc424CoordinatesConversion.arinc424_to_coordinates(code)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    return {
+        'arinc424_to_coordinates': get_result(len(codes_scalar), measure(decode_scalar, repeat), 'codes/s'),
+        'arinc424_to_coordinates_bulk': get_result(
+            points_count, measure(lambda: Arinc424CoordinatesConversion.arinc424_to_coordinates_bulk(codes), repeat),
+            'codes/s'),
+        'coord_to_arinc424': get_result(
+            len(coordinates_scalar), measure(lambda: [Arinc424CoordinatesConversion.coord_to_arinc424(lon, lat)
+                                                      for lon, lat in coordinates_scalar], repeat), 'codes/s'),
+        'coord_to_arinc424_bulk': get_result(
+            points_count, measure(lambda: Arinc424CoordinatesConversion.coord_to_arinc424_bulk(coordinates), repeat),
+            'codes/s')}
+
+
+def run_processes(command, runs):
+    """ Runs command runs times, one process after another, output is discarded. """
+    for _ in range(runs):
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def benchmark_startup(repeat, runs=STARTUP_RUNS):
+    rng = random.Random(SEED)
+    arinc424 = [sys.executable, os.path.join(PACKAGE_DIR, 'arinc424_shorthand_conversion.py')]
+    azm_dist_to_lonlat = [sys.executable, os.path.join(PACKAGE_DIR, 'azm_dist_to_lonlat.py')]
+    codes = [Arinc424CoordinatesConversion.coord_to_arinc424('{:03d}00{}'.format(rng.randint(0, 180), rng.choice('EW')),
+                                                             '{:02d}00{}'.format(rng.randint(0, 90), rng.choice('NS')))
+             for _ in range(CLI_VALUES)]
+    rows = ['{},{},{:.2f},{:.1f}'.format(dd2_to_dmsh(rng.uniform(-180, 180), A_LON),
+                                         dd2_to_dmsh(rng.uniform(-89, 89), A_LAT),
+                                         rng.uniform(0, 360), rng.uniform(1, 1000000)) for _ in range(CLI_VALUES)]
+
+    return {
+        'startup_python': get_result(runs, measure(lambda: run_processes([sys.executable, '-c', 'pass'], runs),
+                                                   repeat), 'processes/s'),
+        'startup_arinc424_cli': get_result(runs, measure(lambda: run_processes(arinc424 + [codes[0]], runs), repeat),
+                                           'processes/s'),
+        'startup_azm_dist_to_lonlat_cli': get_result(
+            runs, measure(lambda: run_processes(azm_dist_to_lonlat + ['--values', rows[0]], runs), repeat),
+            'processes/s'),
+        'cli_values_arinc424': get_result(
+            CLI_VALUES, measure(lambda: run_processes(arinc424 + ['--values'] + codes, 1), repeat), 'codes/s'),
+        'cli_values_azm_dist_to_lonlat': get_result(
+            CLI_VALUES, measure(lambda: run_processes(azm_dist_to_lonlat + ['--values'] + rows, 1), repeat),
+            'points/s')}
+
+
+def run_benchmarks(dof_sizes=DEFAULT_DOF_SIZES, points_count=DEFAULT_POINTS, repeat=DEFAULT_REPEAT,
+                   startup_runs=STARTUP_RUNS):
+    """ Runs all benchmarks.
+    :param dof_sizes: iterable of int, numbers of records of synthetic DOF files
+    :param points_count: int, number of points of geodesic, DMSH and ARINC424 workloads
+    :param repeat: int, number of runs of every benchmark
+    :param startup_runs: int, number of processes started by every startup benchmark, 0 - skip startup benchmarks
+    :return: dict: benchmark name -> dict with size, seconds, throughput, unit
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results.update(benchmark_faa_dof2csv(dof_sizes, repeat, tmp_dir))
+    results.update(benchmark_geodesic(points_count, repeat))
+    results.update(benchmark_dmsh(points_count, repeat))
+    results.update(benchmark_arinc424(points_count, repeat))
+    if startup_runs:
+        results.update(benchmark_startup(repeat, startup_runs))
+    return results
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """ Compares throughput of results with baseline, benchmarks missing in any of them are skipped.
+    :param results: dict, results of run_benchmarks
+    :param baseline: dict, results of run_benchmarks stored as baseline
+    :param threshold: float, allowed relative decrease of throughput
+    :return: list: messages about regressions, empty if there are none
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        baseline_throughput = baseline[name]['throughput']
+        if result['throughput'] < baseline_throughput * (1 - threshold):
+            regressions.append('{}: {:.0f} {} is {:.1%} below baseline {:.0f} {}'.format(
+                name, result['throughput'], result['unit'], 1 - result['throughput'] / baseline_throughput,
+                baseline_throughput, baseline[name]['unit']))
+    return regressions
+
+
+def check_targets(results, target=DOF_THROUGHPUT_TARGET, min_size=TARGET_MIN_DOF_SIZE):
+    """ Checks throughput of faa_dof2csv on large DOF files against target.
+    :param results: dict, results of run_benchmarks
+    :param target: float, expected throughput of faa_dof2csv in records per second
+    :param min_size: int, minimal number of records of checked DOF files
+    :return: list: messages about missed targets, empty if there are none
+    """
+    missed = []
+    for name, result in sorted(results.items()):
+        if name.startswith('faa_dof2csv_') and result['size'] >= min_size and result['throughput'] < target:
+            missed.append('{}: {:.0f} {} is below target {:.0f} {}'.format(name, result['throughput'], result['unit'],
+                                                                           target, result['unit']))
+    return missed
+
+
+def get_report(results):
+    return {'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': results}
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Benchmarks of DOF, geodesic, DMSH and ARINC424 conversions.')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_DOF_SIZES),
+                        help='comma separated numbers of records of synthetic DOF files')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help='number of points of other workloads')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='number of runs of every benchmark')
+    parser.add_argument('--startup-runs', type=int, default=STARTUP_RUNS,
+                        help='number of processes started by every startup benchmark, 0 to skip them')
+    parser.add_argument('--output', help='JSON file for results, standard output if not given')
+    parser.add_argument('--baseline', help='JSON file with baseline results')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed relative decrease of throughput against baseline')
+    parser.add_argument('--save-baseline', help='JSON file to store results as new baseline')
+    options = parser.parse_args(args)
+
+    dof_sizes = [int(size) for size in options.sizes.split(',') if size]
+    report = get_report(run_benchmarks(dof_sizes, options.points, options.repeat, options.startup_runs))
+
+    report_json = json.dumps(report, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(report_json + '\n')
+    else:
+        print(report_json)
+    if options.save_baseline:
+        with open(options.save_baseline, 'w') as f:
+            f.write(report_json + '\n')
+
+    failures = check_targets(report['results'])
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)['results']
+        failures += compare_results(report['results'], baseline, options.threshold)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
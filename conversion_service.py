@@ -0,0 +1,439 @@
+""" Long-lived local service with ARINC424 conversion, direct geodetic problem solution and DOF obstacle lookups,
+    so that clients do not pay Python startup and module import costs for every conversion.
+
+    Requests and responses are JSON lines, read from standard input and written to standard output
+    or exchanged over Unix socket, responses can come in different order than requests, id of request is returned:
+        {"id": 1, "method": "direct", "params": {"lon": "085 15 06.00 W", "lat": "31 34 35.00 N",
+                                                 "azimuth": 45, "distance": "5 NM"}}
+        {"id": 1, "result": {"lon": -85.18..., "lat": 31.63..., "lon_dmsh": "...", "lat_dmsh": "..."}}
+        {"id": 2, "error": "Distance should be a positive number."}
+    Methods and their params:
+        arinc424_to_coordinates - code
+        coord_to_arinc424 - lon, lat in DMH format
+        direct - lon, lat (DMSH or decimal degrees), azimuth, distance (optionally followed by unit of measure),
+        optional uom, ellipsoid and accuracy
+        obstacles_radius - lon, lat (DMSH or decimal degrees), radius (optionally followed by unit of measure),
+        optional uom
+        obstacles_bbox - min_lon, min_lat, max_lon, max_lat in decimal degrees
+    Obstacle lookups require index of obstacles (--index or --dof option).
+    Requests received at about the same time are handled as one batch, requests of the same method are solved
+    with one vectorized call. Batches are handled by pool of worker threads, which share obstacle index
+    and lookup tables.
+
+    Usage:
+        python conversion_service.py --index DOF_index.npz
+        python conversion_service.py --socket /tmp/conversion.sock --dof DOF.DAT
+"""
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .arinc424_shorthand_conversion import Arinc424CoordinatesConversion
+    from .azm_dist_to_lonlat import (A_LAT, A_LON, ACCURACY_FULL, ELLIPSOID_WGS84, UOM_M, check_azimuth,
+                                     check_distance, dd_to_dmsh_bulk, get_ellipsoid, get_max_iterations,
+                                     get_uom_factor, lat_dms_to_dd, lon_dms_to_dd, split_distance_uom,
+                                     vincenty_direct_solution_batch)
+    from .dof_obstacle_index import ObstacleIndex
+    from .faa_dof_dat_to_csv import DOF_ENCODING
+except ImportError:
+    from arinc424_shorthand_conversion import Arinc424CoordinatesConversion
+    from azm_dist_to_lonlat import (A_LAT, A_LON, ACCURACY_FULL, ELLIPSOID_WGS84, UOM_M, check_azimuth,
+                                    check_distance, dd_to_dmsh_bulk, get_ellipsoid, get_max_iterations,
+                                    get_uom_factor, lat_dms_to_dd, lon_dms_to_dd, split_distance_uom,
+                                    vincenty_direct_solution_batch)
+    from dof_obstacle_index import ObstacleIndex
+    from faa_dof_dat_to_csv import DOF_ENCODING
+
+# Maximum number of requests handled in one batch
+BATCH_MAX_REQUESTS = 1024
+
+# Default number of worker threads
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Maximum length of request line in bytes
+MAX_REQUEST_SIZE = 2 ** 20
+
+
+def get_angle(value, ang_type):
+    """ Gets longitude or latitude parameter in decimal degrees format.
+    :param value: str - angle in DMSH format, or float - angle in decimal degrees format
+    :param ang_type: str, A_LON or A_LAT
+    :return: float: angle in decimal degrees format
+    """
+    if ang_type == A_LON:
+        name, limit = 'Longitude', 180
+    else:
+        name, limit = 'Latitude', 90
+    if isinstance(value, str):
+        dd = lon_dms_to_dd(value) if ang_type == A_LON else lat_dms_to_dd(value)
+        if dd is None:
+            raise ValueError('{} should be in format DMSH.'.format(name))
+        return dd
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and -limit <= value <= limit:
+        return float(value)
+    raise ValueError('{} should be DMSH or number within interval <-{}, {}>.'.format(name, limit, limit))
+
+
+def get_distance(value, uom=UOM_M):
+    """ Gets distance parameter in meters.
+    :param value: str - distance optionally followed by unit of measure (e.g. 5.4 NM), or float
+    :param uom: str, unit of measure of distance without unit of measure
+    :return: float: distance in meters
+    """
+    distance, uom = split_distance_uom(str(value), uom)
+    if check_distance(distance) is False:
+        raise ValueError('Distance should be a positive number.')
+    return float(distance) * get_uom_factor(uom)
+
+
+def obstacle_to_dict(record, distance=None):
+    """ Converts obstacle record to JSON serializable dict.
+    :param record: numpy.void, record of structured array with DOF_COLUMN_DTYPES fields
+    :param distance: float, distance of obstacle in meters, not included if None
+    :return: dict: field name -> value, text fields stripped, dates in ISO format, NaN as None
+    """
+    obstacle = {}
+    for name in record.dtype.names:
+        value = record[name].item()
+        if isinstance(value, bytes):
+            value = value.decode(DOF_ENCODING).strip()
+        elif isinstance(value, float) and value != value:
+            value = None
+        elif hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        obstacle[name] = value
+    if distance is not None:
+        obstacle['distance'] = distance
+    return obstacle
+
+
+def convert_arinc424_codes(params_list):
+    """ Converts ARINC424 codes of batch of requests.
+    :param params_list: list of dicts, params with code
+    :return: list of tuples (result, error)
+    """
+    codes = [params.get('code') for params in params_list]
+    results = Arinc424CoordinatesConversion.arinc424_to_coordinates_bulk(
+        [code for code in codes if isinstance(code, str)])
+    results.reverse()
+    return [(None, 'Missing parameter: code') if not isinstance(code, str) else results.pop()
+            for code in codes]
+
+
+def convert_coordinates_to_arinc424(params_list):
+    """ Converts full degrees coordinates of batch of requests to ARINC424 codes.
+    :param params_list: list of dicts, params with lon, lat in DMH format
+    :return: list of tuples (result, error)
+    """
+    coordinates = [(params.get('lon'), params.get('lat')) for params in params_list]
+    valid = [isinstance(lon, str) and isinstance(lat, str) for lon, lat in coordinates]
+    results = Arinc424CoordinatesConversion.coord_to_arinc424_bulk(
+        [pair for pair, is_valid in zip(coordinates, valid) if is_valid])
+    results.reverse()
+    return [results.pop() if is_valid else (None, 'Missing parameter: lon, lat') for is_valid in valid]
+
+
+def solve_direct(params_list):
+    """ Solves direct geodetic problems of batch of requests, requests with the same ellipsoid and accuracy
+    are solved with one call of vincenty_direct_solution_batch.
+    :param params_list: list of dicts, params with lon, lat, azimuth, distance, optional uom, ellipsoid, accuracy
+    :return: list of tuples (result, error)
+    """
+    results = [None] * len(params_list)
+    groups = defaultdict(list)
+    for i, params in enumerate(params_list):
+        try:
+            lon = get_angle(params['lon'], A_LON)
+            lat = get_angle(params['lat'], A_LAT)
+            azimuth = params['azimuth']
+            if check_azimuth(azimuth) is False:
+                raise ValueError('Azimuth should be a number within interval <0, 360>.')
+            distance = get_distance(params['distance'], params.get('uom', UOM_M))
+            ellipsoid = get_ellipsoid(params.get('ellipsoid', ELLIPSOID_WGS84))
+            accuracy = params.get('accuracy', ACCURACY_FULL)
+            get_max_iterations(accuracy)
+        except KeyError as e:
+            results[i] = (None, 'Missing parameter: {}'.format(e.args[0]))
+        except (TypeError, ValueError) as e:
+            results[i] = (None, str(e))
+        else:
+            groups[(ellipsoid, accuracy)].append((i, lon, lat, float(azimuth), distance))
+
+    for (ellipsoid, accuracy), items in groups.items():
+        indices, lon, lat, azimuth, distance = zip(*items)
+        lon_end, lat_end = vincenty_direct_solution_batch(lon, lat, azimuth, distance, ellipsoid, accuracy=accuracy)
+        for i, lon_dd, lat_dd, lon_dmsh, lat_dmsh in zip(indices, lon_end.tolist(), lat_end.tolist(),
+                                                         dd_to_dmsh_bulk(lon_end, A_LON).tolist(),
+                                                         dd_to_dmsh_bulk(lat_end, A_LAT).tolist()):
+            results[i] = ({'lon': lon_dd, 'lat': lat_dd, 'lon_dmsh': lon_dmsh, 'lat_dmsh': lat_dmsh}, '')
+    return results
+
+
+class ConversionService:
+    """ Handles JSON requests in batches with pool of worker threads.
+    Usage:
+        service = ConversionService(ObstacleIndex.load('DOF_index.npz'))
+        asyncio.run(service.serve_unix('/tmp/conversion.sock'))
+    """
+
+    def __init__(self, index=None, workers=DEFAULT_WORKERS, batch_max_requests=BATCH_MAX_REQUESTS):
+        """
+        :param index: ObstacleIndex, index of obstacles for obstacle lookups, None - lookups are not available
+        :param workers: int, number of worker threads
+        :param batch_max_requests: int, maximum number of requests handled in one batch
+        """
+        self.index = index
+        self.workers = workers
+        self.batch_max_requests = batch_max_requests
+        self.methods = {'arinc424_to_coordinates': convert_arinc424_codes,
+                        'coord_to_arinc424': convert_coordinates_to_arinc424,
+                        'direct': solve_direct,
+                        'obstacles_radius': self.query_obstacles_radius,
+                        'obstacles_bbox': self.query_obstacles_bbox}
+        self._executor = None
+        self._queue = None
+        # Running batches, referenced until they are done
+        self._batch_tasks = set()
+
+    def query_obstacles_radius(self, params_list):
+        """ Gets obstacles within radius from given point for batch of requests, sorted by distance.
+        :param params_list: list of dicts, params with lon, lat, radius, optional uom
+        :return: list of tuples (result, error)
+        """
+        results = []
+        for params in params_list:
+            try:
+                lon = get_angle(params['lon'], A_LON)
+                lat = get_angle(params['lat'], A_LAT)
+                radius = get_distance(params['radius'], params.get('uom', UOM_M))
+            except KeyError as e:
+                results.append((None, 'Missing parameter: {}'.format(e.args[0])))
+                continue
+            except (TypeError, ValueError) as e:
+                results.append((None, str(e)))
+                continue
+            obstacles, distances = self.index.query_radius(lon, lat, radius)
+            results.append(([obstacle_to_dict(obstacle, distance)
+                             for obstacle, distance in zip(obstacles, distances.tolist())], ''))
+        return results
+
+    def query_obstacles_bbox(self, params_list):
+        """ Gets obstacles within bounding box for batch of requests.
+        :param params_list: list of dicts, params with min_lon, min_lat, max_lon, max_lat in decimal degrees
+        :return: list of tuples (result, error)
+        """
+        results = []
+        for params in params_list:
+            try:
+                bbox = [float(params[name]) for name in ('min_lon', 'min_lat', 'max_lon', 'max_lat')]
+            except KeyError as e:
+                results.append((None, 'Missing parameter: {}'.format(e.args[0])))
+                continue
+            except (TypeError, ValueError):
+                results.append((None, 'Bounding box should be given in decimal degrees.'))
+                continue
+            results.append(([obstacle_to_dict(obstacle) for obstacle in self.index.query_bbox(*bbox)], ''))
+        return results
+
+    def handle_batch(self, requests):
+        """ Handles batch of requests, requests of the same method are handled together.
+        :param requests: list of dicts, requests with id, method and params
+        :return: list of dicts: responses in order of requests
+        """
+        groups = defaultdict(list)
+        responses = [None] * len(requests)
+        for i, request in enumerate(requests):
+            method = request.get('method')
+            params = request.get('params', {})
+            if method not in self.methods:
+                responses[i] = {'id': request.get('id'), 'error': 'Unknown method: {}'.format(method)}
+            elif method.startswith('obstacles_') and self.index is None:
+                responses[i] = {'id': request.get('id'), 'error': 'Obstacle index is not loaded.'}
+            elif not isinstance(params, dict):
+                responses[i] = {'id': request.get('id'), 'error': 'Params should be JSON object.'}
+            else:
+                groups[method].append(i)
+
+        for method, indices in groups.items():
+            try:
+                results = self.methods[method]([requests[i].get('params', {}) for i in indices])
+            except Exception as e:
+                results = [(None, 'Internal error: {}'.format(e))] * len(indices)
+            for i, (result, error) in zip(indices, results):
+                if error:
+                    responses[i] = {'id': requests[i].get('id'), 'error': error}
+                else:
+                    responses[i] = {'id': requests[i].get('id'), 'result': result}
+        return responses
+
+    async def submit(self, request):
+        """ Queues request to be handled in the next batch.
+        :param request: dict, request with id, method and params
+        :return: dict: response
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def run_batches(self):
+        """ Collects queued requests into batches and handles them in worker threads. """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Let readers queue requests which have already arrived
+            await asyncio.sleep(0)
+            while len(batch) < self.batch_max_requests and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = loop.create_task(self.run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def run_batch(self, batch):
+        requests = [request for request, _ in batch]
+        try:
+            responses = await asyncio.get_running_loop().run_in_executor(self._executor, self.handle_batch, requests)
+        except Exception as e:
+            responses = [{'id': request.get('id'), 'error': 'Internal error: {}'.format(e)} for request in requests]
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def respond(self, request, write):
+        write(json.dumps(await self.submit(request)).encode() + b'\n')
+
+    async def handle_connection(self, readline, write):
+        """ Reads requests until end of input and writes responses as they are ready.
+        :param readline: coroutine function, reads one line of input as bytes, b'' at end of input
+        :param write: function, writes bytes to output
+        """
+        tasks = set()
+        while True:
+            try:
+                line = await readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                write(json.dumps({'id': None, 'error': 'Request should not be longer than {} bytes.'.format(
+                    MAX_REQUEST_SIZE)}).encode() + b'\n')
+                continue
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError
+            except ValueError:
+                write(json.dumps({'id': None, 'error': 'Request should be JSON object.'}).encode() + b'\n')
+                continue
+            task = asyncio.get_running_loop().create_task(self.respond(request, write))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def handle_stream(self, reader, writer):
+        try:
+            await self.handle_connection(reader.readline, writer.write)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._executor = ThreadPoolExecutor(self.workers)
+        self._queue = asyncio.Queue()
+        return asyncio.get_running_loop().create_task(self.run_batches())
+
+    async def stop(self, batches_task):
+        batches_task.cancel()
+        # Shutdown waits for running batches, the event loop has to run meanwhile to deliver their responses
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+    async def serve_unix(self, path, ready=None):
+        """ Serves clients connected to Unix socket until cancelled.
+        :param path: str, socket path, existing socket file is replaced
+        :param ready: asyncio.Event, set when socket accepts connections
+        """
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        batches_task = await self.start()
+        server = await asyncio.start_unix_server(self.handle_stream, path, limit=MAX_REQUEST_SIZE)
+        try:
+            async with server:
+                if ready is not None:
+                    ready.set()
+                await server.serve_forever()
+        finally:
+            await self.stop(batches_task)
+            if os.path.exists(path):
+                os.unlink(path)
+
+    async def serve_stdio(self, in_file=None, out_file=None):
+        """ Serves requests read from input until end of input.
+        :param in_file: binary file object, standard input if None
+        :param out_file: binary file object, standard output if None
+        """
+        in_file = in_file or sys.stdin.buffer
+        out_file = out_file or sys.stdout.buffer
+        loop = asyncio.get_running_loop()
+
+        def read_line():
+            line = in_file.readline(MAX_REQUEST_SIZE)
+            if len(line) == MAX_REQUEST_SIZE and not line.endswith(b'\n'):
+                # Rest of too long line is skipped, as by StreamReader.readline
+                while line and not line.endswith(b'\n'):
+                    line = in_file.readline(MAX_REQUEST_SIZE)
+                raise ValueError('Request line is too long.')
+            return line
+
+        async def readline():
+            return await loop.run_in_executor(None, read_line)
+
+        def write(data):
+            out_file.write(data)
+            out_file.flush()
+
+        batches_task = await self.start()
+        try:
+            await self.handle_connection(readline, write)
+        finally:
+            await self.stop(batches_task)
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Service with ARINC424 conversion, direct geodetic problem solution '
+                                                 'and DOF obstacle lookups, JSON lines over stdin/stdout or socket.')
+    parser.add_argument('--socket', help='Unix socket path, standard input and output are used if not given')
+    parser.add_argument('--index', help='obstacle index file created with dof_obstacle_index.py')
+    parser.add_argument('--dof', help='Digital Obstacle File to build obstacle index from')
+    parser.add_argument('--tables', help='JSON file with ARINC424 lookup tables, created if it does not exist')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='number of worker threads')
+    options = parser.parse_args(args)
+
+    index = None
+    if options.index:
+        index = ObstacleIndex.load(options.index)
+    elif options.dof:
+        index = ObstacleIndex.from_dof_file(options.dof)
+    Arinc424CoordinatesConversion.get_lookup_tables(options.tables)
+
+    service = ConversionService(index, options.workers)
+    try:
+        if options.socket:
+            asyncio.run(service.serve_unix(options.socket))
+        else:
+            asyncio.run(service.serve_stdio())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
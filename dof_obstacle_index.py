@@ -0,0 +1,355 @@
+""" Spatial index over DOF (Digital Obstacle File) obstacles for bounding box and radius queries.
+
+    Obstacles are sorted by cells of regular latitude/longitude grid, so that obstacles from one grid row
+    and range of columns are contiguous. Candidates for the query are found with binary search on cell ids,
+    exact distance is computed with Vincenty inverse solution.
+    Corridor queries find obstacles within half width from geodesic segments (e.g. route legs between two fixes),
+    candidates from bounding boxes of segments are filtered with exact cross track distances.
+    Index is saved to NumPy .npz file and can be loaded without parsing DOF again.
+"""
+import math
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from .azm_dist_to_lonlat import (ELLIPSOID_WGS84, WGS84_A, WGS84_B, WGS84_F, get_ellipsoid,
+                                     spherical_segment_distance_batch, vincenty_cross_track_batch,
+                                     vincenty_direct_solution_batch, vincenty_inverse_solution_batch)
+    from .faa_dof_dat_to_csv import read_dof_records
+except ImportError:
+    from azm_dist_to_lonlat import (ELLIPSOID_WGS84, WGS84_A, WGS84_B, WGS84_F, get_ellipsoid,
+                                    spherical_segment_distance_batch, vincenty_cross_track_batch,
+                                    vincenty_direct_solution_batch, vincenty_inverse_solution_batch)
+    from faa_dof_dat_to_csv import read_dof_records
+
+# Default size of grid cell in degrees
+DEFAULT_CELL_SIZE = 0.25
+
+# The smallest radius of curvature of WGS84 ellipsoid (meridian at the equator) in m,
+# used to compute angular size of the radius query bounding box
+MIN_RADIUS_OF_CURVATURE = WGS84_A * (1 - WGS84_F) ** 2
+
+# Bounding box of radius query is enlarged by this factor to cover approximation of the box
+BBOX_MARGIN = 1.01
+
+# Spacing of points sampled along segment to compute bounding box of corridor in m,
+# box is enlarged by half of spacing to cover geodesic between sampled points
+CORRIDOR_SAMPLE_SPACING = 5000
+
+# Candidates of corridor query are prefiltered with distances on sphere, which differ from distances on ellipsoid
+# by less than this fraction of half width plus length of segment
+SPHERE_DISTANCE_MARGIN = 0.01
+
+# Number of segments screened at once by screen_corridors
+SCREEN_CHUNK_SEGMENTS = 1000
+
+# Result of screen_corridors, one element per segment: obstacles - structured array of controlling obstacles
+# (zeros if there is no obstacle within corridor), counts - numbers of obstacles within corridors,
+# distance, cross_track, along_track - distances of controlling obstacles in meters (NaN if there is no obstacle)
+CorridorScreening = namedtuple('CorridorScreening', 'obstacles counts distance cross_track along_track')
+
+
+class ObstacleIndex:
+    """ Grid index of obstacles.
+    Usage:
+        index = ObstacleIndex.from_dof_file('DOF.DAT')
+        index.save('DOF_index.npz')
+        index = ObstacleIndex.load('DOF_index.npz')
+        obstacles, distances = index.query_radius(-85.25, 31.57, 5000)
+    """
+
+    def __init__(self, records, cell_size=DEFAULT_CELL_SIZE, cell_ids=None):
+        """
+        :param records: numpy.ndarray, structured array with DOF_COLUMN_DTYPES fields
+        :param cell_size: float, size of grid cell in degrees
+        :param cell_ids: numpy.ndarray, cell ids of records if records are already sorted by cell id (loaded index)
+        """
+        self.cell_size = float(cell_size)
+        self.cols_count = int(math.ceil(360 / self.cell_size))
+        self.rows_count = int(math.ceil(180 / self.cell_size))
+
+        if cell_ids is None:
+            records = records[~(np.isnan(records['lat_dd']) | np.isnan(records['lon_dd']))]
+            cell_ids = self.get_cell_ids(records['lon_dd'], records['lat_dd'])
+            order = np.argsort(cell_ids, kind='stable')
+            records = records[order]
+            cell_ids = cell_ids[order]
+
+        self.records = records
+        self.cell_ids = cell_ids
+
+    @classmethod
+    def from_dof_file(cls, in_file, cell_size=DEFAULT_CELL_SIZE):
+        """ Builds index from Digital Obstacle File.
+        :param in_file: str, Digital Obstacle File path
+        :param cell_size: float, size of grid cell in degrees
+        :return: ObstacleIndex
+        """
+        return cls(read_dof_records(in_file), cell_size)
+
+    @classmethod
+    def load(cls, index_file):
+        """ Loads index saved with save method.
+        :param index_file: str, index file path
+        :return: ObstacleIndex
+        """
+        with np.load(index_file) as data:
+            return cls(data['records'], float(data['cell_size']), data['cell_ids'])
+
+    def save(self, index_file):
+        """ Saves index to file.
+        :param index_file: str, index file path (.npz)
+        """
+        with open(index_file, 'wb') as f:
+            np.savez(f, records=self.records, cell_ids=self.cell_ids, cell_size=self.cell_size)
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_rows(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell_size).astype(np.int64), 0, self.rows_count - 1)
+
+    def get_cols(self, lon):
+        return np.clip(np.floor((np.asarray(lon) + 180) / self.cell_size).astype(np.int64), 0, self.cols_count - 1)
+
+    def get_cell_ids(self, lon, lat):
+        """ Gets ids of grid cells.
+        :param lon: array_like, longitudes in decimal degrees format
+        :param lat: array_like, latitudes in decimal degrees format
+        :return: numpy.ndarray: cell ids
+        """
+        return self.get_rows(lat) * self.cols_count + self.get_cols(lon)
+
+    def get_candidates(self, min_lon, min_lat, max_lon, max_lat):
+        """ Gets indices of records from grid cells which intersect bounding box.
+        :param min_lon: float, western longitude of bounding box in decimal degrees format
+        :param min_lat: float, southern latitude of bounding box in decimal degrees format
+        :param max_lon: float, eastern longitude of bounding box in decimal degrees format
+        :param max_lat: float, northern latitude of bounding box in decimal degrees format
+        :return: numpy.ndarray: indices of records
+        """
+        rows = np.arange(self.get_rows(min_lat), self.get_rows(max_lat) + 1)
+        first_ids = rows * self.cols_count + self.get_cols(min_lon)
+        last_ids = rows * self.cols_count + self.get_cols(max_lon)
+        starts = np.searchsorted(self.cell_ids, first_ids, side='left')
+        ends = np.searchsorted(self.cell_ids, last_ids, side='right')
+        return np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)] or
+                              [np.empty(0, dtype=np.int64)])
+
+    def query_bbox_indices(self, min_lon, min_lat, max_lon, max_lat):
+        """ Gets indices of records within bounding box.
+        Bounding box crossing antimeridian is given with min_lon > max_lon.
+        :return: numpy.ndarray: indices of records
+        """
+        if min_lon > max_lon:
+            return np.concatenate((self.query_bbox_indices(min_lon, min_lat, 180, max_lat),
+                                   self.query_bbox_indices(-180, min_lat, max_lon, max_lat)))
+
+        candidates = self.get_candidates(min_lon, min_lat, max_lon, max_lat)
+        lon = self.records['lon_dd'][candidates]
+        lat = self.records['lat_dd'][candidates]
+        within = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return candidates[within]
+
+    def query_bbox(self, min_lon, min_lat, max_lon, max_lat):
+        """ Gets obstacles within bounding box.
+        Bounding box crossing antimeridian is given with min_lon > max_lon.
+        :param min_lon: float, western longitude of bounding box in decimal degrees format
+        :param min_lat: float, southern latitude of bounding box in decimal degrees format
+        :param max_lon: float, eastern longitude of bounding box in decimal degrees format
+        :param max_lat: float, northern latitude of bounding box in decimal degrees format
+        :return: numpy.ndarray: structured array of obstacles with DOF_COLUMN_DTYPES fields
+        """
+        return self.records[self.query_bbox_indices(min_lon, min_lat, max_lon, max_lat)]
+
+    @staticmethod
+    def get_radius_bbox(lon, lat, radius):
+        """ Gets bounding box which contains all points within radius from given point.
+        :param lon: float, longitude of the center in decimal degrees format
+        :param lat: float, latitude of the center in decimal degrees format
+        :param radius: float, radius in meters
+        :return: tuple: min_lon, min_lat, max_lon, max_lat, min_lon > max_lon if box crosses antimeridian
+        """
+        ang = math.degrees(radius / MIN_RADIUS_OF_CURVATURE) * BBOX_MARGIN
+        min_lat = lat - ang
+        max_lat = lat + ang
+        if min_lat <= -90 or max_lat >= 90 or ang >= 90:
+            # Circle contains pole
+            return -180, max(min_lat, -90), 180, min(max_lat, 90)
+
+        sin_dlon = math.sin(math.radians(ang)) / math.cos(math.radians(lat))
+        if sin_dlon >= 1:
+            return -180, min_lat, 180, max_lat
+        dlon = math.degrees(math.asin(sin_dlon)) * BBOX_MARGIN
+        if dlon >= 180:
+            return -180, min_lat, 180, max_lat
+        min_lon = (lon - dlon + 180) % 360 - 180
+        max_lon = (lon + dlon + 180) % 360 - 180
+        return min_lon, min_lat, max_lon, max_lat
+
+    def query_radius(self, lon, lat, radius):
+        """ Gets obstacles within radius from given point, sorted by distance.
+        :param lon: float, longitude of the center in decimal degrees format
+        :param lat: float, latitude of the center in decimal degrees format
+        :param radius: float, radius in meters
+        :return: numpy.ndarray, numpy.ndarray: structured array of obstacles with DOF_COLUMN_DTYPES fields,
+        distances from the center in meters
+        """
+        candidates = self.query_bbox_indices(*self.get_radius_bbox(lon, lat, radius))
+        distances, _, _ = vincenty_inverse_solution_batch(lon, lat,
+                                                          self.records['lon_dd'][candidates],
+                                                          self.records['lat_dd'][candidates],
+                                                          WGS84_A, WGS84_B, WGS84_F)
+        within = distances <= radius
+        candidates = candidates[within]
+        distances = distances[within]
+        order = np.argsort(distances, kind='stable')
+        return self.records[candidates[order]], distances[order]
+
+    @staticmethod
+    def get_corridor_bboxes(lon_initial, lat_initial, azimuth, length, half_width, ellipsoid=ELLIPSOID_WGS84):
+        """ Gets bounding boxes which contain all points within half width from geodesic segments.
+        Segments are sampled every CORRIDOR_SAMPLE_SPACING meters, all samples are computed with one call.
+        :param lon_initial: numpy.ndarray, longitudes of the initial points of segments in decimal degrees format
+        :param lat_initial: numpy.ndarray, latitudes of the initial points of segments in decimal degrees format
+        :param azimuth: numpy.ndarray, azimuths of segments at the initial points in decimal degrees
+        :param length: numpy.ndarray, lengths of segments in meters
+        :param half_width: numpy.ndarray, half widths of corridors in meters
+        :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+        :return min_lon, min_lat, max_lon, max_lat: numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray,
+        min_lon > max_lon if box crosses antimeridian
+        """
+        ellipsoid = get_ellipsoid(ellipsoid)
+        counts = np.ceil(length / CORRIDOR_SAMPLE_SPACING).astype(np.int64) + 1
+        segments = np.repeat(np.arange(counts.size), counts)
+        starts = np.cumsum(counts) - counts
+        fractions = (np.arange(segments.size) - starts[segments]) / np.maximum(counts - 1, 1)[segments]
+        lon, lat = vincenty_direct_solution_batch(lon_initial[segments], lat_initial[segments], azimuth[segments],
+                                                  length[segments] * fractions, ellipsoid)
+        dlon = (lon - lon_initial[segments] + 180) % 360 - 180
+
+        # The smallest radius of curvature of ellipsoid (meridian at the equator)
+        min_radius_of_curvature = ellipsoid.a * (1 - ellipsoid.f) ** 2
+        ang = np.degrees((half_width + CORRIDOR_SAMPLE_SPACING / 2) / min_radius_of_curvature) * BBOX_MARGIN
+        min_lat = np.minimum.reduceat(lat, starts) - ang
+        max_lat = np.maximum.reduceat(lat, starts) + ang
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sin_dlon = np.sin(np.radians(ang)) / np.cos(np.radians(np.maximum(np.fabs(min_lat), np.fabs(max_lat))))
+        # Corridor contains pole
+        full = (min_lat <= -90) | (max_lat >= 90) | ~(sin_dlon < 1)
+        dlon_margin = np.degrees(np.arcsin(np.where(full, 0, sin_dlon))) * BBOX_MARGIN
+        min_lon = lon_initial + np.minimum.reduceat(dlon, starts) - dlon_margin
+        max_lon = lon_initial + np.maximum.reduceat(dlon, starts) + dlon_margin
+        full |= max_lon - min_lon >= 360
+        min_lon = np.where(full, -180, (min_lon + 180) % 360 - 180)
+        max_lon = np.where(full, 180, (max_lon + 180) % 360 - 180)
+        return min_lon, np.maximum(min_lat, -90), max_lon, np.minimum(max_lat, 90)
+
+    def query_corridors_indices(self, lon_initial, lat_initial, lon_end, lat_end, half_width,
+                                ellipsoid=ELLIPSOID_WGS84):
+        """ Gets indices of records within half width from geodesic segments, corridors have half circles
+        around end points of segments. Candidates from bounding boxes are prefiltered with distances on sphere,
+        the rest of candidates of all segments is filtered with one call of vincenty_cross_track_batch.
+        :param lon_initial: array_like, longitudes of the initial points of segments in decimal degrees format
+        :param lat_initial: array_like, latitudes of the initial points of segments in decimal degrees format
+        :param lon_end: array_like, longitudes of the end points of segments in decimal degrees format
+        :param lat_end: array_like, latitudes of the end points of segments in decimal degrees format
+        :param half_width: float or array_like, half widths of corridors in meters
+        :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+        :return segments, indices, distance, cross_track, along_track: numpy.ndarray, numpy.ndarray,
+        numpy.ndarray, numpy.ndarray, numpy.ndarray, indices of segments and records, distances from segments,
+        cross track and along track distances in meters, see vincenty_cross_track_batch
+        """
+        lon_initial, lat_initial, lon_end, lat_end, half_width = [
+            array.ravel() for array in np.broadcast_arrays(*[np.asarray(value, dtype=np.float64) for value in
+                                                             (lon_initial, lat_initial, lon_end, lat_end, half_width)])]
+        ellipsoid = get_ellipsoid(ellipsoid)
+        length, azimuth, _ = vincenty_inverse_solution_batch(lon_initial, lat_initial, lon_end, lat_end, ellipsoid)
+        bboxes = self.get_corridor_bboxes(lon_initial, lat_initial, azimuth, length, half_width, ellipsoid)
+        candidates = [self.query_bbox_indices(*bbox) for bbox in zip(*[bound.tolist() for bound in bboxes])]
+        segments = np.repeat(np.arange(len(candidates)), [len(indices) for indices in candidates])
+        indices = np.concatenate(candidates or [np.empty(0, dtype=np.int64)]).astype(np.int64)
+
+        distance = spherical_segment_distance_batch(lon_initial[segments], lat_initial[segments],
+                                                    lon_end[segments], lat_end[segments],
+                                                    self.records['lon_dd'][indices], self.records['lat_dd'][indices],
+                                                    ellipsoid.mean_radius)
+        near = distance <= (half_width + SPHERE_DISTANCE_MARGIN * (half_width + length))[segments]
+        segments, indices = segments[near], indices[near]
+
+        distance, cross_track, along_track = vincenty_cross_track_batch(
+            lon_initial[segments], lat_initial[segments], lon_end[segments], lat_end[segments],
+            self.records['lon_dd'][indices], self.records['lat_dd'][indices], ellipsoid)
+        within = distance <= half_width[segments]
+        return segments[within], indices[within], distance[within], cross_track[within], along_track[within]
+
+    def query_corridor(self, lon_initial, lat_initial, lon_end, lat_end, half_width, ellipsoid=ELLIPSOID_WGS84):
+        """ Gets obstacles within half width from geodesic segment, sorted by along track distance.
+        :param lon_initial: float, longitude of the initial point of segment in decimal degrees format
+        :param lat_initial: float, latitude of the initial point of segment in decimal degrees format
+        :param lon_end: float, longitude of the end point of segment in decimal degrees format
+        :param lat_end: float, latitude of the end point of segment in decimal degrees format
+        :param half_width: float, half width of corridor in meters
+        :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+        :return: numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray: structured array of obstacles with
+        DOF_COLUMN_DTYPES fields, distances from segment, cross track and along track distances in meters
+        """
+        _, indices, distance, cross_track, along_track = self.query_corridors_indices(lon_initial, lat_initial,
+                                                                                      lon_end, lat_end, half_width,
+                                                                                      ellipsoid)
+        order = np.argsort(along_track, kind='stable')
+        return self.records[indices[order]], distance[order], cross_track[order], along_track[order]
+
+    def screen_corridors(self, lon_initial, lat_initial, lon_end, lat_end, half_width,
+                         chunk_segments=SCREEN_CHUNK_SEGMENTS, ellipsoid=ELLIPSOID_WGS84):
+        """ Finds controlling obstacle of every segment - obstacle with the highest ams_height within half width
+        from geodesic segment, the closest one of equally high obstacles.
+        :param lon_initial: array_like, longitudes of the initial points of segments in decimal degrees format
+        :param lat_initial: array_like, latitudes of the initial points of segments in decimal degrees format
+        :param lon_end: array_like, longitudes of the end points of segments in decimal degrees format
+        :param lat_end: array_like, latitudes of the end points of segments in decimal degrees format
+        :param half_width: float or array_like, half widths of corridors in meters
+        :param chunk_segments: int, maximum number of segments screened at once
+        :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+        :return: CorridorScreening
+        """
+        arrays = [array.ravel() for array in np.broadcast_arrays(*[np.asarray(value, dtype=np.float64) for value in
+                                                                   (lon_initial, lat_initial, lon_end, lat_end,
+                                                                    half_width)])]
+        count = arrays[0].size
+        obstacles = np.zeros(count, dtype=self.records.dtype)
+        counts = np.zeros(count, dtype=np.int64)
+        distance, cross_track, along_track = np.full(count, np.nan), np.full(count, np.nan), np.full(count, np.nan)
+
+        for start in range(0, count, chunk_segments):
+            stop = min(start + chunk_segments, count)
+            segments, indices, chunk_distance, chunk_cross_track, chunk_along_track = self.query_corridors_indices(
+                *[array[start:stop] for array in arrays], ellipsoid)
+            counts[start:stop] = np.bincount(segments, minlength=stop - start)
+
+            order = np.lexsort((chunk_distance, -self.records['ams_height'][indices].astype(np.int64), segments))
+            _, first = np.unique(segments[order], return_index=True)
+            controlling = order[first]
+            screened = segments[controlling] + start
+            obstacles[screened] = self.records[indices[controlling]]
+            distance[screened] = chunk_distance[controlling]
+            cross_track[screened] = chunk_cross_track[controlling]
+            along_track[screened] = chunk_along_track[controlling]
+        return CorridorScreening(obstacles, counts, distance, cross_track, along_track)
+
+
+def main(args):
+    if len(args) == 2:
+        in_file, index_file = args
+        index = ObstacleIndex.from_dof_file(in_file)
+        index.save(index_file)
+        return 'Index of {} obstacles saved to {}.'.format(len(index), index_file)
+    else:
+        return 'Usage:\n' \
+               'dof_obstacle_index.py <dof_file> <index_file>'
+
+
+if __name__ == '__main__':
+    print(main(sys.argv[1:]))
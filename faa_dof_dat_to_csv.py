@@ -6,8 +6,34 @@
     https://www.faa.gov/air_traffic/flight_info/aeronav/digital_products/dof/
 
     Data in csv format can be easily imported Geographic Information Systems (GIS) software or database.
+    Typed columnar output (Parquet, Arrow IPC with pyarrow installed, NumPy .npy/.npz otherwise) is available too.
 """
+import contextlib
 import csv
+import io
+import mmap
+import multiprocessing
+import operator
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+try:
+    from . import instrumentation
+except ImportError:
+    import instrumentation
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 
 def dms2dd(dmsh):
@@ -28,12 +54,23 @@ def dms2dd(dmsh):
     return dd
 
 
-def faa_dof2csv(in_file, output_file):
-    """ Converts Digital Obstacle File dat format into csv format and calculates latitude and longitude in DD format.
-    :param in_file: str, Digital Obstacle File path
-    :param output_file: str, output CSV file path
-    """
-    cvs_field_names = ['oas_code',
+# Number of header lines at the beginning of DOF file
+DOF_HEADER_LINES = 4
+
+# Header is detected within this number of first lines of file, it ends with line of dashes
+DOF_HEADER_SEARCH_LINES = 10
+
+# Default size of binary block read from DOF file at once (bytes)
+DOF_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Encoding of DOF file - records are plain ASCII, latin-1 never fails on stray bytes
+DOF_ENCODING = 'latin-1'
+
+# Expected throughput of faa_dof2csv on the full national DOF, records per second,
+# checked by benchmark.py on synthetic DOF files of comparable size
+DOF_THROUGHPUT_TARGET = 250000
+
+DOF_CSV_FIELD_NAMES = ['oas_code',
                        'obs_number',
                        'verif_stat',
                        'country_id',
@@ -55,37 +92,1024 @@ def faa_dof2csv(in_file, output_file):
                        'lat_dd',
                        'lon_dd']
 
-    with open(in_file, 'r') as dof_file:
-        with open(output_file, 'w', newline='') as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=cvs_field_names, delimiter=',')
-            writer.writeheader()
-            line_nr = 0
-            for line in dof_file:
-                line_nr += 1
-                if line_nr < 5:  # Skip first 4 lines - header of DOF
-                    pass
+# Width of DOF record (without line terminator)
+DOF_RECORD_WIDTH = 127
+
+# Position of fixed width fields in DOF record: (start, end)
+DOF_FIELD_SLICES = {'oas_code': (0, 2),
+                    'obs_number': (3, 9),
+                    'verif_stat': (10, 11),
+                    'country_id': (12, 14),
+                    'state_id': (15, 17),
+                    'city_name': (18, 34),
+                    'lat_dms': (35, 47),
+                    'lon_dms': (48, 61),
+                    'obs_type': (62, 80),
+                    'quantity': (81, 82),
+                    'agl_height': (83, 88),
+                    'ams_height': (89, 94),
+                    'lighting': (95, 96),
+                    'hor_acc': (97, 98),
+                    'vert_acc': (99, 100),
+                    'mar_indicator': (101, 102),
+                    'faa_study_number': (103, 117),
+                    'action': (118, 119),
+                    'jdate': (120, 127)}
+
+# Fields which have to be ASCII digits in valid record
+DOF_DIGIT_FIELDS = ['obs_number', 'quantity', 'agl_height', 'ams_height', 'jdate']
+
+# Columns of quarantine file with invalid records
+DOF_QUARANTINE_FIELD_NAMES = ['line_number', 'error', 'record']
+
+# Types of DOF columns in columnar output
+DOF_COLUMN_DTYPES = [('oas_code', 'S2'),
+                     ('obs_number', 'i4'),
+                     ('verif_stat', 'S1'),
+                     ('country_id', 'S2'),
+                     ('state_id', 'S2'),
+                     ('city_name', 'S16'),
+                     ('lat_dms', 'S12'),
+                     ('lon_dms', 'S13'),
+                     ('obs_type', 'S18'),
+                     ('quantity', 'i2'),
+                     ('agl_height', 'i4'),
+                     ('ams_height', 'i4'),
+                     ('lighting', 'S1'),
+                     ('hor_acc', 'S1'),
+                     ('vert_acc', 'S1'),
+                     ('mar_indicator', 'S1'),
+                     ('faa_study_number', 'S14'),
+                     ('action', 'S1'),
+                     ('jdate', 'M8[D]'),
+                     ('lat_dd', 'f8'),
+                     ('lon_dd', 'f8')]
+
+# Value of integer columns which are blank or not numeric in DOF record (records read without validation)
+DOF_INT_NULL = -1
+
+# Columnar output formats
+FMT_PARQUET = 'parquet'
+FMT_ARROW = 'arrow'
+FMT_NPY = 'npy'
+FMT_NPZ = 'npz'
+
+COLUMNAR_FORMATS = {'.parquet': FMT_PARQUET,
+                    '.arrow': FMT_ARROW,
+                    '.feather': FMT_ARROW,
+                    '.npy': FMT_NPY,
+                    '.npz': FMT_NPZ}
+
+
+def detect_dof_header_lines(in_file):
+    """ Detects number of header lines of DOF file. Header ends with line of dashes, file without such line
+    has no header if its first line is valid record, otherwise standard DOF_HEADER_LINES lines are assumed.
+    :param in_file: str, Digital Obstacle File path
+    :return: int, number of header lines
+    """
+    with open(in_file, 'rb') as dof_file:
+        lines = [dof_file.readline() for _ in range(DOF_HEADER_SEARCH_LINES)]
+    for i, line in enumerate(lines):
+        line = line.rstrip(b'\r\n')
+        if line.count(b'-') >= 10 and not line.replace(b' ', b'').strip(b'-'):
+            return i + 1
+    first_line = lines[0].decode(DOF_ENCODING).rstrip('\r\n')
+    if first_line and not validate_dof_lines([first_line])[1]:
+        return 0
+    return DOF_HEADER_LINES
+
+
+def iter_dof_blocks(in_file, block_size=DOF_BLOCK_SIZE, start=0, end=None, header_lines=None):
+    """ Reads DOF file in large binary blocks and yields records (lines) cut at line boundaries.
+    Header lines are skipped when reading starts from the beginning of the file.
+    Blank lines are yielded too, so that position of line in file can be counted.
+    :param in_file: str, Digital Obstacle File path
+    :param block_size: int, size of the binary block read at once in bytes
+    :param start: int, byte offset of the first record to read, must be at line boundary
+    :param end: int, byte offset where reading stops (must be at line boundary), None - read to the end of file
+    :param header_lines: int, number of header lines, None - detected with detect_dof_header_lines
+    :return: generator of lists of str, records from consecutive blocks of the file
+    """
+    if start != 0:
+        header_left = 0
+    elif header_lines is None:
+        header_left = detect_dof_header_lines(in_file)
+    else:
+        header_left = header_lines
+    tail = b''
+    with open(in_file, 'rb') as dof_file:
+        dof_file.seek(start)
+        pos = start
+        while end is None or pos < end:
+            size = block_size if end is None else min(block_size, end - pos)
+            block = dof_file.read(size)
+            if not block:
+                break
+            pos += len(block)
+            block = tail + block
+            last_eol = block.rfind(b'\n')
+            if last_eol == -1:
+                tail = block
+                continue
+            tail = block[last_eol + 1:]
+            lines = block[:last_eol].decode(DOF_ENCODING).split('\n')
+            if header_left:
+                skipped = min(header_left, len(lines))
+                header_left -= skipped
+                lines = lines[skipped:]
+            if lines:
+                yield lines
+
+    if tail and not header_left:
+        yield [tail.decode(DOF_ENCODING)]
+
+
+def split_dof_file(in_file, shards_count):
+    """ Splits DOF file into byte ranges at line boundaries, which can be converted independently.
+    The first range starts at the beginning of the file, so header is skipped while reading it.
+    :param in_file: str, Digital Obstacle File path
+    :param shards_count: int, requested number of ranges
+    :return: list of tuples (start, end), byte ranges in file order
+    """
+    file_size = os.path.getsize(in_file)
+    boundaries = [0]
+    with open(in_file, 'rb') as dof_file:
+        # Ranges other than the first one can't start within header
+        for _ in range(detect_dof_header_lines(in_file)):
+            dof_file.readline()
+        header_end = dof_file.tell()
+
+        for i in range(1, shards_count):
+            offset = max(header_end + (file_size - header_end) * i // shards_count, header_end)
+            # Move to the beginning of the next line
+            dof_file.seek(max(offset - 1, 0))
+            dof_file.readline()
+            boundary = dof_file.tell()
+            if boundaries[-1] < boundary < file_size:
+                boundaries.append(boundary)
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def dms2dd_bulk(dms_values, deg_width):
+    """ Converts column of fixed width DMS latitudes or longitudes from DOF file to DD format at once.
+    Values are packed into single byte buffer and digits are decoded with NumPy, values which do not
+    match DOF format (e.g. 31 34 35.00N for latitude, 085 15 06.00W for longitude) are returned as NaN.
+    :param dms_values: list of str or numpy.ndarray of bytes, latitudes or longitudes in DOF DMS format
+    :param deg_width: int, number of degrees digits, 2 for latitude, 3 for longitude
+    :return: numpy.ndarray: latitudes or longitudes in DD format
+    """
+    width = deg_width + 10
+    if isinstance(dms_values, np.ndarray) and dms_values.dtype.kind == 'S':
+        raw = np.ascontiguousarray(dms_values, dtype='S{}'.format(width)).view(np.uint8).reshape(-1, width)
+    else:
+        if not all(len(value) == width for value in dms_values):
+            dms_values = [value.ljust(width)[:width] for value in dms_values]
+        # Characters which are not in DOF encoding are replaced with single byte, so values keep their width
+        raw = np.frombuffer(''.join(dms_values).encode(DOF_ENCODING, 'replace'), dtype=np.uint8).reshape(-1, width)
+    return dms2dd_raw(raw, deg_width)
+
+
+def dms2dd_raw(raw, deg_width):
+    """ Converts fixed width DMS latitudes or longitudes given as bytes to DD format, see dms2dd_bulk.
+    Values with minutes or seconds out of interval <0, 60) or out of interval <-90, 90> for latitude
+    and <-180, 180> for longitude are returned as NaN.
+    :param raw: numpy.ndarray, uint8 array of shape (values, deg_width + 10)
+    :param deg_width: int, number of degrees digits, 2 for latitude, 3 for longitude
+    :return: numpy.ndarray: latitudes or longitudes in DD format
+    """
+    digits = raw.astype(np.int16) - 48
+
+    d = np.zeros(len(raw), dtype=np.int16)
+    for i in range(deg_width):
+        d = d * 10 + digits[:, i]
+    m = digits[:, deg_width + 1] * 10 + digits[:, deg_width + 2]
+    # Seconds as integer hundredths, so that division gives the same float as float('SS.SS')
+    s_hundredths = (digits[:, deg_width + 4] * 1000 + digits[:, deg_width + 5] * 100 +
+                    digits[:, deg_width + 7] * 10 + digits[:, deg_width + 8])
+    s = s_hundredths / 100
+
+    dd = d + m / 60 + s / 3600
+    in_range = (m < 60) & (s_hundredths < 6000) & (dd <= (90 if deg_width == 2 else 180))
+
+    h = raw[:, deg_width + 9]
+    negative = (h == ord('W')) | (h == ord('S'))
+    dd[negative] = -dd[negative]
+
+    digit_cols = list(range(deg_width)) + [deg_width + 1, deg_width + 2, deg_width + 4, deg_width + 5,
+                                           deg_width + 7, deg_width + 8]
+    hemispheres = b'NS' if deg_width == 2 else b'EW'
+    valid = ((digits[:, digit_cols] >= 0) & (digits[:, digit_cols] <= 9)).all(axis=1)
+    valid &= (raw[:, deg_width] == ord(' ')) & (raw[:, deg_width + 3] == ord(' '))
+    valid &= raw[:, deg_width + 6] == ord('.')
+    valid &= (h == hemispheres[0]) | (h == hemispheres[1])
+    valid &= in_range
+    dd[~valid] = np.nan
+    return dd
+
+
+def dd_column_to_csv(dd):
+    """ Converts column of coordinates in DD format to list of values written to csv file.
+    :param dd: numpy.ndarray, latitudes or longitudes in DD format, NaN for invalid values
+    :return: list: float values, empty strings in place of NaN
+    """
+    values = dd.tolist()
+    if np.isnan(dd).any():
+        values = ['' if v != v else v for v in values]
+    return values
+
+
+def validate_dof_lines(lines):
+    """ Checks width of DOF records, digits of numeric fields and format of coordinates.
+    Records of valid width are checked at once as matrix of bytes.
+    :param lines: list of str, DOF records without line terminators
+    :return: valid_lines, invalid, lat_dd, lon_dd: list of str - valid records, list of tuples (index in lines,
+    error message) - invalid records, numpy.ndarray, numpy.ndarray - latitudes and longitudes of valid records in DD
+    """
+    invalid = []
+    if all(len(line) == DOF_RECORD_WIDTH for line in lines):
+        indices = None
+        valid_lines = lines
+    else:
+        indices = []
+        for i, line in enumerate(lines):
+            if len(line) == DOF_RECORD_WIDTH:
+                indices.append(i)
+            else:
+                invalid.append((i, 'Record length {} instead of {}.'.format(len(line), DOF_RECORD_WIDTH)))
+        valid_lines = [lines[i] for i in indices]
+
+    raw = np.frombuffer(''.join(valid_lines).encode(DOF_ENCODING), dtype=np.uint8).reshape(-1, DOF_RECORD_WIDTH)
+    fields_valid = {}
+    for name in DOF_DIGIT_FIELDS:
+        field = raw[:, slice(*DOF_FIELD_SLICES[name])]
+        fields_valid[name] = ((field >= ord('0')) & (field <= ord('9'))).all(axis=1)
+    lat_dd = dms2dd_raw(raw[:, slice(*DOF_FIELD_SLICES['lat_dms'])], 2)
+    lon_dd = dms2dd_raw(raw[:, slice(*DOF_FIELD_SLICES['lon_dms'])], 3)
+    fields_valid['lat_dms'] = ~np.isnan(lat_dd)
+    fields_valid['lon_dms'] = ~np.isnan(lon_dd)
+
+    valid = np.logical_and.reduce(list(fields_valid.values()))
+    if not valid.all():
+        for i in np.flatnonzero(~valid).tolist():
+            names = [name for name in DOF_FIELD_SLICES if name in fields_valid and not fields_valid[name][i]]
+            invalid.append((i if indices is None else indices[i], 'Invalid fields: {}.'.format(', '.join(names))))
+        invalid.sort()
+        valid_lines = [line for line, is_valid in zip(valid_lines, valid.tolist()) if is_valid]
+        lat_dd, lon_dd = lat_dd[valid], lon_dd[valid]
+    return valid_lines, invalid, lat_dd, lon_dd
+
+
+def parse_dof_lines(lines, lat_dd=None, lon_dd=None):
+    """ Slices fixed width fields of DOF records and calculates latitude and longitude in DD format.
+    :param lines: list of str, DOF records
+    :param lat_dd: numpy.ndarray, latitudes of records in DD format if already computed (validate_dof_lines)
+    :param lon_dd: numpy.ndarray, longitudes of records in DD format if already computed (validate_dof_lines)
+    :return: list of tuples, field values in DOF_CSV_FIELD_NAMES order
+    """
+    if lat_dd is None:
+        lat_dd = dms2dd_bulk([line[35:47] for line in lines], 2)
+    if lon_dd is None:
+        lon_dd = dms2dd_bulk([line[48:61] for line in lines], 3)
+    lat_dd = dd_column_to_csv(lat_dd)
+    lon_dd = dd_column_to_csv(lon_dd)
+    return [(line[0:2],
+             line[3:9],
+             line[10:11],
+             line[12:14],
+             line[15:17],
+             line[18:34].rstrip(),
+             line[35:47],
+             line[48:61],
+             line[62:80].rstrip(),
+             line[81:82],
+             line[83:88],
+             line[89:94],
+             line[95:96],
+             line[97:98],
+             line[99:100],
+             line[101:102],
+             line[103:117].strip(),
+             line[118:119],
+             line[120:127],
+             lat,
+             lon) for line, lat, lon in zip(lines, lat_dd, lon_dd)]
+
+
+def validate_dof_block(lines):
+    """ Prepares block of DOF records read with iter_dof_blocks: strips carriage returns of CRLF terminated files,
+    skips blank lines and validates records with validate_dof_lines.
+    :param lines: list of str, DOF records (blank lines included to count lines)
+    :return: valid_lines, invalid, lat_dd, lon_dd: list of str - valid records, list of tuples (index in lines,
+    error message, record) - invalid records, numpy.ndarray, numpy.ndarray - latitudes and longitudes of valid
+    records in DD format
+    """
+    if lines[0].endswith('\r'):
+        lines = [line.rstrip('\r') for line in lines]
+    if not all(lines):
+        numbered = [(i, line) for i, line in enumerate(lines) if line.strip()]
+        lines = [line for i, line in numbered]
+    else:
+        numbered = None
+    if not lines:
+        return [], [], np.empty(0), np.empty(0)
+    valid_lines, invalid, lat_dd, lon_dd = validate_dof_lines(lines)
+    invalid = [(i if numbered is None else numbered[i][0], error, lines[i]) for i, error in invalid]
+    return valid_lines, invalid, lat_dd, lon_dd
+
+
+def open_quarantine_writer(stack, quarantine_file):
+    """ Opens quarantine file of invalid records and writes its header.
+    :param stack: contextlib.ExitStack, file is closed on exit of stack
+    :param quarantine_file: str, CSV file path for invalid records, None - invalid records are dropped
+    :return: csv writer, None if quarantine_file is None
+    """
+    if quarantine_file is None:
+        return None
+    quarantine_writer = csv.writer(stack.enter_context(open(quarantine_file, 'w', newline='')), delimiter=',')
+    quarantine_writer.writerow(DOF_QUARANTINE_FIELD_NAMES)
+    return quarantine_writer
+
+
+def write_dof_blocks(writer, blocks, quarantine_writer=None, first_line_number=1):
+    """ Validates and parses blocks of DOF records and writes them with csv writer, one batch per block.
+    Blank lines are skipped, invalid records are written with quarantine writer (or dropped if it is None)
+    as rows of DOF_QUARANTINE_FIELD_NAMES fields.
+    :param writer: csv writer
+    :param blocks: iterable of lists of str, DOF records (blank lines included to count lines)
+    :param quarantine_writer: csv writer of invalid records
+    :param first_line_number: int, number of line in file of the first record of blocks, counted from 1
+    :return: records_count, quarantined_count, lines_count: int, int, int - numbers of records written,
+    invalid records and lines read from blocks
+    """
+    collector = instrumentation.ACTIVE
+    records_count = 0
+    quarantined_count = 0
+    line_number = first_line_number
+    for lines in blocks:
+        block_line_number = line_number
+        line_number += len(lines)
+
+        start = time.perf_counter() if collector is not None else None
+        valid_lines, invalid, lat_dd, lon_dd = validate_dof_block(lines)
+        if not valid_lines and not invalid:
+            continue
+        rows = parse_dof_lines(valid_lines, lat_dd, lon_dd)
+        parsed = time.perf_counter() if collector is not None else None
+        writer.writerows(rows)
+        if invalid:
+            if quarantine_writer is not None:
+                quarantine_writer.writerows((block_line_number + i, error, record) for i, error, record in invalid)
+            quarantined_count += len(invalid)
+        if collector is not None:
+            collector.add_time('faa_dof2csv.parse', parsed - start)
+            collector.add_time('faa_dof2csv.write', time.perf_counter() - parsed)
+            collector.count('faa_dof2csv.blocks')
+        records_count += len(rows)
+    return records_count, quarantined_count, line_number - first_line_number
+
+
+def faa_dof2csv(in_file, output_file, block_size=DOF_BLOCK_SIZE, quarantine_file=None):
+    """ Converts Digital Obstacle File dat format into csv format and calculates latitude and longitude in DD format.
+    File is streamed in large blocks and rows are written in batches, one batch per block.
+    Number of header lines is detected, blank lines are skipped and records with invalid width, numeric fields
+    or coordinates are not written to output file, but to quarantine file with their line numbers.
+    Parse, write and total times and number of records are collected if instrumentation is enabled.
+    :param in_file: str, Digital Obstacle File path
+    :param output_file: str, output CSV file path
+    :param block_size: int, size of the binary block read from in_file at once in bytes
+    :param quarantine_file: str, CSV file path for invalid records, None - invalid records are dropped
+    :return: int, number of records written
+    """
+    collector = instrumentation.ACTIVE
+    start = time.perf_counter()
+    header_lines = detect_dof_header_lines(in_file)
+    with contextlib.ExitStack() as stack:
+        csv_file = stack.enter_context(open(output_file, 'w', newline=''))
+        writer = csv.writer(csv_file, delimiter=',')
+        writer.writerow(DOF_CSV_FIELD_NAMES)
+        quarantine_writer = open_quarantine_writer(stack, quarantine_file)
+        records_count, quarantined_count, _ = write_dof_blocks(
+            writer, iter_dof_blocks(in_file, block_size, header_lines=header_lines), quarantine_writer,
+            header_lines + 1)
+    if collector is not None:
+        collector.add_time('faa_dof2csv.total', time.perf_counter() - start)
+        collector.count('faa_dof2csv.records', records_count)
+        collector.count('faa_dof2csv.quarantined', quarantined_count)
+    return records_count
+
+
+def iter_csv_rows_lines(lines):
+    """ Parses csv lines with one csv reader and yields every row with the lines it was parsed from.
+    :param lines: iterable of str, csv lines with line terminators, e.g. text stream
+    :return: generator of tuples (row, line): csv row (list of str) and its csv line(s) with line terminator
+    """
+    row_lines = []
+
+    def iter_lines():
+        for line in lines:
+            row_lines.append(line)
+            yield line
+
+    for row in csv.reader(iter_lines()):
+        yield row, ''.join(row_lines)
+        row_lines.clear()
+
+
+def iter_dof_csv_lines(in_file, quarantine_writer=None):
+    """ Converts DOF file into lines of csv file in the same way as faa_dof2csv: header is detected,
+    blank lines are skipped and invalid records are written with quarantine writer (or dropped if it is None).
+    :param in_file: str, Digital Obstacle File path
+    :param quarantine_writer: csv writer of invalid records
+    :return: generator of tuples (row, line): csv row (list of str in DOF_CSV_FIELD_NAMES order) and csv line
+    with line terminator as written by faa_dof2csv
+    """
+    header_lines = detect_dof_header_lines(in_file)
+    line_number = header_lines + 1
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer, delimiter=',')
+    for lines in iter_dof_blocks(in_file, header_lines=header_lines):
+        _, _, lines_count = write_dof_blocks(writer, [lines], quarantine_writer, line_number)
+        line_number += lines_count
+        # Text stream splits lines only on line terminators, not on other line boundaries of str.splitlines
+        # (e.g. \x0c, \x1c or \x85), which can be in fields of records
+        csv_lines = io.StringIO(buffer.getvalue(), newline='')
+        buffer.seek(0)
+        buffer.truncate()
+        yield from iter_csv_rows_lines(csv_lines)
+
+
+def get_dof_key_getter(field_names=DOF_CSV_FIELD_NAMES):
+    """ Gets function which returns key of obstacle from csv row, key columns are looked up once.
+    :param field_names: list of str, names of csv columns (header of csv file)
+    :return: function: csv row (list of str) -> tuple (oas_code, obs_number)
+    """
+    return operator.itemgetter(field_names.index('oas_code'), field_names.index('obs_number'))
+
+
+def iter_dof_csv_keys(header, lines):
+    """ Gets keys of obstacles of lines of csv file written by faa_dof2csv, lines are parsed with csv reader.
+    :param header: str, header line of csv file
+    :param lines: iterable of str, csv lines after header
+    :return: generator of tuples (key, line): key (oas_code, obs_number), csv line as it is in file
+    """
+    get_key = get_dof_key_getter(next(csv.reader([header]), []))
+    for row, line in iter_csv_rows_lines(lines):
+        yield get_key(row), line
+
+
+def read_dof_changes(in_file, quarantine_writer=None):
+    """ Reads changes from DOF daily change file (or any DOF file) according to action field of records.
+    :param in_file: str, Digital Obstacle File path
+    :param quarantine_writer: csv writer of invalid records, None - invalid records are dropped
+    :return: dict: key (oas_code, obs_number) -> csv line of added or changed obstacle, None for dismantled obstacle
+    """
+    action = DOF_CSV_FIELD_NAMES.index('action')
+    get_key = get_dof_key_getter()
+    changes = {}
+    for row, csv_line in iter_dof_csv_lines(in_file, quarantine_writer):
+        changes[get_key(row)] = None if row[action] == 'D' else csv_line
+    return changes
+
+
+def diff_dof_cycle(csv_file, in_file, quarantine_writer=None):
+    """ Compares csv file written by faa_dof2csv for previous DOF cycle with new DOF cycle.
+    :param csv_file: str, csv file path of previous cycle
+    :param in_file: str, Digital Obstacle File path of new cycle
+    :param quarantine_writer: csv writer of invalid records, None - invalid records are dropped
+    :return: dict: key (oas_code, obs_number) -> csv line of added or changed obstacle, None for deleted obstacle
+    """
+    get_key = get_dof_key_getter()
+    new_lines = {get_key(row): csv_line for row, csv_line in iter_dof_csv_lines(in_file, quarantine_writer)}
+
+    changes = {}
+    with open(csv_file, newline='') as old_csv:
+        for key, old_line in iter_dof_csv_keys(old_csv.readline(), old_csv):
+            new_line = new_lines.pop(key, None)
+            if new_line is None:
+                changes[key] = None
+            elif new_line.rstrip('\r\n') != old_line.rstrip('\r\n'):
+                changes[key] = new_line
+    changes.update(new_lines)
+    return changes
+
+
+def apply_dof_changes(csv_file, changes, output_file):
+    """ Applies changes to csv file written by faa_dof2csv, lines of obstacles without changes are copied as they are.
+    Changed obstacles are replaced in place, added obstacles are appended at the end of file.
+    :param csv_file: str, csv file path of previous cycle
+    :param changes: dict, key (oas_code, obs_number) -> csv line, None for deleted obstacle
+    :param output_file: str, output csv file path, must be different from csv_file
+    :return: dict: number of added, changed and deleted obstacles
+    """
+    stats = {'added': 0, 'changed': 0, 'deleted': 0}
+    pending = dict(changes)
+    with open(csv_file, newline='') as old_csv:
+        with open(output_file, 'w', newline='') as new_csv:
+            header = old_csv.readline()
+            new_csv.write(header)
+            for key, old_line in iter_dof_csv_keys(header, old_csv):
+                if key not in pending:
+                    new_csv.write(old_line)
+                    continue
+                new_line = pending.pop(key)
+                if new_line is None:
+                    stats['deleted'] += 1
                 else:
-                    # Write parsed data to output file
-                    lat_dms = line[35:47]
-                    lon_dms = line[48:61]
-                    writer.writerow({'oas_code': line[0:2],
-                                     'obs_number': line[3:9],
-                                     'verif_stat': line[10],
-                                     'country_id': line[12:14],
-                                     'state_id': line[15:17],
-                                     'city_name': line[18:34].rstrip(),
-                                     'lat_dms': lat_dms,
-                                     'lon_dms': lon_dms,
-                                     'obs_type': line[62:80].rstrip(),
-                                     'quantity': line[81],
-                                     'agl_height': line[83:88],
-                                     'ams_height': line[89:94],
-                                     'lighting': line[95],
-                                     'hor_acc': line[97],
-                                     'vert_acc': line[99],
-                                     'mar_indicator': line[101],
-                                     'faa_study_number': line[103:117].strip(),
-                                     'action': line[118],
-                                     'jdate': line[120:127],
-                                     'lat_dd': str(lat_dms),
-                                     'lon_dd': str(lon_dms)})
+                    new_csv.write(new_line)
+                    stats['changed'] += 1
+
+            for new_line in pending.values():
+                if new_line is not None:
+                    new_csv.write(new_line)
+                    stats['added'] += 1
+    return stats
+
+
+def update_dof_csv(csv_file, in_file, output_file, full_cycle=False, quarantine_file=None):
+    """ Updates csv file written by faa_dof2csv for previous DOF cycle without full reconversion.
+    Records of in_file are validated as in faa_dof2csv, so that updated csv file is the same as csv file
+    converted from the new cycle.
+    :param csv_file: str, csv file path of previous cycle
+    :param in_file: str, path of DOF daily change file, or of new full DOF cycle if full_cycle is True
+    :param output_file: str, output csv file path, must be different from csv_file
+    :param full_cycle: bool, True - in_file is full DOF cycle, changes are found by comparing with csv_file,
+    False - in_file is daily change file, changes are taken from action field (D - dismantled, A, C - upserted)
+    :param quarantine_file: str, CSV file path for invalid records of in_file, None - invalid records are dropped
+    :return: dict: number of added, changed and deleted obstacles
+    """
+    with contextlib.ExitStack() as stack:
+        quarantine_writer = open_quarantine_writer(stack, quarantine_file)
+        if full_cycle:
+            changes = diff_dof_cycle(csv_file, in_file, quarantine_writer)
+        else:
+            changes = read_dof_changes(in_file, quarantine_writer)
+    return apply_dof_changes(csv_file, changes, output_file)
+
+
+def convert_dof_shard(shard):
+    """ Converts byte range of DOF file into csv part file without header. Worker of faa_dof2csv_parallel.
+    Invalid records are written to quarantine part file, line numbers are counted from the beginning of the range.
+    :param shard: tuple (in_file, start, end, part_file, quarantine_part_file), DOF file path, byte range,
+    output part file path and quarantine part file path (None - invalid records are dropped)
+    :return: records_count, lines_count: int, int - numbers of records written and lines read
+    """
+    in_file, start, end, part_file, quarantine_part_file = shard
+    with contextlib.ExitStack() as stack:
+        writer = csv.writer(stack.enter_context(open(part_file, 'w', newline='')), delimiter=',')
+        quarantine_writer = None
+        if quarantine_part_file is not None:
+            quarantine_writer = csv.writer(stack.enter_context(open(quarantine_part_file, 'w', newline='')),
+                                           delimiter=',')
+        header_lines = detect_dof_header_lines(in_file) if start == 0 else 0
+        records_count, _, lines_count = write_dof_blocks(
+            writer, iter_dof_blocks(in_file, start=start, end=end, header_lines=header_lines), quarantine_writer,
+            header_lines + 1)
+    return records_count, header_lines + lines_count
+
+
+def faa_dof2csv_parallel(in_path, output_file, processes=None, quarantine_file=None):
+    """ Converts Digital Obstacle File(s) into csv format using pool of processes.
+    Single file is split into shards at line boundaries, directory is processed file by file (e.g. state files),
+    large files in directory are split too. Shards are merged into output file in order of files and records,
+    so output is the same as from faa_dof2csv run on files one by one.
+    Invalid records are merged into quarantine file with line numbers counted within their DOF file.
+    :param in_path: str, Digital Obstacle File path or path to directory with DOF files (*.dat)
+    :param output_file: str, output CSV file path
+    :param processes: int, number of worker processes, None - number of CPUs
+    :param quarantine_file: str, CSV file path for invalid records, None - invalid records are dropped
+    :return: int, number of records written
+    """
+    processes = processes or os.cpu_count() or 1
+
+    if os.path.isdir(in_path):
+        in_files = sorted(os.path.join(in_path, name) for name in os.listdir(in_path)
+                          if name.lower().endswith('.dat'))
+    else:
+        in_files = [in_path]
+
+    total_size = sum(os.path.getsize(in_file) for in_file in in_files) or 1
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    with tempfile.TemporaryDirectory(dir=output_dir) as parts_dir:
+        shards = []
+        for in_file in in_files:
+            shards_count = max(1, round(processes * os.path.getsize(in_file) / total_size))
+            for start, end in split_dof_file(in_file, shards_count):
+                part_file = os.path.join(parts_dir, 'part_{:05d}.csv'.format(len(shards)))
+                quarantine_part_file = None
+                if quarantine_file is not None:
+                    quarantine_part_file = os.path.join(parts_dir, 'quarantine_{:05d}.csv'.format(len(shards)))
+                shards.append((in_file, start, end, part_file, quarantine_part_file))
+
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(convert_dof_shard, shards, chunksize=1)
+        records_count = sum(shard_records for shard_records, _ in results)
+
+        with open(output_file, 'w', newline='') as csv_file:
+            csv.writer(csv_file, delimiter=',').writerow(DOF_CSV_FIELD_NAMES)
+            for shard in shards:
+                with open(shard[3], newline='') as part:
+                    shutil.copyfileobj(part, csv_file, DOF_BLOCK_SIZE)
+
+        if quarantine_file is not None:
+            with open(quarantine_file, 'w', newline='') as csv_file:
+                quarantine_writer = csv.writer(csv_file, delimiter=',')
+                quarantine_writer.writerow(DOF_QUARANTINE_FIELD_NAMES)
+                lines_before = 0
+                for shard, (_, lines_count) in zip(shards, results):
+                    # Line numbers of shard are shifted by lines of previous shards of the same file
+                    if shard[1] == 0:
+                        lines_before = 0
+                    with open(shard[4], newline='') as part:
+                        quarantine_writer.writerows((int(line_number) + lines_before, error, record)
+                                                    for line_number, error, record in csv.reader(part))
+                    lines_before += lines_count
+
+    return records_count
+
+
+def digits_to_int(digits_bytes, null=DOF_INT_NULL):
+    """ Converts fixed width ASCII digits to integers.
+    :param digits_bytes: numpy.ndarray, uint8 array of shape (records, field width)
+    :param null: int, value used for fields which are not numeric
+    :return: numpy.ndarray: int64 values
+    """
+    digits = digits_bytes.astype(np.int64) - 48
+    values = np.zeros(len(digits), dtype=np.int64)
+    for i in range(digits.shape[1]):
+        values = values * 10 + digits[:, i]
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    values[~valid] = null
+    return values
+
+
+def dof_field_to_column(name, field):
+    """ Converts bytes of one DOF field from many records into typed column.
+    :param name: str, name of DOF field, key of DOF_FIELD_SLICES
+    :param field: numpy.ndarray, uint8 array of shape (records, field width)
+    :return: numpy.ndarray: column values, type according to DOF_COLUMN_DTYPES
+    """
+    start, end = DOF_FIELD_SLICES[name]
+    kind = np.dtype(dict(DOF_COLUMN_DTYPES)[name]).kind
+    if kind == 'S':
+        values = np.ascontiguousarray(field).view('S{}'.format(end - start)).ravel()
+        if name == 'faa_study_number':
+            return np.char.strip(values)
+        return np.char.rstrip(values)
+    elif kind == 'i':
+        return digits_to_int(field)
+    elif kind == 'M':
+        # Julian date YYYYDDD
+        year = digits_to_int(field[:, :4])
+        day = digits_to_int(field[:, 4:])
+        valid = (year != DOF_INT_NULL) & (day > 0) & (day <= 366)
+        jdate = np.full(len(field), np.datetime64('NaT'), dtype='M8[D]')
+        jdate[valid] = ((year[valid] - 1970).astype('M8[Y]').astype('M8[D]') +
+                        (day[valid] - 1).astype('m8[D]'))
+        return jdate
+
+
+def parse_dof_columns(lines, lat_dd=None, lon_dd=None):
+    """ Parses DOF records into typed columns.
+    :param lines: list of str, DOF records
+    :param lat_dd: numpy.ndarray, latitudes of records in DD format if already computed (validate_dof_lines)
+    :param lon_dd: numpy.ndarray, longitudes of records in DD format if already computed (validate_dof_lines)
+    :return: numpy.ndarray: structured array with DOF_COLUMN_DTYPES fields
+    """
+    raw = np.array([line.encode(DOF_ENCODING) for line in lines], dtype='S{}'.format(DOF_RECORD_WIDTH))
+    raw = raw.view(np.uint8).reshape(-1, DOF_RECORD_WIDTH)
+    records = np.empty(len(raw), dtype=DOF_COLUMN_DTYPES)
+
+    for name, (start, end) in DOF_FIELD_SLICES.items():
+        records[name] = dof_field_to_column(name, raw[:, start:end])
+
+    records['lat_dd'] = dms2dd_bulk(records['lat_dms'], 2) if lat_dd is None else lat_dd
+    records['lon_dd'] = dms2dd_bulk(records['lon_dms'], 3) if lon_dd is None else lon_dd
+    return records
+
+
+def iter_dof_record_blocks(in_file, block_size=DOF_BLOCK_SIZE, quarantine_writer=None):
+    """ Reads Digital Obstacle File into structured arrays of typed columns, one array per block.
+    Header is detected, blank lines are skipped and invalid records are written with quarantine writer
+    (or dropped if it is None) in the same way as in faa_dof2csv.
+    :param in_file: str, Digital Obstacle File path
+    :param block_size: int, size of the binary block read from in_file at once in bytes
+    :param quarantine_writer: csv writer of invalid records
+    :return: generator of numpy.ndarray: structured arrays with DOF_COLUMN_DTYPES fields
+    """
+    header_lines = detect_dof_header_lines(in_file)
+    line_number = header_lines + 1
+    for lines in iter_dof_blocks(in_file, block_size, header_lines=header_lines):
+        valid_lines, invalid, lat_dd, lon_dd = validate_dof_block(lines)
+        if invalid and quarantine_writer is not None:
+            quarantine_writer.writerows((line_number + i, error, record) for i, error, record in invalid)
+        line_number += len(lines)
+        if valid_lines:
+            yield parse_dof_columns(valid_lines, lat_dd, lon_dd)
+
+
+def get_columnar_format(output_file):
+    """ Gets columnar output format from output file extension.
+    :param output_file: str, output file path
+    :return: str: columnar format, None if extension is not known
+    """
+    return COLUMNAR_FORMATS.get(os.path.splitext(output_file)[1].lower())
+
+
+def dof_records_to_arrow(records):
+    """ Converts structured array of DOF records into Arrow table, byte strings are stored as strings.
+    :param records: numpy.ndarray, structured array with DOF_COLUMN_DTYPES fields
+    :return: pyarrow.Table
+    """
+    columns = {}
+    for name, dtype in DOF_COLUMN_DTYPES:
+        values = records[name]
+        if values.dtype.kind == 'S':
+            values = np.char.decode(values, DOF_ENCODING)
+        columns[name] = pyarrow.array(values)
+    return pyarrow.table(columns)
+
+
+def read_dof_records(in_file, block_size=DOF_BLOCK_SIZE, quarantine_writer=None):
+    """ Reads valid records of Digital Obstacle File into structured array of typed columns.
+    :param in_file: str, Digital Obstacle File path
+    :param block_size: int, size of the binary block read from in_file at once in bytes
+    :param quarantine_writer: csv writer of invalid records, None - invalid records are dropped
+    :return: numpy.ndarray: structured array with DOF_COLUMN_DTYPES fields
+    """
+    blocks = list(iter_dof_record_blocks(in_file, block_size, quarantine_writer))
+    return np.concatenate(blocks) if blocks else np.empty(0, dtype=DOF_COLUMN_DTYPES)
+
+
+def write_npy_header(npy_file, dtype, count):
+    """ Writes header of .npy file with one dimensional array. Header has the same size for any count,
+    so that it can be written before data and rewritten when number of records is known.
+    :param npy_file: file object, binary output stream
+    :param dtype: numpy.dtype, type of array
+    :param count: int, number of elements of array
+    """
+    np.lib.format.write_array_header_1_0(npy_file, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                    'fortran_order': False,
+                                                    'shape': (count,)})
+
+
+def write_npy_blocks(output_file, blocks):
+    """ Writes structured arrays to .npy file block by block.
+    :param output_file: str, output file path
+    :param blocks: iterable of numpy.ndarray, structured arrays with DOF_COLUMN_DTYPES fields
+    :return: int, number of records written
+    """
+    dtype = np.dtype(DOF_COLUMN_DTYPES)
+    count = 0
+    with open(output_file, 'wb') as npy_file:
+        write_npy_header(npy_file, dtype, 0)
+        for records in blocks:
+            npy_file.write(records.tobytes())
+            count += len(records)
+        npy_file.seek(0)
+        write_npy_header(npy_file, dtype, count)
+    return count
+
+
+def write_npz_blocks(output_file, blocks):
+    """ Writes structured arrays to .npz file with one array per column, as numpy.savez does.
+    Columns are written block by block to temporary files, which are copied into the archive.
+    :param output_file: str, output file path
+    :param blocks: iterable of numpy.ndarray, structured arrays with DOF_COLUMN_DTYPES fields
+    :return: int, number of records written
+    """
+    count = 0
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    with tempfile.TemporaryDirectory(dir=output_dir) as columns_dir:
+        with contextlib.ExitStack() as stack:
+            column_files = {name: stack.enter_context(open(os.path.join(columns_dir, name), 'wb'))
+                            for name, dtype in DOF_COLUMN_DTYPES}
+            for records in blocks:
+                for name, column_file in column_files.items():
+                    column_file.write(np.ascontiguousarray(records[name]).tobytes())
+                count += len(records)
+
+        with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_STORED, allowZip64=True) as npz_file:
+            for name, dtype in DOF_COLUMN_DTYPES:
+                with npz_file.open(name + '.npy', 'w', force_zip64=True) as npy_file:
+                    write_npy_header(npy_file, np.dtype(dtype), count)
+                    with open(os.path.join(columns_dir, name), 'rb') as column_file:
+                        shutil.copyfileobj(column_file, npy_file, DOF_BLOCK_SIZE)
+    return count
+
+
+def write_arrow_blocks(output_file, blocks, output_format):
+    """ Writes structured arrays to Parquet or Arrow IPC (Feather) file block by block, requires pyarrow.
+    :param output_file: str, output file path
+    :param blocks: iterable of numpy.ndarray, structured arrays with DOF_COLUMN_DTYPES fields
+    :param output_format: str, FMT_PARQUET or FMT_ARROW
+    :return: int, number of records written
+    """
+    schema = dof_records_to_arrow(np.empty(0, dtype=DOF_COLUMN_DTYPES)).schema
+    count = 0
+    if output_format == FMT_PARQUET:
+        writer = pyarrow.parquet.ParquetWriter(output_file, schema)
+    else:
+        writer = pyarrow.ipc.new_file(output_file, schema)
+    with writer:
+        for records in blocks:
+            writer.write_table(dof_records_to_arrow(records))
+            count += len(records)
+    return count
+
+
+def faa_dof2columnar(in_file, output_file, output_format=None, block_size=DOF_BLOCK_SIZE, quarantine_file=None):
+    """ Converts Digital Obstacle File dat format into typed columnar format.
+    Parquet and Arrow IPC (Feather) require pyarrow, NumPy formats are always available:
+    .npy stores structured array which can be loaded with numpy.load(output_file, mmap_mode='r'),
+    .npz stores one array per column.
+    File is streamed in large blocks and records are written block by block. Records are validated as in
+    faa_dof2csv, invalid records are not written to output file, but to quarantine file with their line numbers.
+    :param in_file: str, Digital Obstacle File path
+    :param output_file: str, output file path
+    :param output_format: str, one of FMT_PARQUET, FMT_ARROW, FMT_NPY, FMT_NPZ, None - based on output file extension
+    :param block_size: int, size of the binary block read from in_file at once in bytes
+    :param quarantine_file: str, CSV file path for invalid records, None - invalid records are dropped
+    :return: int, number of records written
+    """
+    output_format = output_format or get_columnar_format(output_file)
+    if output_format not in COLUMNAR_FORMATS.values():
+        raise ValueError('Unknown columnar format of output file: {}'.format(output_file))
+    if output_format in (FMT_PARQUET, FMT_ARROW) and pyarrow is None:
+        raise ImportError('pyarrow is required for {} output, use .npy or .npz instead.'.format(output_format))
+
+    with contextlib.ExitStack() as stack:
+        quarantine_writer = open_quarantine_writer(stack, quarantine_file)
+        blocks = iter_dof_record_blocks(in_file, block_size, quarantine_writer)
+        if output_format == FMT_NPY:
+            return write_npy_blocks(output_file, blocks)
+        elif output_format == FMT_NPZ:
+            return write_npz_blocks(output_file, blocks)
+        return write_arrow_blocks(output_file, blocks, output_format)
+
+
+class DofRecord:
+    """ Lazy view of single record of memory-mapped DOF file, fields are sliced and decoded on access. """
+
+    __slots__ = ('dof_file', 'index')
+
+    def __init__(self, dof_file, index):
+        self.dof_file = dof_file
+        self.index = index
+
+    def __getitem__(self, name):
+        """ Gets value of DOF field as in csv output (see parse_dof_lines).
+        :param name: str, field name, one of DOF_CSV_FIELD_NAMES
+        :return: str or float: field value, float for lat_dd, lon_dd (NaN if record has invalid coordinates,
+        as in DofFile.column)
+        """
+        if name == 'lat_dd':
+            return dms2dd_bulk([self['lat_dms']], 2)[0].item()
+        elif name == 'lon_dd':
+            return dms2dd_bulk([self['lon_dms']], 3)[0].item()
+        start, end = DOF_FIELD_SLICES[name]
+        value = self.line()[start:end]
+        if name in ('city_name', 'obs_type'):
+            return value.rstrip()
+        elif name == 'faa_study_number':
+            return value.strip()
+        return value
+
+    def line(self):
+        """ Gets DOF record as it is in file.
+        :return: str: DOF record without line terminator
+        """
+        return self.dof_file.record_bytes(self.index).decode(DOF_ENCODING)
+
+    def as_dict(self):
+        """ Gets all fields of the record.
+        :return: dict: field values with DOF_CSV_FIELD_NAMES keys
+        """
+        return {name: self[name] for name in DOF_CSV_FIELD_NAMES}
+
+    def __repr__(self):
+        return 'DofRecord({!r})'.format(self.line())
+
+
+class DofFile:
+    """ Memory-mapped Digital Obstacle File with random access to records and columns.
+    Offsets of records are computed once on opening, records and columns are sliced from the mapped file on demand.
+    Usage:
+        with DofFile('DOF.DAT') as dof:
+            record = dof.find('000307', oas_code='01')[0]
+            ams_height = dof.column('ams_height')
+    """
+
+    def __init__(self, in_file):
+        """
+        :param in_file: str, Digital Obstacle File path
+        """
+        self.in_file = in_file
+        self._file = open(in_file, 'rb')
+        if os.path.getsize(in_file):
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = np.frombuffer(self._mmap, dtype=np.uint8)
+        else:
+            self._mmap = None
+            self._buffer = np.empty(0, dtype=np.uint8)
+        self.starts, self.ends = self._find_records()
+        self._columns = {}
+
+    def _find_records(self):
+        """ Finds offsets of records - lines after header.
+        :return: numpy.ndarray, numpy.ndarray: start and end (excluding line terminator) offsets of records
+        """
+        eols = np.flatnonzero(self._buffer == ord('\n'))
+        starts = np.concatenate(([0], eols + 1))
+        ends = np.concatenate((eols, [len(self._buffer)]))
+        # Record after the last line terminator exists only if file doesn't end with line terminator
+        if ends[-1] == starts[-1]:
+            starts, ends = starts[:-1], ends[:-1]
+        header_lines = detect_dof_header_lines(self.in_file)
+        starts, ends = starts[header_lines:], ends[header_lines:]
+        # Exclude carriage return of CRLF terminated lines
+        has_cr = ends > starts
+        has_cr[has_cr] = self._buffer[ends[has_cr] - 1] == ord('\r')
+        ends = ends - has_cr
+        # Skip blank lines as faa_dof2csv does, records start with OAS code, so only empty lines and lines
+        # starting with whitespace are checked one by one
+        blank = ends == starts
+        candidates = np.flatnonzero(~blank)
+        candidates = candidates[np.isin(self._buffer[starts[candidates]], list(b' \t\x0b\x0c'))]
+        for i in candidates.tolist():
+            blank[i] = not bytes(self._buffer[starts[i]:ends[i]]).strip()
+        if blank.any():
+            starts, ends = starts[~blank], ends[~blank]
+        return starts, ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('DOF record index out of range')
+        return DofRecord(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield DofRecord(self, index)
+
+    def record_bytes(self, index):
+        """ Gets bytes of record.
+        :param index: int, index of record
+        :return: bytes: DOF record without line terminator
+        """
+        return self._mmap[self.starts[index]:self.ends[index]]
+
+    def field_bytes(self, name):
+        """ Gets bytes of field from all records, bytes beyond end of short records are zero.
+        :param name: str, field name, key of DOF_FIELD_SLICES
+        :return: numpy.ndarray: uint8 array of shape (records, field width)
+        """
+        start, end = DOF_FIELD_SLICES[name]
+        offsets = self.starts[:, np.newaxis] + np.arange(start, end)
+        within_record = offsets < self.ends[:, np.newaxis]
+        return np.where(within_record, self._buffer[np.minimum(offsets, len(self._buffer) - 1)], 0).astype(np.uint8)
+
+    def column(self, name):
+        """ Gets typed values of field from all records, values are cached.
+        :param name: str, field name, one of DOF_CSV_FIELD_NAMES
+        :return: numpy.ndarray: column values, type according to DOF_COLUMN_DTYPES
+        """
+        if name not in self._columns:
+            if name == 'lat_dd':
+                values = dms2dd_bulk(self.column('lat_dms'), 2)
+            elif name == 'lon_dd':
+                values = dms2dd_bulk(self.column('lon_dms'), 3)
+            elif len(self):
+                values = dof_field_to_column(name, self.field_bytes(name))
+            else:
+                values = np.empty(0, dtype=dict(DOF_COLUMN_DTYPES)[name])
+            self._columns[name] = values
+        return self._columns[name]
+
+    def find(self, obs_number, oas_code=None):
+        """ Finds records by obstacle number.
+        :param obs_number: str or int, obstacle number, e.g. '000307' or 307
+        :param oas_code: str, OAS code (state code), None - records with obs_number from all states
+        :return: list of DofRecord: matching records in file order
+        """
+        mask = self.column('obs_number') == int(obs_number)
+        if oas_code is not None:
+            mask &= self.column('oas_code') == oas_code.encode(DOF_ENCODING)
+        return [DofRecord(self, index) for index in np.flatnonzero(mask)]
+
+    def close(self):
+        self._columns = {}
+        self._buffer = None
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
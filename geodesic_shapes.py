@@ -0,0 +1,166 @@
+""" Densified geodesic shapes (circles, arcs, sector outlines) around origin given in DMSH format.
+
+    Vertices are computed with Vincenty direct solution in chunks (GeodesicOrigin.fan) and yielded lazily,
+    so that large airspace geometries are never materialized at once.
+    Density is given either as maximum distance between vertices or as maximum chord error
+    (distance between chord and the arc it replaces).
+"""
+import math
+
+import numpy as np
+
+try:
+    from .azm_dist_to_lonlat import (ACCURACY_FULL, ELLIPSOID_WGS84, WGS84_A, WGS84_B, GeodesicOrigin, lat_dms_to_dd,
+                                     lon_dms_to_dd)
+except ImportError:
+    from azm_dist_to_lonlat import (ACCURACY_FULL, ELLIPSOID_WGS84, WGS84_A, WGS84_B, GeodesicOrigin, lat_dms_to_dd,
+                                    lon_dms_to_dd)
+
+# Number of vertices computed at once
+CHUNK_VERTICES = 4096
+
+# Default maximum distance between vertices in meters
+DEFAULT_SPACING = 100
+
+# Default mean radius of the Earth used to estimate size of circles, m (arcs use mean radius of ellipsoid of origin)
+MEAN_RADIUS = (2 * WGS84_A + WGS84_B) / 3
+
+
+def get_origin(lon_dmsh, lat_dmsh, accuracy=ACCURACY_FULL, ellipsoid=ELLIPSOID_WGS84):
+    """ Creates origin of shapes from coordinates in DMSH format.
+    :param lon_dmsh: str, longitude in DMSH format, e.g. 085 15 06.00 W
+    :param lat_dmsh: str, latitude in DMSH format, e.g. 31 34 35.00 N
+    :param accuracy: str, accuracy mode of direct solution
+    :param ellipsoid: Ellipsoid or str, ellipsoid or name of ellipsoid of coordinates
+    :return: GeodesicOrigin
+    """
+    lon = lon_dms_to_dd(lon_dmsh)
+    lat = lat_dms_to_dd(lat_dmsh)
+    if lon is None or lat is None:
+        raise ValueError('Origin coordinates should be in format DMSH: {}, {}'.format(lon_dmsh, lat_dmsh))
+    return GeodesicOrigin(lon, lat, ellipsoid, accuracy=accuracy)
+
+
+def get_azimuth_step(radius, spacing=None, max_chord_error=None, mean_radius=MEAN_RADIUS):
+    """ Computes azimuth step between vertices of arc.
+    :param radius: float, radius of arc in meters
+    :param spacing: float, maximum distance between vertices in meters
+    :param max_chord_error: float, maximum distance between chord and arc in meters
+    :param mean_radius: float, mean radius of ellipsoid of arc in meters
+    :return: float: azimuth step in decimal degrees
+    """
+    if not radius > 0:
+        raise ValueError('Radius should be a positive number: {}'.format(radius))
+    # Radius of the circle in the plane of its vertices
+    plane_radius = mean_radius * math.sin(min(radius / mean_radius, math.pi / 2))
+    if max_chord_error is not None:
+        if max_chord_error >= plane_radius:
+            return 90.0
+        return min(90.0, math.degrees(2 * math.acos(1 - max_chord_error / plane_radius)))
+    spacing = DEFAULT_SPACING if spacing is None else spacing
+    return min(90.0, math.degrees(spacing / plane_radius))
+
+
+def iter_fan_vertices(origin, azimuths, distances):
+    """ Yields end points for pairs of azimuths and distances, computed in chunks.
+    Chunks with constant distance or constant azimuth are computed as fan of the origin, other chunks
+    pair by pair.
+    :param origin: GeodesicOrigin
+    :param azimuths: numpy.ndarray, azimuths from origin in decimal degrees format
+    :param distances: numpy.ndarray, distances from origin in meters, same shape as azimuths
+    :return: generator of tuples (lon, lat) in decimal degrees format
+    """
+    for start in range(0, len(azimuths), CHUNK_VERTICES):
+        azimuths_chunk = azimuths[start:start + CHUNK_VERTICES]
+        distances_chunk = distances[start:start + CHUNK_VERTICES]
+        if np.all(distances_chunk == distances_chunk[0]):
+            lon, lat = origin.fan(azimuths_chunk, distances_chunk[:1])
+            lon, lat = lon[:, 0], lat[:, 0]
+        elif np.all(azimuths_chunk == azimuths_chunk[0]):
+            lon, lat = origin.fan(azimuths_chunk[:1], distances_chunk)
+            lon, lat = lon[0], lat[0]
+        else:
+            lon, lat = origin.direct_batch(azimuths_chunk, distances_chunk)
+        yield from zip(lon.tolist(), lat.tolist())
+
+
+def iter_arc(origin, radius, start_azimuth, end_azimuth, spacing=None, max_chord_error=None, clockwise=True):
+    """ Yields vertices of arc around origin from start to end azimuth, including both ends.
+    :param origin: GeodesicOrigin
+    :param radius: float, radius of arc in meters
+    :param start_azimuth: float, azimuth of the first vertex in decimal degrees format
+    :param end_azimuth: float, azimuth of the last vertex in decimal degrees format
+    :param spacing: float, maximum distance between vertices in meters
+    :param max_chord_error: float, maximum distance between chord and arc in meters
+    :param clockwise: bool, direction of arc
+    :return: generator of tuples (lon, lat) in decimal degrees format
+    """
+    direction = 1 if clockwise else -1
+    sweep = (direction * (end_azimuth - start_azimuth)) % 360 or 360
+    step = get_azimuth_step(radius, spacing, max_chord_error, origin.ellipsoid.mean_radius)
+    segments = max(1, int(math.ceil(sweep / step)))
+    for start in range(0, segments + 1, CHUNK_VERTICES):
+        indices = np.arange(start, min(start + CHUNK_VERTICES, segments + 1))
+        azimuths = (start_azimuth + direction * indices * (sweep / segments)) % 360
+        yield from iter_fan_vertices(origin, azimuths, np.full(len(azimuths), float(radius)))
+
+
+def iter_circle(origin, radius, spacing=None, max_chord_error=None):
+    """ Yields vertices of closed circle around origin, clockwise from azimuth 0, the last vertex equals the first one.
+    :param origin: GeodesicOrigin
+    :param radius: float, radius of circle in meters
+    :param spacing: float, maximum distance between vertices in meters
+    :param max_chord_error: float, maximum distance between chord and arc in meters
+    :return: generator of tuples (lon, lat) in decimal degrees format
+    """
+    return iter_arc(origin, radius, 0, 0, spacing, max_chord_error)
+
+
+def iter_radial(origin, azimuth, start_distance, end_distance, spacing=None):
+    """ Yields vertices of geodesic line from origin along azimuth between two distances, including both ends.
+    :param origin: GeodesicOrigin
+    :param azimuth: float, azimuth from origin in decimal degrees format
+    :param start_distance: float, distance of the first vertex from origin in meters
+    :param end_distance: float, distance of the last vertex from origin in meters
+    :param spacing: float, maximum distance between vertices in meters
+    :return: generator of tuples (lon, lat) in decimal degrees format
+    """
+    spacing = DEFAULT_SPACING if spacing is None else spacing
+    segments = max(1, int(math.ceil(math.fabs(end_distance - start_distance) / spacing)))
+    for start in range(0, segments + 1, CHUNK_VERTICES):
+        indices = np.arange(start, min(start + CHUNK_VERTICES, segments + 1))
+        distances = start_distance + indices * ((end_distance - start_distance) / segments)
+        azimuths = np.full(len(distances), float(azimuth))
+        for distance, vertex in zip(distances.tolist(), iter_fan_vertices(origin, azimuths, distances)):
+            # Vertex at distance 0 is the origin itself
+            yield (origin.lon, origin.lat) if distance == 0 else vertex
+
+
+def iter_sector(origin, inner_radius, outer_radius, start_azimuth, end_azimuth, spacing=None, max_chord_error=None):
+    """ Yields vertices of closed outline of sector (or annular sector if inner_radius > 0): outer arc clockwise
+    from start to end azimuth, radial along end azimuth, inner arc counterclockwise back to start azimuth
+    (origin if inner_radius is 0) and radial along start azimuth. The last vertex equals the first one.
+    :param origin: GeodesicOrigin
+    :param inner_radius: float, inner radius in meters, 0 - sector with vertex at origin
+    :param outer_radius: float, outer radius in meters
+    :param start_azimuth: float, azimuth of the first side of sector in decimal degrees format
+    :param end_azimuth: float, azimuth of the second side of sector in decimal degrees format
+    :param spacing: float, maximum distance between vertices in meters
+    :param max_chord_error: float, maximum distance between chord and arc in meters
+    :return: generator of tuples (lon, lat) in decimal degrees format
+    """
+    parts = [iter_arc(origin, outer_radius, start_azimuth, end_azimuth, spacing, max_chord_error),
+             iter_radial(origin, end_azimuth, outer_radius, inner_radius, spacing)]
+    if inner_radius > 0:
+        parts.append(iter_arc(origin, inner_radius, end_azimuth, start_azimuth, spacing, max_chord_error,
+                              clockwise=False))
+    parts.append(iter_radial(origin, start_azimuth, inner_radius, outer_radius, spacing))
+
+    previous = None
+    for part in parts:
+        for i, vertex in enumerate(part):
+            # The first vertex of each part is the last vertex of the previous one
+            if i == 0 and previous is not None:
+                continue
+            previous = vertex
+            yield vertex
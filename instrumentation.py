@@ -0,0 +1,114 @@
+""" Opt-in instrumentation of DOF conversion and geodesic solutions.
+
+    Instrumented functions look up the active collector once per call and skip all measurements
+    if it is None, so instrumentation costs nothing noticeable when disabled.
+    Usage:
+        with instrument(profile=True, trace_memory=True) as collector:
+            faa_dof2csv('DOF.DAT', 'DOF.csv')
+        print(collector.report())
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Collector of the running instrument() block, None if instrumentation is disabled
+ACTIVE = None
+
+# Number of functions listed in profile report
+PROFILE_LINES = 25
+
+# Number of allocation sites listed in memory report
+MEMORY_LINES = 10
+
+
+class Collector:
+    """ Collects timings (seconds), counters and histograms, names are prefixed with name of instrumented function,
+    e.g. faa_dof2csv.parse, vincenty_direct.iterations.
+    """
+
+    def __init__(self):
+        self.timings = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.histograms = defaultdict(lambda: defaultdict(int))
+        self.profile = None
+        self.memory = None
+
+    def add_time(self, name, seconds):
+        self.timings[name] += seconds
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def add_histogram(self, name, value, count=1):
+        self.histograms[name][value] += count
+
+    def get_rates(self):
+        """ Gets throughput of functions which count records and measure total time.
+        :return: dict: name -> records per second
+        """
+        rates = {}
+        for name, records in self.counters.items():
+            if name.endswith('.records'):
+                prefix = name[:-len('.records')]
+                seconds = self.timings.get(prefix + '.total')
+                if seconds:
+                    rates[prefix + '.records_per_second'] = records / seconds
+        return rates
+
+    def report(self):
+        """ Gets structured report of collected data.
+        :return: dict: timings, counters, rates, histograms (value -> count) and optional profile (text)
+        and memory (dict)
+        """
+        report = {'timings': dict(self.timings),
+                  'counters': dict(self.counters),
+                  'rates': self.get_rates(),
+                  'histograms': {name: dict(sorted(histogram.items())) for name, histogram in self.histograms.items()}}
+        if self.profile is not None:
+            report['profile'] = self.profile
+        if self.memory is not None:
+            report['memory'] = self.memory
+        return report
+
+
+@contextmanager
+def instrument(profile=False, trace_memory=False):
+    """ Enables instrumentation within with block.
+    :param profile: bool, capture cProfile statistics of the block
+    :param trace_memory: bool, capture peak memory and top allocation sites of the block with tracemalloc
+    :return: Collector
+    """
+    global ACTIVE
+    # Imported here, so that modules which only check ACTIVE start fast
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    collector = Collector()
+    previous = ACTIVE
+    ACTIVE = collector
+
+    profiler = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield collector
+    finally:
+        collector.add_time('instrument.total', time.perf_counter() - start)
+        if profiler is not None:
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            collector.profile = stream.getvalue()
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            collector.memory = {'current': current,
+                                'peak': peak,
+                                'top': [str(stat) for stat in snapshot.statistics('lineno')[:MEMORY_LINES]]}
+        ACTIVE = previous
@@ -0,0 +1,59 @@
+""" Deferred imports of modules and compilation of regular expressions for fast start of command line tools.
+
+    Proxy imports module or compiles pattern on the first access of attribute and keeps accessed attributes,
+    so that later accesses cost the same as attribute lookup of module or pattern itself.
+    Usage:
+        np = LazyModule('numpy')
+        LON_PATTERN = LazyPattern(r'(?P<deg>\\d{3})', re.VERBOSE)
+"""
+import importlib
+import re
+
+
+class LazyModule:
+    """ Module imported on the first access of its attribute. """
+
+    def __init__(self, name):
+        """
+        :param name: str, name of module
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        value = getattr(self._module, attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self):
+        return '<lazy module {}{}>'.format(self._name, '' if self._module is None else ' (imported)')
+
+
+class LazyPattern:
+    """ Regular expression compiled on the first access of its attribute (match, search, ...). """
+
+    def __init__(self, pattern, flags=0):
+        """
+        :param pattern: str, regular expression
+        :param flags: int, flags of re.compile
+        """
+        self.pattern = pattern
+        self.flags = flags
+        self._compiled = None
+
+    @property
+    def compiled(self):
+        """ :return: re.Pattern: compiled regular expression """
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern, self.flags)
+        return self._compiled
+
+    def __getattr__(self, attr):
+        value = getattr(self.compiled, attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self):
+        return '<lazy pattern {!r}>'.format(self.pattern)
@@ -0,0 +1,159 @@
+""" Obstacle clearance screening of routes: finds controlling obstacle (obstacle with the highest ams_height)
+    of DOF obstacles within corridor of given half width around every route segment.
+
+    Routes are rows of CSV or TSV file, every row is a sequence of fixes, fix is ARINC424 shorthand code
+    (one field, e.g. 5060N) or longitude and latitude in DMSH format (two fields). Segments are geodesics
+    between consecutive fixes, corridors have half circles around fixes.
+    Candidates of segments are found with ObstacleIndex, all segments are screened with vectorized
+    cross track distances, see ObstacleIndex.screen_corridors.
+"""
+import csv
+import itertools
+import sys
+
+import numpy as np
+
+try:
+    from .arinc424_shorthand_conversion import Arinc424CoordinatesConversion
+    from .azm_dist_to_lonlat import UOM_M, UOM_TO_METERS, get_uom_factor, lat_dms_to_dd, lon_dms_to_dd
+    from .dof_obstacle_index import ObstacleIndex
+    from .faa_dof_dat_to_csv import DOF_ENCODING
+except ImportError:
+    from arinc424_shorthand_conversion import Arinc424CoordinatesConversion
+    from azm_dist_to_lonlat import UOM_M, UOM_TO_METERS, get_uom_factor, lat_dms_to_dd, lon_dms_to_dd
+    from dof_obstacle_index import ObstacleIndex
+    from faa_dof_dat_to_csv import DOF_ENCODING
+
+# Columns of screening output, distances are in unit of measure of half width
+SCREENING_FIELD_NAMES = ['row', 'segment', 'from_fix', 'to_fix', 'obstacles', 'obs_number', 'obs_type',
+                         'ams_height', 'agl_height', 'lon_dd', 'lat_dd', 'distance', 'cross_track', 'along_track',
+                         'error']
+
+FIX_ERROR = 'Fix should be ARINC424 code or longitude and latitude in DMSH format: {}'
+ROUTE_ERROR = 'Route should have at least 2 fixes.'
+
+
+def dmh_to_dd(dmh):
+    """ Converts full degrees longitude or latitude in DMH format to decimal degrees format, e.g. 16000W -> -160.0
+    :param dmh: str, longitude or latitude in DMH format
+    :return: float: longitude or latitude in decimal degrees format
+    """
+    dd = float(dmh[:-3])
+    return -dd if dmh[-1] in 'WS' else dd
+
+
+def parse_fixes(row):
+    """ Parses fixes of route.
+    :param row: list of str, fields of route row - ARINC424 codes or pairs of longitude and latitude in DMSH format
+    :return: list of tuples (str, float, float): name of fix (code or longitude and latitude), longitude,
+    latitude in decimal degrees format
+    """
+    fields = [field.strip() for field in row if field.strip()]
+    fixes = []
+    i = 0
+    while i < len(fields):
+        if Arinc424CoordinatesConversion.ARINC424_REGEX.fullmatch(fields[i]):
+            value, error = Arinc424CoordinatesConversion.arinc424_to_coordinates_bulk([fields[i]])[0]
+            if error:
+                raise ValueError('{}: {}'.format(fields[i], error))
+            lon, lat = value.split()
+            fixes.append((fields[i], dmh_to_dd(lon), dmh_to_dd(lat)))
+            i += 1
+        else:
+            lon = lon_dms_to_dd(fields[i])
+            lat = lat_dms_to_dd(fields[i + 1]) if i + 1 < len(fields) else None
+            if lon is None or lat is None:
+                raise ValueError(FIX_ERROR.format(' '.join(fields[i:i + 2])))
+            fixes.append(('{} {}'.format(fields[i], fields[i + 1]), lon, lat))
+            i += 2
+    if len(fixes) < 2:
+        raise ValueError(ROUTE_ERROR)
+    return fixes
+
+
+def screen_routes(index, in_file, out_file, half_width, uom=UOM_M):
+    """ Screens segments of routes read from CSV or TSV in_file and writes controlling obstacles to out_file.
+    Delimiter of output is the same as delimiter of input (tab if the first line contains tab, comma otherwise).
+    :param index: ObstacleIndex
+    :param in_file: file object, input text stream, route in every row
+    :param out_file: file object, output text stream, segment in every row
+    :param half_width: float, half width of corridors
+    :param uom: str, unit of measure of half width and output distances
+    :return: int, int: number of screened segments, number of rows with errors
+    """
+    first_line = in_file.readline()
+    delimiter = '\t' if '\t' in first_line else ','
+    reader = csv.reader(itertools.chain([first_line], in_file), delimiter=delimiter)
+    writer = csv.writer(out_file, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(SCREENING_FIELD_NAMES)
+    factor = get_uom_factor(uom)
+
+    routes = []
+    segments = []
+    for row_number, row in enumerate(reader, 1):
+        if not any(field.strip() for field in row):
+            continue
+        try:
+            fixes = parse_fixes(row)
+        except ValueError as e:
+            routes.append((row_number, None, str(e)))
+        else:
+            routes.append((row_number, fixes, ''))
+            segments.extend(zip(fixes[:-1], fixes[1:]))
+
+    if segments:
+        lon_initial, lat_initial, lon_end, lat_end = np.array([(fix_from[1], fix_from[2], fix_to[1], fix_to[2])
+                                                               for fix_from, fix_to in segments]).T
+        screening = index.screen_corridors(lon_initial, lat_initial, lon_end, lat_end, half_width * factor)
+        obstacles = screening.obstacles.tolist()
+        names = screening.obstacles.dtype.names
+        counts = screening.counts.tolist()
+        distances = [(screening.distance / factor).tolist(), (screening.cross_track / factor).tolist(),
+                     (screening.along_track / factor).tolist()]
+
+    errors = 0
+    segment = 0
+    for row_number, fixes, error in routes:
+        if fixes is None:
+            writer.writerow([row_number, '', '', '', '', '', '', '', '', '', '', '', '', '', error])
+            errors += 1
+            continue
+        for i in range(1, len(fixes)):
+            row = [row_number, i, fixes[i - 1][0], fixes[i][0], counts[segment]]
+            if counts[segment]:
+                obstacle = dict(zip(names, obstacles[segment]))
+                row += [obstacle['obs_number'], obstacle['obs_type'].decode(DOF_ENCODING).strip(),
+                        obstacle['ams_height'], obstacle['agl_height'], obstacle['lon_dd'], obstacle['lat_dd']]
+                row += [values[segment] for values in distances]
+            else:
+                row += [''] * 9
+            writer.writerow(row + [''])
+            segment += 1
+    return len(segments), errors
+
+
+def main(args):
+    if len(args) in (3, 4) and (len(args) == 3 or args[3].upper() in UOM_TO_METERS):
+        obstacles_file, routes_file, half_width = args[:3]
+        uom = args[3].upper() if len(args) == 4 else UOM_M
+        if obstacles_file.endswith('.npz'):
+            index = ObstacleIndex.load(obstacles_file)
+        else:
+            index = ObstacleIndex.from_dof_file(obstacles_file)
+        if routes_file == '-':
+            screened, errors = screen_routes(index, sys.stdin, sys.stdout, float(half_width), uom)
+        else:
+            with open(routes_file, newline='') as in_file:
+                screened, errors = screen_routes(index, in_file, sys.stdout, float(half_width), uom)
+        print('{} segments screened, {} rows with errors.'.format(screened, errors), file=sys.stderr)
+    else:
+        print('Usage if you want to screen routes of CSV/TSV file (fixes - ARINC424 codes or longitude and latitude\n'
+              'in DMSH format), obstacles_file is DOF or index created with dof_obstacle_index.py (.npz),\n'
+              'use - as routes_file to read standard input, uom is unit of half width and output distances\n'
+              '({}, default {}):\n'
+              'route_obstacle_screening.py <obstacles_file> <routes_file> <half_width> [uom]'.format(
+                  ', '.join(UOM_TO_METERS), UOM_M), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,3 +1,7 @@
+import contextlib
+import io
+import os
+import tempfile
 import unittest
 from .arinc424_shorthand_conversion import *
 
@@ -39,4 +43,87 @@ class DistToLonLatTests(unittest.TestCase):
         self.assertEqual('50W60', Arinc424CoordinatesConversion.coord_to_arinc424(lat='5000S', lon='16000W'))
         self.assertEqual('5060W', Arinc424CoordinatesConversion.coord_to_arinc424(lat='5000S', lon='06000W'))
         self.assertEqual('5060S', Arinc424CoordinatesConversion.coord_to_arinc424(lat='5000S', lon='06000E'))
-        self.assertEqual('50S60', Arinc424CoordinatesConversion.coord_to_arinc424(lat='5000S', lon='16000E'))
\ No newline at end of file
+        self.assertEqual('50S60', Arinc424CoordinatesConversion.coord_to_arinc424(lat='5000S', lon='16000E'))
+
+    def test_arinc424_to_coordinates_bulk(self):
+        codes = ['5060N', '50N60', '0000E', '90S80', '5090N', '95N10', '50X60', '5060', 'test', '5060N', '']
+        results = Arinc424CoordinatesConversion.arinc424_to_coordinates_bulk(codes)
+        self.assertEqual(len(codes), len(results))
+        for code, result in zip(codes, results):
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(Arinc424CoordinatesConversion.arinc424_to_coordinates(code), result.value)
+            self.assertEqual(result.value is None, bool(result.error))
+        self.assertEqual('Longitude part can\'t be grater the 80.', results[4].error)
+
+    def test_coord_to_arinc424_bulk(self):
+        results = Arinc424CoordinatesConversion.coord_to_arinc424_bulk([('16000W', '5000N'), ('06000E', '5000S'),
+                                                                        ('18100E', '5000N')])
+        self.assertEqual([('50N60', ''), ('5060S', ''),
+                          (None, Arinc424CoordinatesConversion.DMH_COORDINATES_ERROR)], results)
+
+    def test_convert_stream(self):
+        out_file = io.StringIO()
+        self.assertEqual((2, 2), convert_stream(io.StringIO('5060N\n\n16000W,5000N\n5090N\na b c\n'), out_file,
+                                                chunk_rows=2))
+        self.assertEqual(['5060N\t06000W 5000N\t',
+                          '16000W 5000N\t50N60\t',
+                          '5090N\t\tLongitude part can\'t be grater the 80.',
+                          'a b c\t\tRow should have 1 field (ARINC424 code) or 2 fields (longitude, latitude).'],
+                         out_file.getvalue().splitlines())
+
+    def test_convert_values(self):
+        out_file = io.StringIO()
+        self.assertEqual((2, 1), convert_values(['5060N', '16000W,5000N', '', '5090N'], out_file))
+        self.assertEqual(['5060N\t06000W 5000N\t',
+                          '16000W 5000N\t50N60\t',
+                          '5090N\t\tLongitude part can\'t be grater the 80.'],
+                         out_file.getvalue().splitlines())
+
+    def test_lookup_tables(self):
+        arinc424_to_coordinates_table, coord_to_arinc424_table = Arinc424CoordinatesConversion.get_lookup_tables()
+        self.assertEqual(91 * 181 * 4, len(coord_to_arinc424_table))
+        self.assertEqual(91 * 162 * 4, len(arinc424_to_coordinates_table))
+        for (lon, lat), arinc424 in coord_to_arinc424_table.items():
+            self.assertTrue(Arinc424CoordinatesConversion.is_longitude_dmh(lon))
+            self.assertTrue(Arinc424CoordinatesConversion.is_latitude_dmh(lat))
+            self.assertEqual(Arinc424CoordinatesConversion.coord_to_arinc424(lon, lat), arinc424)
+            with contextlib.redirect_stdout(io.StringIO()):
+                coordinates = Arinc424CoordinatesConversion.arinc424_to_coordinates(arinc424)
+            self.assertEqual(coordinates, arinc424_to_coordinates_table.get(arinc424))
+            if coordinates is not None:
+                self.assertEqual('{} {}'.format(lon, lat), coordinates)
+
+        self.assertEqual('16000W 5000N', Arinc424CoordinatesConversion.lookup_arinc424_to_coordinates('50N60'))
+        self.assertEqual('06000W 5000N', Arinc424CoordinatesConversion.lookup_arinc424_to_coordinates('5060N12'))
+        self.assertIsNone(Arinc424CoordinatesConversion.lookup_arinc424_to_coordinates('5090N'))
+        self.assertEqual('5060S', Arinc424CoordinatesConversion.lookup_coord_to_arinc424('06000E', '5000S'))
+
+    def test_lookup_tables_file(self):
+        tables = Arinc424CoordinatesConversion.get_lookup_tables()
+        table_file_used = Arinc424CoordinatesConversion.lookup_table_file
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            table_file = os.path.join(tmp_dir, 'arinc424.json')
+            other_table_file = os.path.join(tmp_dir, 'other.json')
+            try:
+                Arinc424CoordinatesConversion.arinc424_to_coordinates_table = None
+                self.assertEqual(tables, Arinc424CoordinatesConversion.get_lookup_tables(table_file))
+                self.assertTrue(os.path.exists(table_file))
+                Arinc424CoordinatesConversion.arinc424_to_coordinates_table = None
+                self.assertEqual(tables, Arinc424CoordinatesConversion.get_lookup_tables(table_file))
+
+                # Different file after tables are built: new file is saved, existing file is loaded
+                self.assertEqual(tables, Arinc424CoordinatesConversion.get_lookup_tables(other_table_file))
+                self.assertTrue(os.path.exists(other_table_file))
+                Arinc424CoordinatesConversion.save_lookup_tables(table_file, {'50N60': '16000W 5000N test'},
+                                                                 {('16000W', '5000N'): 'test'})
+                Arinc424CoordinatesConversion.get_lookup_tables(table_file)
+                self.assertEqual(table_file, Arinc424CoordinatesConversion.lookup_table_file)
+
+                # Scalar methods use tables in memory
+                self.assertEqual('16000W 5000N test', Arinc424CoordinatesConversion.arinc424_to_coordinates('50N60'))
+                self.assertEqual('test', Arinc424CoordinatesConversion.coord_to_arinc424('16000W', '5000N'))
+                self.assertEqual('5060S', Arinc424CoordinatesConversion.coord_to_arinc424('06000E', '5000S'))
+            finally:
+                Arinc424CoordinatesConversion.arinc424_to_coordinates_table, \
+                    Arinc424CoordinatesConversion.coord_to_arinc424_table = tables
+                Arinc424CoordinatesConversion.lookup_table_file = table_file_used
@@ -1,4 +1,11 @@
+import contextlib
+import io
+import math
 import unittest
+
+import numpy as np
+
+from . import azm_dist_to_lonlat
 from .azm_dist_to_lonlat import *
 
 
@@ -81,3 +88,387 @@ class DistToLonLatTests(unittest.TestCase):
                          vincenty_direct_solution(30, 30, 0, 1000.0, WGS84_A, WGS84_B, WGS84_F))
         self.assertEqual((-100.07770065280457, -63.64343250842656),
                          vincenty_direct_solution(-100.5, -63.5, 127.5, 26377.435, WGS84_A, WGS84_B, WGS84_F))
+
+    def test_vincenty_direct_solution_batch(self):
+        lons = [30, -100.5, 0, 179.5, 15]
+        lats = [30, -63.5, 0, 89.9, -45]
+        azms = [0, 127.5, 90, 270, 359.9]
+        dists = [1000.0, 26377.435, 5000000, 123456.7, 10]
+        lon_end, lat_end = vincenty_direct_solution_batch(lons, lats, azms, dists, WGS84_A, WGS84_B, WGS84_F)
+        for i in range(len(lons)):
+            lon_exp, lat_exp = vincenty_direct_solution(lons[i], lats[i], azms[i], dists[i],
+                                                        WGS84_A, WGS84_B, WGS84_F)
+            self.assertAlmostEqual(lon_exp, lon_end[i], places=10)
+            self.assertAlmostEqual(lat_exp, lat_end[i], places=10)
+
+        # Single origin broadcast against azimuths
+        lon_end, lat_end = vincenty_direct_solution_batch(30, 30, [0, 90], 1000.0, WGS84_A, WGS84_B, WGS84_F)
+        self.assertEqual((2,), lon_end.shape)
+        self.assertAlmostEqual(30.009020994857025, lat_end[0], places=10)
+
+    def test_vincenty_inverse_solution_batch(self):
+        lons = [30, -100.5, 0, 179.5, 15]
+        lats = [30, -63.5, 0, 89.9, -45]
+        azms = [0, 127.5, 90, 270, 359.9]
+        dists = [1000.0, 26377.435, 5000000, 123456.7, 10]
+        lon_end, lat_end = vincenty_direct_solution_batch(lons, lats, azms, dists, WGS84_A, WGS84_B, WGS84_F)
+        distance, azimuth, _ = vincenty_inverse_solution_batch(lons, lats, lon_end, lat_end, WGS84_A, WGS84_B, WGS84_F)
+        for i in range(len(lons)):
+            self.assertAlmostEqual(dists[i], distance[i], places=5)
+            self.assertAlmostEqual(0, (azimuth[i] - azms[i] + 180) % 360 - 180, places=6)
+
+        distance, azimuth, _ = vincenty_inverse_solution_batch(15, 15, 15, 15, WGS84_A, WGS84_B, WGS84_F)
+        self.assertEqual(0, distance)
+
+    def test_vincenty_inverse_solution(self):
+        distance, azimuth_initial, azimuth_end = vincenty_inverse_solution(-100.5, -63.5, -100.07770065280457,
+                                                                           -63.64343250842656,
+                                                                           WGS84_A, WGS84_B, WGS84_F)
+        self.assertAlmostEqual(26377.435, distance, places=5)
+        self.assertAlmostEqual(127.5, azimuth_initial, places=8)
+
+        distance, azimuth_initial, azimuth_end = vincenty_inverse_solution(170, 10, -170, 10, WGS84_A, WGS84_B, WGS84_F)
+        batch = vincenty_inverse_solution_batch(170, 10, -170, 10, WGS84_A, WGS84_B, WGS84_F)
+        self.assertAlmostEqual(distance, batch[0], places=5)
+        self.assertAlmostEqual(azimuth_initial, batch[1], places=9)
+        self.assertAlmostEqual(azimuth_end, batch[2], places=9)
+        self.assertLess(azimuth_initial, 90)
+
+    def test_vincenty_inverse_solution_antipodal(self):
+        # Reference values computed with GeographicLib
+        cases = [((0, 0, 180, 0), 20003931.4585, 0.0),
+                 ((0, 0, 179.7, 0), 19995624.8898, 29.8287682),
+                 ((0, 0, 179.99, 0), 20003922.2280, 0.9502227),
+                 ((0, 0, -179.8, 0), 20000239.4376, 340.6313736),
+                 ((-49.34116758573458, 64.12316945515525, 130.6588322763973, -64.12316958076408), 20003931.4445, None),
+                 ((56.3174957961, 1.5461660366e-05, 236.3174801850, -1.6858681860e-05), 20003931.3040, None),
+                 ((133.28971342923046, 0.3320272592866189, 313.28971342923046, -0.3320272592866189),
+                  20003931.4585, None)]
+        for points, expected_distance, expected_azimuth in cases:
+            distance, azimuth_initial, _ = vincenty_inverse_solution(*points, WGS84_A, WGS84_B, WGS84_F)
+            self.assertAlmostEqual(expected_distance, distance, delta=0.001)
+            if expected_azimuth is not None:
+                self.assertAlmostEqual(expected_azimuth, azimuth_initial, places=6)
+            batch_distance, _, _ = vincenty_inverse_solution_batch(*points, WGS84_A, WGS84_B, WGS84_F)
+            self.assertAlmostEqual(expected_distance, batch_distance, delta=0.001)
+
+    def test_vincenty_inverse_matrix(self):
+        lon1, lat1 = [0, 10, -75.5, 179], [0, 45, 30.1, -5]
+        lon2, lat2 = [1, 180, -75.4], [1, 0, 30.2]
+        distance, azimuth = vincenty_inverse_matrix(lon1, lat1, lon2, lat2, WGS84_A, WGS84_B, WGS84_F)
+        self.assertEqual((4, 3), distance.shape)
+        for i in range(4):
+            for j in range(3):
+                expected = vincenty_inverse_solution(lon1[i], lat1[i], lon2[j], lat2[j], WGS84_A, WGS84_B, WGS84_F)
+                self.assertAlmostEqual(expected[0], distance[i, j], places=5)
+                self.assertAlmostEqual(expected[1], azimuth[i, j], places=8)
+
+        distance_out = np.zeros((4, 3), dtype=np.float32)
+        chunked, _ = vincenty_inverse_matrix(lon1, lat1, lon2, lat2, WGS84_A, WGS84_B, WGS84_F, chunk_pairs=1,
+                                             distance_out=distance_out)
+        self.assertIs(distance_out, chunked)
+        self.assertTrue(np.allclose(distance, chunked))
+
+    def test_vincenty_direct_solution_accuracy(self):
+        rng = np.random.default_rng(0)
+        lon, lat = rng.uniform(-180, 180, 2000), rng.uniform(-89, 89, 2000)
+        azimuth, distance = rng.uniform(0, 360, 2000), rng.uniform(1, 1000000, 2000)
+        lon_full, lat_full = vincenty_direct_solution_batch(lon, lat, azimuth, distance, WGS84_A, WGS84_B, WGS84_F)
+        max_errors = {ACCURACY_MM: 0.0001, ACCURACY_CM: 0.005, ACCURACY_M: 3, ACCURACY_SPHERE: 0.006 * distance}
+        for accuracy, max_error in max_errors.items():
+            lon_end, lat_end = vincenty_direct_solution_batch(lon, lat, azimuth, distance, WGS84_A, WGS84_B, WGS84_F,
+                                                              accuracy=accuracy)
+            error, _, _ = vincenty_inverse_solution_batch(lon_full, lat_full, lon_end, lat_end,
+                                                          WGS84_A, WGS84_B, WGS84_F)
+            self.assertTrue(np.all(error <= max_error), accuracy)
+
+            lon_scalar, lat_scalar = vincenty_direct_solution(lon[0], lat[0], azimuth[0], distance[0],
+                                                              WGS84_A, WGS84_B, WGS84_F, accuracy=accuracy)
+            self.assertAlmostEqual(lon_end[0], lon_scalar, places=9)
+            self.assertAlmostEqual(lat_end[0], lat_scalar, places=9)
+
+        self.assertEqual(vincenty_direct_solution(30, 30, 0, 1000.0, WGS84_A, WGS84_B, WGS84_F),
+                         vincenty_direct_solution(30, 30, 0, 1000.0, WGS84_A, WGS84_B, WGS84_F, ACCURACY_FULL))
+
+    def test_get_max_iterations(self):
+        self.assertIsNone(get_max_iterations(ACCURACY_FULL))
+        self.assertIsNone(get_max_iterations(ACCURACY_SPHERE))
+        self.assertEqual(2, get_max_iterations(ACCURACY_CM))
+        for accuracy in ('cm', 'MMM', None, ['M']):
+            with self.assertRaises(ValueError):
+                get_max_iterations(accuracy)
+        with self.assertRaises(ValueError):
+            vincenty_direct_solution(30, 30, 0, 1000.0, WGS84_A, WGS84_B, WGS84_F, accuracy='MMM')
+        with self.assertRaises(ValueError):
+            vincenty_direct_solution_batch(30, 30, 0, 1000.0, WGS84_A, WGS84_B, WGS84_F, accuracy='MMM')
+        with self.assertRaises(ValueError):
+            GeodesicOrigin(30, 30, accuracy='MMM')
+
+    def test_vincenty_direct_solution_accuracy_long_distance(self):
+        rng = np.random.default_rng(1)
+        lon, lat = rng.uniform(-180, 180, 2000), rng.uniform(-89, 89, 2000)
+        azimuth, distance = rng.uniform(0, 360, 2000), rng.uniform(1000000, 20000000, 2000)
+        lon_full, lat_full = vincenty_direct_solution_batch(lon, lat, azimuth, distance, WGS84_A, WGS84_B, WGS84_F)
+        max_errors = {ACCURACY_MM: 0.0001, ACCURACY_CM: 0.02, ACCURACY_M: 12, ACCURACY_SPHERE: 0.006 * distance}
+        for accuracy, max_error in max_errors.items():
+            lon_end, lat_end = vincenty_direct_solution_batch(lon, lat, azimuth, distance, WGS84_A, WGS84_B, WGS84_F,
+                                                              accuracy=accuracy)
+            error, _, _ = vincenty_inverse_solution_batch(lon_full, lat_full, lon_end, lat_end,
+                                                          WGS84_A, WGS84_B, WGS84_F)
+            self.assertTrue(np.all(error <= max_error), accuracy)
+
+        # Nearly antipodal end points, reference values computed with GeographicLib
+        cases = [(179.7, 29.8287682, 19995624.8898),
+                 (179.99, 0.9502227, 20003922.2280),
+                 (-179.8, 340.6313736, 20000239.4376)]
+        for lon_expected, azimuth, distance in cases:
+            for accuracy in (ACCURACY_FULL, ACCURACY_MM, ACCURACY_CM, ACCURACY_M, ACCURACY_SPHERE):
+                lon_end, lat_end = vincenty_direct_solution(0, 0, azimuth, distance, WGS84_A, WGS84_B, WGS84_F,
+                                                            accuracy=accuracy)
+                error, _, _ = vincenty_inverse_solution(lon_expected, 0, lon_end, lat_end, WGS84_A, WGS84_B, WGS84_F)
+                max_error = 0.006 * distance if accuracy == ACCURACY_SPHERE else 0.001
+                self.assertLessEqual(error, max_error, accuracy)
+
+    def test_geodesic_origin(self):
+        origin = GeodesicOrigin(-100.5, -63.5)
+        self.assertEqual((-100.07770065280457, -63.64343250842656), origin.direct(127.5, 26377.435))
+        self.assertEqual(vincenty_direct_solution(-100.5, -63.5, 10, 500, WGS84_A, WGS84_B, WGS84_F),
+                         origin.direct(10, 500))
+
+        azimuths, distances = [0, 90, 127.5, 359], [100, 26377.435]
+        lon_end, lat_end = origin.fan(azimuths, distances)
+        self.assertEqual((4, 2), lon_end.shape)
+        for i, azimuth in enumerate(azimuths):
+            for j, distance in enumerate(distances):
+                lon, lat = vincenty_direct_solution(-100.5, -63.5, azimuth, distance, WGS84_A, WGS84_B, WGS84_F)
+                self.assertAlmostEqual(lon, lon_end[i, j], places=10)
+                self.assertAlmostEqual(lat, lat_end[i, j], places=10)
+
+        lon_ring, lat_ring = origin.ring(26377.435, 8)
+        self.assertEqual(8, len(lon_ring))
+        self.assertAlmostEqual(origin.direct(135, 26377.435)[0], lon_ring[3], places=10)
+
+        lon_arc, lat_arc = origin.arc(1000, 350, 10, 3)
+        self.assertAlmostEqual(origin.direct(0, 1000)[1], lat_arc[1], places=10)
+        distance, _, _ = vincenty_inverse_solution_batch(-100.5, -63.5, lon_arc, lat_arc, WGS84_A, WGS84_B, WGS84_F)
+        self.assertTrue(np.allclose(1000, distance))
+
+        lon_nm, lat_nm = origin.arc(5, 350, 10, 3, uom=UOM_NM)
+        self.assertAlmostEqual(origin.direct(0, 5, uom=UOM_NM)[1], lat_nm[1], places=10)
+        lon_nm, lat_nm = origin.ring(5, 8, uom=UOM_NM)
+        self.assertAlmostEqual(origin.direct(135, 9260)[0], lon_nm[3], places=10)
+
+        # Terms of alternating arrays of azimuths are cached, not recomputed
+        first, second = np.array([0.0, 90.0]), np.array([45.0, 135.0, 225.0])
+        terms = origin.azimuth_terms_batch(first)
+        origin.azimuth_terms_batch(second)
+        self.assertIs(terms, origin.azimuth_terms_batch(first.copy()))
+        self.assertIsNot(terms, origin.azimuth_terms_batch(first[:1]))
+
+        cache_size = azm_dist_to_lonlat.AZIMUTH_TERMS_CACHE_SIZE
+        azm_dist_to_lonlat.AZIMUTH_TERMS_CACHE_SIZE = 4
+        try:
+            for azimuth in range(10):
+                self.assertEqual(origin.direct(azimuth, 1000), vincenty_direct_solution(
+                    -100.5, -63.5, azimuth, 1000, WGS84_A, WGS84_B, WGS84_F))
+        finally:
+            azm_dist_to_lonlat.AZIMUTH_TERMS_CACHE_SIZE = cache_size
+        self.assertEqual([6, 7, 8, 9], list(origin._azimuth_terms))
+
+    def test_compute_positions_file(self):
+        in_file = io.StringIO('lon,lat,azimuth,distance\n'
+                              '085 15 06.00 W,31 34 35.00 N,45,10000\n'
+                              'bad,31 34 35.00 N,400,-1\n'
+                              '\n'
+                              '085 15 06.00 W,31 34 35.00 N,45\n'
+                              '100 30 00.00 W,63 30 00.00 S,127.5,26377.435\n')
+        out_file = io.StringIO()
+        self.assertEqual((2, 2), compute_positions_file(in_file, out_file, chunk_rows=2))
+        lines = out_file.getvalue().splitlines()
+        self.assertEqual(5, len(lines))
+        self.assertEqual('lon_dmsh,lat_dmsh,azimuth,distance,end_lon_dmsh,end_lat_dmsh,error', lines[0])
+        lon_end, lat_end = vincenty_direct_solution(lon_dms_to_dd('085 15 06.00 W'), lat_dms_to_dd('31 34 35.00 N'),
+                                                    45, 10000, WGS84_A, WGS84_B, WGS84_F)
+        self.assertEqual('085 15 06.00 W,31 34 35.00 N,45,10000,{},{},'.format(
+            dd2_to_dmsh(lon_end, A_LON), dd2_to_dmsh(lat_end, A_LAT)), lines[1])
+        self.assertEqual('bad,31 34 35.00 N,400,-1,,,"Longitude should be in format DMSH. '
+                         'Azimuth should be a number within interval <0, 360>. '
+                         'Distance should be a positive number."', lines[2])
+        self.assertTrue(lines[3].startswith('085 15 06.00 W,31 34 35.00 N,45,,,,'))
+        self.assertTrue(lines[4].startswith('100 30 00.00 W,63 30 00.00 S,127.5,26377.435,100 04 39.7224 W'))
+
+        in_file = io.StringIO('085 15 06.00 W\t31 34 35.00 N\t45\t10000\n')
+        out_file = io.StringIO()
+        self.assertEqual((1, 0), compute_positions_file(in_file, out_file))
+        self.assertEqual('\t', out_file.getvalue().splitlines()[1][14])
+
+    def test_compute_positions_values(self):
+        values = ['085 15 06.00 W,31 34 35.00 N,45,10000',
+                  'bad,31 34 35.00 N,400,-1',
+                  '085 15 06.00 W,31 34 35.00 N,45',
+                  '100 30 00.00 W,63 30 00.00 S,127.5,14.2427 NM']
+        out_file = io.StringIO()
+        self.assertEqual((2, 2), compute_positions_values(values, out_file))
+        expected_file = io.StringIO()
+        compute_positions_file(io.StringIO('\n'.join(values)), expected_file)
+        self.assertEqual(expected_file.getvalue(), out_file.getvalue())
+
+    def test_distance_uom(self):
+        self.assertEqual(1852.0, get_uom_factor(UOM_NM))
+        self.assertEqual(0.3048, get_uom_factor('feet'))
+        self.assertEqual([1000.0, 1609.344, 1.0], get_uom_factor([UOM_KM, UOM_SM, UOM_M]).tolist())
+        self.assertRaises(ValueError, get_uom_factor, 'FT')
+        self.assertEqual(('5.4', UOM_NM), split_distance_uom('5.4 nm'))
+        self.assertEqual(('1200', UOM_FEET), split_distance_uom('1200FEET'))
+        self.assertEqual(('1e3', UOM_KM), split_distance_uom('1e3', UOM_KM))
+
+        expected = vincenty_direct_solution(-85.25, 31.57, 45, 9260, WGS84_A, WGS84_B, WGS84_F)
+        self.assertEqual(expected, vincenty_direct_solution(-85.25, 31.57, 45, 5, WGS84_A, WGS84_B, WGS84_F,
+                                                            uom=UOM_NM))
+        lon_end, lat_end = vincenty_direct_solution_batch(-85.25, 31.57, 45, [5, 9.26, 9260], WGS84_A, WGS84_B,
+                                                          WGS84_F, uom=[UOM_NM, UOM_KM, UOM_M])
+        for lon, lat in zip(lon_end.tolist(), lat_end.tolist()):
+            self.assertAlmostEqual(expected[0], lon, places=12)
+            self.assertAlmostEqual(expected[1], lat, places=12)
+        self.assertEqual(expected, GeodesicOrigin(-85.25, 31.57).direct(45, 5, uom=UOM_NM))
+
+        in_file = io.StringIO('085 15 06.00 W,31 34 35.00 N,45,5\n'
+                              '085 15 06.00 W,31 34 35.00 N,45,9260 M\n'
+                              '085 15 06.00 W,31 34 35.00 N,45,5 XX\n')
+        out_file = io.StringIO()
+        self.assertEqual((2, 1), compute_positions_file(in_file, out_file, uom=UOM_NM))
+        lines = out_file.getvalue().splitlines()
+        self.assertEqual(lines[1].split(',')[4:], lines[2].split(',')[4:])
+        self.assertTrue(lines[3].endswith('Distance should be a positive number.'))
+
+    def test_compute_position_numeric_distance(self):
+        outputs = []
+        for distance, uom in (('9260', UOM_M), (9260, UOM_M), (5, UOM_NM), (5.0, UOM_NM), ('5 NM', UOM_M)):
+            out_file = io.StringIO()
+            with contextlib.redirect_stdout(out_file):
+                compute_position('085 15 06.00 W', '31 34 35.00 N', 45, distance, uom)
+            outputs.append(out_file.getvalue())
+        self.assertTrue(outputs[0].startswith('End longitude'))
+        self.assertEqual([outputs[0]] * 5, outputs)
+
+    def test_ellipsoid(self):
+        wgs84 = get_ellipsoid(ELLIPSOID_WGS84)
+        self.assertIs(wgs84, get_ellipsoid('wgs84'))
+        self.assertIs(wgs84, get_ellipsoid(wgs84))
+        self.assertEqual((WGS84_A, WGS84_B, WGS84_F), (wgs84.a, wgs84.b, wgs84.f))
+        self.assertIs(get_ellipsoid(WGS84_A, WGS84_B, WGS84_F), get_ellipsoid(WGS84_A, WGS84_B, WGS84_F))
+        self.assertAlmostEqual(6356752.314, get_ellipsoid(ELLIPSOID_GRS80).b, places=3)
+        self.assertAlmostEqual(1 / 294.978698, get_ellipsoid(ELLIPSOID_CLARKE1866).f, places=10)
+        self.assertRaises(ValueError, get_ellipsoid, 'UNKNOWN')
+
+        expected = vincenty_direct_solution(30, 30, 0, 1000.0, WGS84_A, WGS84_B, WGS84_F)
+        self.assertEqual(expected, vincenty_direct_solution(30, 30, 0, 1000.0, ELLIPSOID_WGS84))
+        self.assertEqual(expected, GeodesicOrigin(30, 30, wgs84).direct(0, 1000.0))
+        self.assertEqual(vincenty_inverse_solution(30, 30, 31, 31, WGS84_A, WGS84_B, WGS84_F),
+                         vincenty_inverse_solution(30, 30, 31, 31, wgs84))
+
+        clarke = vincenty_direct_solution(30, 30, 0, 1000000.0, ELLIPSOID_CLARKE1866)
+        lon_end, lat_end = vincenty_direct_solution_batch(30, 30, 0, 1000000.0, ELLIPSOID_CLARKE1866)
+        self.assertAlmostEqual(clarke[1], lat_end, places=10)
+        self.assertNotAlmostEqual(vincenty_direct_solution(30, 30, 0, 1000000.0, ELLIPSOID_WGS84)[1], clarke[1],
+                                  places=5)
+        distance, azimuth, _ = vincenty_inverse_solution_batch(30, 30, clarke[0], clarke[1], ELLIPSOID_CLARKE1866)
+        self.assertAlmostEqual(1000000.0, distance, places=5)
+
+        try:
+            ellipsoid = register_ellipsoid('sphere', 6371000.0, 6371000.0)
+            self.assertIs(ellipsoid, get_ellipsoid('SPHERE'))
+            self.assertEqual(0, ellipsoid.f)
+            self.assertAlmostEqual(30 + math.degrees(1000.0 / 6371000.0),
+                                   vincenty_direct_solution(30, 30, 0, 1000.0, 'sphere')[1], places=12)
+        finally:
+            ELLIPSOID_PARAMETERS.pop('SPHERE', None)
+            ELLIPSOIDS.pop('SPHERE', None)
+
+    def test_dms_to_dd_bulk(self):
+        lon_values = ['085 15 06.00 W', '085 15 06 W', '085 15 06.1234567 E', '180 00 00.00 W', '180 00 00.01 W',
+                      '085 15 06.00 Wxx', '085\t15 06.00 W', '085 65 06.00 W', '', '85 15 06.00 N', '085 15 06. W']
+        lat_values = ['31 34 35.00 N', '12 30 15.5 S', '90 00 00 S', '90 00 00.0001 S', '31 34 35.00 E', 'test']
+        rng = np.random.default_rng(0)
+        lon_values += [dd2_to_dmsh(dd, A_LON) for dd in rng.uniform(-180, 180, 1000).tolist()]
+        lat_values += [dd2_to_dmsh(dd, A_LAT) for dd in rng.uniform(-90, 90, 1000).tolist()]
+        for values, bulk_function, scalar_function in ((lon_values, lon_dms_to_dd_bulk, lon_dms_to_dd),
+                                                       (lat_values, lat_dms_to_dd_bulk, lat_dms_to_dd)):
+            dd = bulk_function(values)
+            for value, bulk_dd in zip(values, dd.tolist()):
+                scalar_dd = scalar_function(value)
+                if scalar_dd is None:
+                    self.assertTrue(math.isnan(bulk_dd), value)
+                else:
+                    self.assertEqual(scalar_dd, bulk_dd, value)
+
+    def test_dd_to_dmsh_bulk(self):
+        rng = np.random.default_rng(0)
+        lon_values = rng.uniform(-180, 180, 1000).tolist() + [0.0, -0.0, 180, -180, 1e-12, -1e-12, 179.99999999,
+                                                              59.99999999 / 3600, 1234.5, 1.00003125]
+        lat_values = (np.array(lon_values) / 2).tolist()
+        for values, ang_type in ((lon_values, A_LON), (lat_values, A_LAT)):
+            self.assertEqual([dd2_to_dmsh(dd, ang_type) for dd in values], dd_to_dmsh_bulk(values, ang_type).tolist())
+        self.assertEqual(['', '045 00 00.0000 E'], dd_to_dmsh_bulk([np.nan, 45], A_LON).tolist())
+        with self.assertRaises(ValueError):
+            dd_to_dmsh_bulk([1], 'test')
+
+    def test_vincenty_direct_convergence_guard(self):
+        rng = np.random.default_rng(0)
+        lon, lat = rng.uniform(-180, 180, 200), rng.uniform(-89, 89, 200)
+        azimuth, distance = rng.uniform(0, 360, 200), rng.uniform(1, 19000000, 200)
+        lon_end, lat_end, iterations = vincenty_direct_solution_batch(lon, lat, azimuth, distance,
+                                                                      WGS84_A, WGS84_B, WGS84_F,
+                                                                      return_iterations=True)
+        self.assertEqual((200,), iterations.shape)
+        self.assertTrue(((iterations >= 1) & (iterations <= VINCENTY_DIRECT_MAX_ITERATIONS)).all())
+
+        # Iteration limited to 1 - series expansion is used for every input
+        max_iterations = azm_dist_to_lonlat.VINCENTY_DIRECT_MAX_ITERATIONS
+        azm_dist_to_lonlat.VINCENTY_DIRECT_MAX_ITERATIONS = 1
+        try:
+            lon_series, lat_series, iterations = vincenty_direct_solution_batch(lon, lat, azimuth, distance,
+                                                                                WGS84_A, WGS84_B, WGS84_F,
+                                                                                return_iterations=True)
+            lon_scalar, lat_scalar = vincenty_direct_solution(lon[0], lat[0], azimuth[0], distance[0],
+                                                              WGS84_A, WGS84_B, WGS84_F)
+        finally:
+            azm_dist_to_lonlat.VINCENTY_DIRECT_MAX_ITERATIONS = max_iterations
+        self.assertTrue((iterations == 2).all())
+        distances, _, _ = vincenty_inverse_solution_batch(lon_end, lat_end, lon_series, lat_series,
+                                                          WGS84_A, WGS84_B, WGS84_F)
+        self.assertLess(np.nanmax(distances), 1e-3)
+        self.assertAlmostEqual(lon_series[0], lon_scalar, places=10)
+        self.assertAlmostEqual(lat_series[0], lat_scalar, places=10)
+
+        sigma = vincenty_direct_series_sigma(0.3, 0.5, 1000000, WGS84_B, WGS84_F)
+        self.assertAlmostEqual(1000000 / WGS84_B, sigma, places=3)
+
+    def test_vincenty_cross_track_batch(self):
+        rng = np.random.default_rng(0)
+        lon_initial, lat_initial = rng.uniform(-100, -80, 200), rng.uniform(-60, 60, 200)
+        azimuth, length = rng.uniform(0, 360, 200), rng.uniform(1000, 500000, 200)
+        lon_end, lat_end = vincenty_direct_solution_batch(lon_initial, lat_initial, azimuth, length, ELLIPSOID_WGS84)
+
+        # Points at known along track and cross track distances (geodesic perpendicular to segment)
+        along_track, cross_track = rng.uniform(-0.2, 1.2, 200) * length, rng.uniform(-50000, 50000, 200)
+        lon_track, lat_track = vincenty_direct_solution_batch(lon_initial, lat_initial, azimuth, along_track,
+                                                              ELLIPSOID_WGS84)
+        _, _, track_azimuth = vincenty_inverse_solution_batch(lon_initial, lat_initial, lon_track, lat_track,
+                                                              ELLIPSOID_WGS84)
+        track_azimuth = np.where(along_track < 0, track_azimuth + 180, track_azimuth)
+        lon, lat = vincenty_direct_solution_batch(lon_track, lat_track, track_azimuth + 90, cross_track,
+                                                  ELLIPSOID_WGS84)
+
+        distance, found_cross_track, found_along_track = vincenty_cross_track_batch(
+            lon_initial, lat_initial, lon_end, lat_end, lon, lat, WGS84_A, WGS84_B, WGS84_F)
+        np.testing.assert_allclose(cross_track, found_cross_track, atol=1e-3)
+        np.testing.assert_allclose(along_track, found_along_track, atol=1e-2)
+        inside = (along_track >= 0) & (along_track <= length)
+        np.testing.assert_allclose(np.fabs(cross_track[inside]), distance[inside], atol=1e-3)
+        self.assertTrue(np.all(distance[~inside] > np.fabs(cross_track[~inside])))
+
+        distance, cross_track, along_track = vincenty_cross_track_batch(0, 0, 1, 0, 0.5, [0.1, -0.1], ELLIPSOID_WGS84)
+        self.assertLess(cross_track[0], 0)
+        self.assertGreater(cross_track[1], 0)
+        self.assertAlmostEqual(distance[0], distance[1], places=6)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .benchmark import *
+from .faa_dof_dat_to_csv import DOF_RECORD_WIDTH, read_dof_records
+
+
+class BenchmarkTests(unittest.TestCase):
+
+    def test_generate_dof_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dof_file = os.path.join(tmp_dir, 'DOF.DAT')
+            generate_dof_file(dof_file, 50)
+            with open(dof_file) as f:
+                lines = f.read().splitlines()
+            self.assertEqual(DOF_HEADER_LINES + 50, len(lines))
+            self.assertTrue(all(len(line) == DOF_RECORD_WIDTH for line in lines[DOF_HEADER_LINES:]))
+            records = read_dof_records(dof_file)
+            self.assertEqual(50, len(records))
+            self.assertFalse(np.isnan(records['lat_dd']).any())
+            self.assertFalse(np.isnan(records['lon_dd']).any())
+            self.assertTrue((records['obs_number'] == np.arange(50)).all())
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(dof_sizes=[100], points_count=100, repeat=1, startup_runs=1)
+        self.assertIn('faa_dof2csv_100', results)
+        self.assertIn('vincenty_direct_solution_batch', results)
+        self.assertIn('dms_to_dd_bulk', results)
+        self.assertIn('lat_dms_to_dd', results)
+        self.assertIn('arinc424_to_coordinates_bulk', results)
+        self.assertIn('startup_arinc424_cli', results)
+        self.assertIn('cli_values_azm_dist_to_lonlat', results)
+        self.assertTrue(all(result['throughput'] > 0 for result in results.values()))
+
+    def test_compare_results(self):
+        baseline = {'a': get_result(100, 1, 'points/s'), 'b': get_result(100, 1, 'points/s')}
+        results = {'a': get_result(100, 1.2, 'points/s'), 'b': get_result(100, 1.5, 'points/s'),
+                   'c': get_result(100, 10, 'points/s')}
+        regressions = compare_results(results, baseline, threshold=0.25)
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith('b: 67 points/s is 33.3% below baseline 100 points/s'))
+
+    def test_check_targets(self):
+        results = {'faa_dof2csv_1000': get_result(1000, 1, 'records/s'),
+                   'faa_dof2csv_100000': get_result(100000, 1, 'records/s'),
+                   'faa_dof2csv_1000000': get_result(1000000, 1, 'records/s'),
+                   'dms_to_dd_bulk': get_result(1000000, 100, 'values/s')}
+        self.assertEqual(['faa_dof2csv_100000: 100000 records/s is below target 500000 records/s'],
+                         check_targets(results, target=500000))
+        self.assertEqual([], check_targets(results, target=100000))
+
+
+if __name__ == '__main__':
+    unittest.main()
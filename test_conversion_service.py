@@ -0,0 +1,164 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .azm_dist_to_lonlat import ELLIPSOID_GRS80, WGS84_A, WGS84_B, WGS84_F, vincenty_direct_solution
+from .faa_dof_dat_to_csv import DOF_COLUMN_DTYPES
+from .conversion_service import *
+
+
+def make_index():
+    records = np.zeros(3, dtype=DOF_COLUMN_DTYPES)
+    records['obs_number'] = [1, 2, 3]
+    records['lon_dd'] = [-85.25, -85.2, -80]
+    records['lat_dd'] = [31.57, 31.6, 31]
+    records['obs_type'] = [b'TOWER', b'BLDG', b'STACK']
+    return ObstacleIndex(records)
+
+
+class ConversionServiceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.service = ConversionService(make_index())
+
+    def test_handle_batch(self):
+        requests = [{'id': 1, 'method': 'arinc424_to_coordinates', 'params': {'code': '50N60'}},
+                    {'id': 2, 'method': 'arinc424_to_coordinates', 'params': {'code': '95N10'}},
+                    {'id': 3, 'method': 'coord_to_arinc424', 'params': {'lon': '16000W', 'lat': '5000N'}},
+                    {'id': 4, 'method': 'test', 'params': {}},
+                    {'id': 5, 'method': 'coord_to_arinc424', 'params': {'lon': '16000W'}}]
+        responses = self.service.handle_batch(requests)
+        self.assertEqual([1, 2, 3, 4, 5], [response['id'] for response in responses])
+        self.assertIn('result', responses[0])
+        self.assertIn('error', responses[1])
+        self.assertEqual('50N60', responses[2]['result'])
+        self.assertEqual('Unknown method: test', responses[3]['error'])
+        self.assertEqual('Missing parameter: lon, lat', responses[4]['error'])
+
+    def test_direct(self):
+        requests = [{'id': 1, 'method': 'direct',
+                     'params': {'lon': '085 15 06.00 W', 'lat': '31 34 35.00 N', 'azimuth': 45, 'distance': '5 NM'}},
+                    {'id': 2, 'method': 'direct',
+                     'params': {'lon': -85.25, 'lat': 31.57, 'azimuth': 45, 'distance': 5, 'uom': 'KM',
+                                'ellipsoid': 'grs80'}},
+                    {'id': 3, 'method': 'direct', 'params': {'lon': -85.25, 'lat': 31.57, 'azimuth': 45}},
+                    {'id': 4, 'method': 'direct', 'params': {'lon': -85.25, 'lat': 31.57, 'azimuth': 400,
+                                                             'distance': 1}},
+                    {'id': 5, 'method': 'direct', 'params': {'lon': 200, 'lat': 31.57, 'azimuth': 40, 'distance': 1}}]
+        responses = self.service.handle_batch(requests)
+
+        expected = vincenty_direct_solution(-85.251666666666667, 31.576388888888889, 45, 9260,
+                                            WGS84_A, WGS84_B, WGS84_F)
+        self.assertAlmostEqual(expected[0], responses[0]['result']['lon'], places=9)
+        self.assertAlmostEqual(expected[1], responses[0]['result']['lat'], places=9)
+        self.assertTrue(responses[0]['result']['lon_dmsh'].endswith('W'))
+        expected = vincenty_direct_solution(-85.25, 31.57, 45, 5000, ELLIPSOID_GRS80)
+        self.assertAlmostEqual(expected[0], responses[1]['result']['lon'], places=9)
+        self.assertAlmostEqual(expected[1], responses[1]['result']['lat'], places=9)
+        self.assertEqual('Missing parameter: distance', responses[2]['error'])
+        self.assertIn('Azimuth', responses[3]['error'])
+        self.assertIn('Longitude', responses[4]['error'])
+
+    def test_obstacles(self):
+        responses = self.service.handle_batch([
+            {'id': 1, 'method': 'obstacles_radius', 'params': {'lon': -85.25, 'lat': 31.57, 'radius': '4 NM'}},
+            {'id': 2, 'method': 'obstacles_bbox',
+             'params': {'min_lon': -86, 'min_lat': 30, 'max_lon': -79, 'max_lat': 32}},
+            {'id': 3, 'method': 'obstacles_radius', 'params': {'lon': -85.25, 'lat': 31.57}}])
+        self.assertEqual([1, 2], [obstacle['obs_number'] for obstacle in responses[0]['result']])
+        self.assertEqual('TOWER', responses[0]['result'][0]['obs_type'])
+        self.assertAlmostEqual(0, responses[0]['result'][0]['distance'])
+        self.assertEqual([1, 2, 3], sorted(obstacle['obs_number'] for obstacle in responses[1]['result']))
+        self.assertEqual('Missing parameter: radius', responses[2]['error'])
+        json.dumps(responses)
+
+        responses = ConversionService().handle_batch([{'id': 1, 'method': 'obstacles_bbox', 'params': {}}])
+        self.assertEqual('Obstacle index is not loaded.', responses[0]['error'])
+
+    def test_serve_stdio(self):
+        in_file = io.BytesIO(b'{"id": 1, "method": "coord_to_arinc424", "params": {"lon": "06000E", "lat": "5000S"}}\n'
+                             b'\n'
+                             b'not json\n'
+                             b'{"id": 2, "method": "arinc424_to_coordinates", "params": {"code": "5060N"}}\n')
+        out_file = io.BytesIO()
+        asyncio.run(self.service.serve_stdio(in_file, out_file))
+        responses = {response['id']: response for response in map(json.loads, out_file.getvalue().splitlines())}
+        self.assertEqual({None, 1, 2}, set(responses))
+        self.assertEqual('5060S', responses[1]['result'])
+        self.assertIn('result', responses[2])
+        self.assertEqual('Request should be JSON object.', responses[None]['error'])
+
+    def test_request_too_long(self):
+        line = b'{"id": 1, "method": "arinc424_to_coordinates", "params": {"code": "5060N"}}\n'
+        long_line = b'{"id": 3, "code": "' + b'x' * MAX_REQUEST_SIZE + b'"}\n'
+        in_file = io.BytesIO(line + long_line + line.replace(b'1', b'2', 1))
+        out_file = io.BytesIO()
+        asyncio.run(self.service.serve_stdio(in_file, out_file))
+        responses = {response['id']: response for response in map(json.loads, out_file.getvalue().splitlines())}
+        self.assertEqual({None, 1, 2}, set(responses))
+        self.assertEqual('Request should not be longer than {} bytes.'.format(MAX_REQUEST_SIZE),
+                         responses[None]['error'])
+
+        async def run(path):
+            ready = asyncio.Event()
+            server = asyncio.get_running_loop().create_task(self.service.serve_unix(path, ready))
+            await ready.wait()
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(long_line + line)
+            writer.write_eof()
+            responses = [json.loads(response) for response in (await reader.read()).splitlines()]
+            writer.close()
+            server.cancel()
+            try:
+                await server
+            except asyncio.CancelledError:
+                pass
+            return responses
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            responses = asyncio.run(run(os.path.join(tmp_dir, 'conversion.sock')))
+        self.assertEqual('Request should not be longer than {} bytes.'.format(MAX_REQUEST_SIZE),
+                         responses[0]['error'])
+        self.assertEqual('06000W 5000N', responses[-1]['result'])
+
+    def test_serve_unix(self):
+        async def request(path, requests):
+            reader, writer = await asyncio.open_unix_connection(path)
+            for request in requests:
+                writer.write(json.dumps(request).encode() + b'\n')
+            writer.write_eof()
+            responses = [json.loads(line) for line in (await reader.read()).splitlines()]
+            writer.close()
+            return responses
+
+        async def run(path):
+            ready = asyncio.Event()
+            server = asyncio.get_running_loop().create_task(self.service.serve_unix(path, ready))
+            await ready.wait()
+            clients = [request(path, [{'id': i * 100 + j, 'method': 'direct',
+                                       'params': {'lon': -85.25, 'lat': 31.57, 'azimuth': j, 'distance': 1000}}
+                                      for j in range(50)]) for i in range(4)]
+            results = await asyncio.gather(*clients)
+            server.cancel()
+            try:
+                await server
+            except asyncio.CancelledError:
+                pass
+            return results
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'conversion.sock')
+            results = asyncio.run(run(path))
+            self.assertFalse(os.path.exists(path))
+        for i, responses in enumerate(results):
+            self.assertEqual(list(range(i * 100, i * 100 + 50)), sorted(response['id'] for response in responses))
+            self.assertTrue(all('result' in response for response in responses))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .azm_dist_to_lonlat import (WGS84_A, WGS84_B, WGS84_F, get_ellipsoid, vincenty_cross_track_batch,
+                                 vincenty_inverse_solution_batch)
+from .faa_dof_dat_to_csv import DOF_COLUMN_DTYPES
+from .dof_obstacle_index import *
+
+
+def make_records(lon, lat):
+    records = np.zeros(len(lon), dtype=DOF_COLUMN_DTYPES)
+    records['obs_number'] = np.arange(len(lon))
+    records['lon_dd'] = lon
+    records['lat_dd'] = lat
+    return records
+
+
+class ObstacleIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        lon = np.concatenate((rng.uniform(-180, 180, 5000), rng.uniform(-86, -84, 2000), [179.99, -179.99, np.nan]))
+        lat = np.concatenate((rng.uniform(-90, 90, 5000), rng.uniform(30, 32, 2000), [0, 0, 10]))
+        self.records = make_records(lon, lat)
+        self.index = ObstacleIndex(self.records)
+
+    def test_query_bbox(self):
+        self.assertEqual(len(self.records) - 1, len(self.index))
+        lon, lat = self.records['lon_dd'], self.records['lat_dd']
+        for bbox in [(-85.5, 30.5, -84.5, 31.5), (-180, -90, 180, 90), (10, 10, 10.1, 10.1)]:
+            expected = np.flatnonzero((lon >= bbox[0]) & (lon <= bbox[2]) & (lat >= bbox[1]) & (lat <= bbox[3]))
+            self.assertEqual(sorted(expected.tolist()), sorted(self.index.query_bbox(*bbox)['obs_number'].tolist()))
+
+        # Crossing antimeridian
+        found = self.index.query_bbox(179, -1, -179, 1)['obs_number'].tolist()
+        self.assertIn(len(self.records) - 3, found)
+        self.assertIn(len(self.records) - 2, found)
+
+    def test_query_radius(self):
+        lon, lat = self.records['lon_dd'], self.records['lat_dd']
+        for center_lon, center_lat, radius in [(-85, 31, 20000), (179.5, 0.5, 150000), (0, 89.5, 500000),
+                                               (-85, 31, 1)]:
+            distances, _, _ = vincenty_inverse_solution_batch(center_lon, center_lat, lon, lat,
+                                                              WGS84_A, WGS84_B, WGS84_F)
+            expected = np.flatnonzero(distances <= radius)
+            obstacles, found_distances = self.index.query_radius(center_lon, center_lat, radius)
+            self.assertEqual(sorted(expected.tolist()), sorted(obstacles['obs_number'].tolist()))
+            self.assertTrue(np.all(np.diff(found_distances) >= 0))
+
+    def test_query_corridor(self):
+        valid = ~np.isnan(self.records['lon_dd'])
+        lon, lat = self.records['lon_dd'][valid], self.records['lat_dd'][valid]
+        segments = [(-85.5, 30.5, -84.5, 31.5, 10000), (179.5, -1, -179.5, 1, 150000), (-10, 10, 40, 60, 300000),
+                    (-85, 31, -85, 31, 20000)]
+        # Sphere much smaller than WGS84 ellipsoid changes which obstacles are within corridors
+        for ellipsoid in (get_ellipsoid(WGS84_A, WGS84_B, WGS84_F), get_ellipsoid(5000000.0, 5000000.0, 0.0)):
+            for lon_initial, lat_initial, lon_end, lat_end, half_width in segments:
+                distances, _, _ = vincenty_cross_track_batch(lon_initial, lat_initial, lon_end, lat_end, lon, lat,
+                                                             ellipsoid)
+                expected = self.records['obs_number'][valid][distances <= half_width]
+                obstacles, found_distances, _, along_track = self.index.query_corridor(
+                    lon_initial, lat_initial, lon_end, lat_end, half_width, ellipsoid)
+                self.assertEqual(sorted(expected.tolist()), sorted(obstacles['obs_number'].tolist()))
+                self.assertTrue(np.all(found_distances <= half_width))
+                self.assertTrue(np.all(np.diff(along_track) >= 0))
+        self.assertNotEqual(len(self.index.query_corridor(-10, 10, 40, 60, 300000)[0]),
+                            len(self.index.query_corridor(-10, 10, 40, 60, 300000, ellipsoid)[0]))
+
+    def test_screen_corridors(self):
+        self.records['ams_height'] = np.arange(len(self.records)) % 700
+        index = ObstacleIndex(self.records)
+        lon_initial = np.array([-85.5, -85, 100, 179.5])
+        lat_initial = np.array([30.5, 30, -60, -1])
+        lon_end = np.array([-84.5, -84.2, 100.1, -179.5])
+        lat_end = np.array([31.5, 30.8, -60.1, 1])
+        screening = index.screen_corridors(lon_initial, lat_initial, lon_end, lat_end, 5000, chunk_segments=3)
+        for i in range(len(lon_initial)):
+            obstacles, distances, _, _ = index.query_corridor(lon_initial[i], lat_initial[i], lon_end[i], lat_end[i],
+                                                              5000)
+            self.assertEqual(len(obstacles), screening.counts[i])
+            if len(obstacles):
+                self.assertEqual(obstacles['ams_height'].max(), screening.obstacles['ams_height'][i])
+                self.assertIn(screening.obstacles['obs_number'][i], obstacles['obs_number'])
+            else:
+                self.assertTrue(np.isnan(screening.distance[i]))
+        self.assertTrue(screening.counts[0] > 1)
+        self.assertEqual(0, screening.counts[2])
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_file = os.path.join(tmp_dir, 'index.npz')
+            self.index.save(index_file)
+            loaded = ObstacleIndex.load(index_file)
+        self.assertEqual(self.index.cell_size, loaded.cell_size)
+        self.assertEqual(self.index.records.tolist(), loaded.records.tolist())
+        self.assertEqual(self.index.query_bbox(-85.5, 30.5, -84.5, 31.5).tolist(),
+                         loaded.query_bbox(-85.5, 30.5, -84.5, 31.5).tolist())
@@ -0,0 +1,407 @@
+import csv
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from .faa_dof_dat_to_csv import *
+
+DOF_HEADER = ['  CURRENCY DATE = 08/12/18',
+              '',
+              'OAS#   V CO ST CITY             LATITUDE     LONGITUDE     '
+              'OBSTACLE TYPE      C AGL   AMSL  LT H V M FAA STUDY      ACTION JDATE',
+              '-' * 127]
+
+# Records are concatenated from fixed width field groups (see DOF_FIELD_SLICES) ending with separating space:
+# OAS code and number, verification status, country and state | city | latitude and longitude | obstacle type |
+# quantity, AGL and AMSL height | lighting, horizontal and vertical accuracy, marking | FAA study number |
+# action and julian date
+DOF_RECORDS = ['01-000307 O US AL ' 'ABBEVILLE        ' '31 34 35.00N 085 15 06.00W ' 'TOWER              '
+               '1 00200 00666 ' 'R 2 C U ' '2012ASO1234OE  ' 'A 2011335',
+               '01-001070 U US AL ' 'ALBERTVILLE      ' '34 17 00.43N 086 12 45.12W ' 'BLDG               '
+               '1 00112 01160 ' 'N 1 D N ' '               ' 'C 2015026',
+               '05-000072 O US CA ' 'ZZ_LONG_CITY_NAM ' '09 02 03.00S 179 59 59.99E ' 'STACK              '
+               '2 00040 00052 ' 'D 5 E M ' '1999AWP0001OE  ' 'D 2018170']
+
+
+class FaaDofToCsvTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dof_path = os.path.join(self.tmp_dir.name, 'DOF.DAT')
+        self.csv_path = os.path.join(self.tmp_dir.name, 'DOF.csv')
+        with open(self.dof_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER + DOF_RECORDS) + '\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_csv(self):
+        with open(self.csv_path, newline='') as csv_file:
+            return list(csv.DictReader(csv_file))
+
+    def test_faa_dof2csv(self):
+        self.assertEqual(3, faa_dof2csv(self.dof_path, self.csv_path))
+        rows = self.read_csv()
+        self.assertEqual(3, len(rows))
+        self.assertEqual(DOF_CSV_FIELD_NAMES, list(rows[0].keys()))
+        self.assertEqual('01', rows[0]['oas_code'])
+        self.assertEqual('000307', rows[0]['obs_number'])
+        self.assertEqual('ABBEVILLE', rows[0]['city_name'])
+        self.assertEqual('31 34 35.00N', rows[0]['lat_dms'])
+        self.assertEqual('085 15 06.00W', rows[0]['lon_dms'])
+        self.assertEqual('TOWER', rows[0]['obs_type'])
+        self.assertEqual('00666', rows[0]['ams_height'])
+        self.assertEqual('2012ASO1234OE', rows[0]['faa_study_number'])
+        self.assertEqual('', rows[1]['faa_study_number'])
+        self.assertEqual('2018170', rows[2]['jdate'])
+        self.assertEqual(dms2dd('31 34 35.00N'), float(rows[0]['lat_dd']))
+        self.assertEqual(dms2dd('085 15 06.00W'), float(rows[0]['lon_dd']))
+        self.assertEqual(-9.034166666666666, float(rows[2]['lat_dd']))
+        self.assertEqual(179.99999722222222, float(rows[2]['lon_dd']))
+
+    def test_faa_dof2csv_small_blocks(self):
+        faa_dof2csv(self.dof_path, self.csv_path)
+        expected = self.read_csv()
+        for block_size in (1, 7, 128, 300):
+            faa_dof2csv(self.dof_path, self.csv_path, block_size=block_size)
+            self.assertEqual(expected, self.read_csv())
+
+    def test_faa_dof2csv_crlf(self):
+        faa_dof2csv(self.dof_path, self.csv_path)
+        expected = self.read_csv()
+        with open(self.dof_path, 'w', newline='') as dof_file:
+            dof_file.write('\r\n'.join(DOF_HEADER + DOF_RECORDS) + '\r\n')
+        faa_dof2csv(self.dof_path, self.csv_path)
+        self.assertEqual(expected, self.read_csv())
+
+    def test_dms2dd_bulk(self):
+        lat_dms = ['31 34 35.00N', '09 02 03.00S', '00 00 00.01S', '89 59 59.99N', '34 17 00.43N']
+        lat_dd = dms2dd_bulk(lat_dms, 2)
+        for dms, dd in zip(lat_dms, lat_dd):
+            self.assertEqual(dms2dd(dms), dd)
+
+        lon_dms = ['085 15 06.00W', '179 59 59.99E', '000 00 00.01W', '006 41 32.48E']
+        lon_dd = dms2dd_bulk(lon_dms, 3)
+        for dms, dd in zip(lon_dms, lon_dd):
+            self.assertEqual(dms2dd(dms), dd)
+
+        invalid = dms2dd_bulk(['', '31 34 35.00E', '31-34-35.00N', '3A 34 35.00N', '31 34 35.00', '31 34 3\xe9.00N',
+                               '31 60 00.00N', '31 00 60.00N', '91 00 00.00N', '90 00 00.01S'], 2)
+        self.assertTrue(all(dd != dd for dd in invalid))
+        self.assertEqual([90, -180], [dms2dd_bulk(['90 00 00.00N'], 2)[0], dms2dd_bulk(['180 00 00.00W'], 3)[0]])
+        self.assertTrue(np.isnan(dms2dd_bulk(['180 00 00.01E', '181 00 00.00W', '085 15 06.00€'], 3)).all())
+        self.assertEqual((0,), dms2dd_bulk([], 3).shape)
+
+    def test_non_ascii_coordinates(self):
+        record = DOF_RECORDS[0][:40] + '\xe9' + DOF_RECORDS[0][41:]
+        self.assertEqual(['', ''], [row[-2] for row in parse_dof_lines([record, record[:60]])])
+        self.assertTrue(np.isnan(parse_dof_columns([record])['lat_dd'][0]))
+        with open(self.dof_path, 'w', encoding=DOF_ENCODING) as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER + [record] + DOF_RECORDS[1:]) + '\n')
+        with DofFile(self.dof_path) as dof:
+            self.assertTrue(np.isnan(dof.column('lat_dd')[0]))
+            self.assertEqual(dms2dd(DOF_RECORDS[1][35:47]), dof.column('lat_dd')[1])
+
+    def test_split_dof_file(self):
+        file_size = os.path.getsize(self.dof_path)
+        for shards_count in (1, 2, 3, 50):
+            shards = split_dof_file(self.dof_path, shards_count)
+            self.assertEqual(0, shards[0][0])
+            self.assertEqual(file_size, shards[-1][1])
+            lines = [line for start, end in shards for block in iter_dof_blocks(self.dof_path, start=start, end=end)
+                     for line in block]
+            self.assertEqual(DOF_RECORDS, lines)
+
+    def test_faa_dof2csv_parallel(self):
+        faa_dof2csv(self.dof_path, self.csv_path)
+        expected = self.read_csv()
+        self.assertEqual(3, faa_dof2csv_parallel(self.dof_path, self.csv_path, processes=2))
+        self.assertEqual(expected, self.read_csv())
+
+        # Directory of state files
+        states_dir = os.path.join(self.tmp_dir.name, 'states')
+        os.mkdir(states_dir)
+        for name in ('AL.Dat', 'CA.Dat'):
+            shutil.copy(self.dof_path, os.path.join(states_dir, name))
+        self.assertEqual(6, faa_dof2csv_parallel(states_dir, self.csv_path, processes=2))
+        self.assertEqual(expected + expected, self.read_csv())
+
+    def test_detect_dof_header_lines(self):
+        self.assertEqual(4, detect_dof_header_lines(self.dof_path))
+        with open(self.dof_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER[:1] + DOF_HEADER[2:] + DOF_RECORDS) + '\n')
+        self.assertEqual(3, detect_dof_header_lines(self.dof_path))
+        self.assertEqual(3, faa_dof2csv(self.dof_path, self.csv_path))
+        with open(self.dof_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_RECORDS) + '\n')
+        self.assertEqual(0, detect_dof_header_lines(self.dof_path))
+        self.assertEqual(3, faa_dof2csv(self.dof_path, self.csv_path))
+        with DofFile(self.dof_path) as dof:
+            self.assertEqual(3, len(dof))
+
+    def test_faa_dof2csv_quarantine(self):
+        faa_dof2csv(self.dof_path, self.csv_path)
+        expected = self.read_csv()
+        invalid_lat = DOF_RECORDS[1][:35] + '34 17 00.43E' + DOF_RECORDS[1][47:]
+        invalid_height = DOF_RECORDS[1][:89] + '0A160' + DOF_RECORDS[1][94:]
+        records = [DOF_RECORDS[0], '02-000001 O US AK', invalid_lat, '', DOF_RECORDS[1], invalid_height,
+                   DOF_RECORDS[2], '', '']
+        with open(self.dof_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER + records) + '\n')
+
+        quarantine_path = os.path.join(self.tmp_dir.name, 'DOF_quarantine.csv')
+        quarantine = [['line_number', 'error', 'record'],
+                      ['6', 'Record length 17 instead of 127.', '02-000001 O US AK'],
+                      ['7', 'Invalid fields: lat_dms.', invalid_lat],
+                      ['10', 'Invalid fields: ams_height.', invalid_height]]
+        for block_size in (DOF_BLOCK_SIZE, 300):
+            self.assertEqual(3, faa_dof2csv(self.dof_path, self.csv_path, block_size, quarantine_path))
+            self.assertEqual(expected, self.read_csv())
+            with open(quarantine_path, newline='') as quarantine_file:
+                self.assertEqual(quarantine, list(csv.reader(quarantine_file)))
+
+        self.assertEqual(3, faa_dof2csv_parallel(self.dof_path, self.csv_path, processes=3,
+                                                 quarantine_file=quarantine_path))
+        self.assertEqual(expected, self.read_csv())
+        with open(quarantine_path, newline='') as quarantine_file:
+            self.assertEqual(quarantine, list(csv.reader(quarantine_file)))
+
+    def test_parse_dof_columns(self):
+        records = parse_dof_columns(DOF_RECORDS + ['01-00030X O US AL SHORT'])
+        self.assertEqual(4, len(records))
+        self.assertEqual(b'01', records['oas_code'][0])
+        self.assertEqual(307, records['obs_number'][0])
+        self.assertEqual(b'ABBEVILLE', records['city_name'][0])
+        self.assertEqual(b'TOWER', records['obs_type'][0])
+        self.assertEqual(200, records['agl_height'][0])
+        self.assertEqual(666, records['ams_height'][0])
+        self.assertEqual(b'2012ASO1234OE', records['faa_study_number'][0])
+        self.assertEqual(b'', records['faa_study_number'][1])
+        self.assertEqual(np.datetime64('2011-12-01'), records['jdate'][0])
+        self.assertEqual(np.datetime64('2018-06-19'), records['jdate'][2])
+        self.assertEqual(dms2dd('31 34 35.00N'), records['lat_dd'][0])
+        self.assertEqual(dms2dd('179 59 59.99E'), records['lon_dd'][2])
+
+        self.assertEqual(DOF_INT_NULL, records['obs_number'][3])
+        self.assertEqual(DOF_INT_NULL, records['ams_height'][3])
+        self.assertTrue(np.isnat(records['jdate'][3]))
+        self.assertTrue(np.isnan(records['lat_dd'][3]))
+
+    def test_faa_dof2columnar_numpy(self):
+        npy_path = os.path.join(self.tmp_dir.name, 'DOF.npy')
+        self.assertEqual(3, faa_dof2columnar(self.dof_path, npy_path))
+        records = np.load(npy_path, mmap_mode='r')
+        self.assertEqual(np.dtype(DOF_COLUMN_DTYPES), records.dtype)
+        self.assertEqual([666, 1160, 52], records['ams_height'].tolist())
+
+        npz_path = os.path.join(self.tmp_dir.name, 'DOF.npz')
+        self.assertEqual(3, faa_dof2columnar(self.dof_path, npz_path))
+        with np.load(npz_path) as columns:
+            self.assertEqual([name for name, dtype in DOF_COLUMN_DTYPES], list(columns.keys()))
+            self.assertEqual(records['lat_dd'].tolist(), columns['lat_dd'].tolist())
+
+        self.assertRaises(ValueError, faa_dof2columnar, self.dof_path, self.csv_path)
+
+    def test_faa_dof2columnar_quarantine(self):
+        invalid_quantity = DOF_RECORDS[1][:81] + 'X' + DOF_RECORDS[1][82:]
+        invalid_height = DOF_RECORDS[1][:89] + '0A160' + DOF_RECORDS[1][94:]
+        records = [DOF_RECORDS[0], '02-000001 O US AK', '', invalid_quantity, DOF_RECORDS[1], invalid_height,
+                   DOF_RECORDS[2]]
+        with open(self.dof_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER + records) + '\n')
+        quarantine_path = os.path.join(self.tmp_dir.name, 'DOF_quarantine.csv')
+        faa_dof2csv(self.dof_path, self.csv_path, quarantine_file=quarantine_path)
+        with open(quarantine_path, newline='') as quarantine_file:
+            expected_quarantine = list(csv.reader(quarantine_file))
+        self.assertEqual(['8', 'Invalid fields: quantity.', invalid_quantity], expected_quarantine[2])
+        expected = parse_dof_columns(DOF_RECORDS)
+
+        names = ['DOF.npy', 'DOF.npz'] + (['DOF.parquet', 'DOF.arrow'] if pyarrow is not None else [])
+        for name in names:
+            path = os.path.join(self.tmp_dir.name, name)
+            for block_size in (DOF_BLOCK_SIZE, 300):
+                self.assertEqual(3, faa_dof2columnar(self.dof_path, path, block_size=block_size,
+                                                     quarantine_file=quarantine_path))
+                with open(quarantine_path, newline='') as quarantine_file:
+                    self.assertEqual(expected_quarantine, list(csv.reader(quarantine_file)))
+                if name.endswith('.npy'):
+                    self.assertEqual(expected.tolist(), np.load(path).tolist())
+                elif name.endswith('.npz'):
+                    with np.load(path) as columns:
+                        self.assertEqual(expected['ams_height'].tolist(), columns['ams_height'].tolist())
+                        self.assertEqual(expected['jdate'].tolist(), columns['jdate'].tolist())
+                elif name.endswith('.parquet'):
+                    table = pyarrow.parquet.read_table(path)
+                    self.assertEqual(expected['obs_number'].tolist(), table.column('obs_number').to_pylist())
+                else:
+                    table = pyarrow.feather.read_table(path)
+                    self.assertEqual(expected['lat_dd'].tolist(), table.column('lat_dd').to_pylist())
+        self.assertEqual(expected.tolist(), read_dof_records(self.dof_path, 300).tolist())
+
+        with open(self.dof_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER) + '\n')
+        for name in names:
+            self.assertEqual(0, faa_dof2columnar(self.dof_path, os.path.join(self.tmp_dir.name, name)))
+        self.assertEqual((0,), np.load(os.path.join(self.tmp_dir.name, 'DOF.npy')).shape)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_faa_dof2columnar_arrow(self):
+        for name in ('DOF.parquet', 'DOF.arrow'):
+            path = os.path.join(self.tmp_dir.name, name)
+            self.assertEqual(3, faa_dof2columnar(self.dof_path, path))
+            if name.endswith('.parquet'):
+                table = pyarrow.parquet.read_table(path)
+            else:
+                table = pyarrow.feather.read_table(path)
+            self.assertEqual(['ABBEVILLE', 'ALBERTVILLE', 'ZZ_LONG_CITY_NAM'], table.column('city_name').to_pylist())
+            self.assertEqual(pyarrow.int32(), table.schema.field('agl_height').type)
+
+    def test_dof_file(self):
+        with DofFile(self.dof_path) as dof:
+            self.assertEqual(3, len(dof))
+            self.assertEqual(DOF_RECORDS, [record.line() for record in dof])
+            self.assertEqual(DOF_RECORDS[-1], dof[-1].line())
+            self.assertRaises(IndexError, dof.__getitem__, 3)
+
+            faa_dof2csv(self.dof_path, self.csv_path)
+            for record, row in zip(dof, self.read_csv()):
+                self.assertEqual(row, {name: str(value) for name, value in record.as_dict().items()})
+
+            self.assertEqual([666, 1160, 52], dof.column('ams_height').tolist())
+            self.assertEqual(parse_dof_columns(DOF_RECORDS)['lon_dd'].tolist(), dof.column('lon_dd').tolist())
+
+            self.assertEqual([DOF_RECORDS[1]], [record.line() for record in dof.find('001070')])
+            self.assertEqual([DOF_RECORDS[2]], [record.line() for record in dof.find(72, oas_code='05')])
+            self.assertEqual([], dof.find(72, oas_code='01'))
+
+    def test_dof_file_crlf_short_record(self):
+        with open(self.dof_path, 'w', newline='') as dof_file:
+            dof_file.write('\r\n'.join(DOF_HEADER + DOF_RECORDS[:1] + ['02-000001 O US AK']))
+        with DofFile(self.dof_path) as dof:
+            self.assertEqual(2, len(dof))
+            self.assertEqual(DOF_RECORDS[0], dof[0].line())
+            self.assertEqual('02-000001 O US AK', dof[1].line())
+            self.assertEqual([b'AL', b'AK'], dof.column('state_id').tolist())
+            self.assertEqual([307, 1], dof.column('obs_number').tolist())
+            self.assertEqual(DOF_INT_NULL, dof.column('ams_height')[1])
+            self.assertTrue(math.isnan(dof[1]['lat_dd']))
+            self.assertTrue(math.isnan(dof[1]['lon_dd']))
+            self.assertTrue(np.isnan(dof.column('lat_dd')[1]))
+            self.assertEqual(dof.column('lat_dd')[0], dof[0]['lat_dd'])
+
+    def test_dof_file_blank_lines(self):
+        with open(self.dof_path, 'w', newline='') as dof_file:
+            dof_file.write('\r\n'.join(DOF_HEADER + DOF_RECORDS[:1] + ['', '  \t'] + DOF_RECORDS[1:] + ['', '']))
+        self.assertEqual(3, faa_dof2csv(self.dof_path, self.csv_path))
+        with DofFile(self.dof_path) as dof:
+            self.assertEqual(3, len(dof))
+            self.assertEqual(DOF_RECORDS, [record.line() for record in dof])
+            self.assertEqual([666, 1160, 52], dof.column('ams_height').tolist())
+
+    def test_dof_record_fields(self):
+        record = DOF_RECORDS[0][:18] + ' ABBEVILLE      ' + DOF_RECORDS[0][34:]
+        record = record[:35] + '31 60 35.00N' + record[47:]
+        with open(self.dof_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER + [record]) + '\n')
+        with DofFile(self.dof_path) as dof:
+            self.assertEqual(' ABBEVILLE', dof[0]['city_name'])
+            self.assertEqual(parse_dof_lines([record])[0], tuple(dof[0].as_dict()[name] if name != 'lat_dd' else ''
+                                                                 for name in DOF_CSV_FIELD_NAMES))
+            self.assertTrue(math.isnan(dof[0]['lat_dd']))
+
+    def write_dof(self, path, records):
+        with open(path, 'w', encoding=DOF_ENCODING) as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER + records) + '\n')
+
+    def test_update_dof_csv_change_file(self):
+        faa_dof2csv(self.dof_path, self.csv_path)
+        changed = DOF_RECORDS[0][:89] + '00700' + DOF_RECORDS[0][94:]
+        dismantled = DOF_RECORDS[1][:118] + 'D' + DOF_RECORDS[1][119:]
+        added = '06' + DOF_RECORDS[0][2:]
+        change_path = os.path.join(self.tmp_dir.name, 'DAILY_DOF.DAT')
+        self.write_dof(change_path, [changed, dismantled, added])
+
+        output_path = os.path.join(self.tmp_dir.name, 'DOF_updated.csv')
+        stats = update_dof_csv(self.csv_path, change_path, output_path)
+        self.assertEqual({'added': 1, 'changed': 1, 'deleted': 1}, stats)
+
+        expected_path = os.path.join(self.tmp_dir.name, 'DOF_expected.dat')
+        self.write_dof(expected_path, [changed, DOF_RECORDS[2], added])
+        faa_dof2csv(expected_path, self.csv_path)
+        with open(output_path) as updated, open(self.csv_path) as expected:
+            self.assertEqual(expected.read(), updated.read())
+
+    def test_update_dof_csv_full_cycle(self):
+        faa_dof2csv(self.dof_path, self.csv_path)
+        changed = DOF_RECORDS[2][:83] + '00041' + DOF_RECORDS[2][88:]
+        added = '06' + DOF_RECORDS[0][2:]
+        new_path = os.path.join(self.tmp_dir.name, 'DOF_new.DAT')
+        self.write_dof(new_path, [DOF_RECORDS[0], changed, added])
+
+        output_path = os.path.join(self.tmp_dir.name, 'DOF_updated.csv')
+        stats = update_dof_csv(self.csv_path, new_path, output_path, full_cycle=True)
+        self.assertEqual({'added': 1, 'changed': 1, 'deleted': 1}, stats)
+
+        faa_dof2csv(new_path, self.csv_path)
+        with open(output_path) as updated, open(self.csv_path) as expected:
+            self.assertEqual(expected.read(), updated.read())
+
+    def test_update_dof_csv_line_boundaries_in_fields(self):
+        # Form feed, file separator and next line characters are line boundaries for str.splitlines
+        city = 'AB\x0cEV\x1cL\x85E'
+        changed = DOF_RECORDS[0][:18] + city + DOF_RECORDS[0][27:]
+        added = '06' + changed[2:]
+        self.write_dof(self.dof_path, [changed] + DOF_RECORDS[1:])
+        faa_dof2csv(self.dof_path, self.csv_path)
+        new_path = os.path.join(self.tmp_dir.name, 'DOF_new.DAT')
+        self.write_dof(new_path, [DOF_RECORDS[0], DOF_RECORDS[1], added])
+
+        output_path = os.path.join(self.tmp_dir.name, 'DOF_updated.csv')
+        stats = update_dof_csv(self.csv_path, new_path, output_path, full_cycle=True)
+        self.assertEqual({'added': 1, 'changed': 1, 'deleted': 1}, stats)
+
+        faa_dof2csv(new_path, self.csv_path)
+        with open(output_path, 'rb') as updated, open(self.csv_path, 'rb') as expected:
+            self.assertEqual(expected.read(), updated.read())
+
+    def test_update_dof_csv_invalid_records(self):
+        faa_dof2csv(self.dof_path, self.csv_path)
+        added = '06' + DOF_RECORDS[0][2:]
+        invalid_lat = '07' + DOF_RECORDS[0][2:35] + '31 34 35.00E' + DOF_RECORDS[0][47:]
+        new_path = os.path.join(self.tmp_dir.name, 'DOF_new.DAT')
+        with open(new_path, 'w') as dof_file:
+            dof_file.write('\n'.join(DOF_HEADER[:1] + DOF_HEADER[2:] + DOF_RECORDS + ['', invalid_lat, added,
+                                                                                      '08-000001 O US AK']) + '\n')
+        expected_path = os.path.join(self.tmp_dir.name, 'DOF_expected.csv')
+        expected_quarantine_path = os.path.join(self.tmp_dir.name, 'DOF_expected_quarantine.csv')
+        faa_dof2csv(new_path, expected_path, quarantine_file=expected_quarantine_path)
+
+        output_path = os.path.join(self.tmp_dir.name, 'DOF_updated.csv')
+        quarantine_path = os.path.join(self.tmp_dir.name, 'DOF_quarantine.csv')
+        self.assertEqual({'added': 1, 'changed': 0, 'deleted': 0},
+                         update_dof_csv(self.csv_path, new_path, output_path, True, quarantine_path))
+        with open(output_path) as updated, open(expected_path) as expected:
+            self.assertEqual(expected.read(), updated.read())
+        with open(quarantine_path) as quarantine, open(expected_quarantine_path) as expected:
+            expected_quarantine = expected.read()
+            self.assertEqual(expected_quarantine, quarantine.read())
+        # The last record of DOF_RECORDS has action D (dismantled)
+        self.assertEqual({'added': 1, 'changed': 2, 'deleted': 1},
+                         update_dof_csv(self.csv_path, new_path, output_path, False, quarantine_path))
+        with open(quarantine_path) as quarantine:
+            self.assertEqual(expected_quarantine, quarantine.read())
+
+        # Keys are read from named columns of csv file
+        rows = self.read_csv()
+        with open(self.csv_path, 'w', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, list(reversed(DOF_CSV_FIELD_NAMES)), quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+            writer.writerows(rows)
+        change_path = os.path.join(self.tmp_dir.name, 'DAILY_DOF.DAT')
+        self.write_dof(change_path, [DOF_RECORDS[1][:118] + 'D' + DOF_RECORDS[1][119:], added])
+        self.assertEqual({'added': 1, 'changed': 0, 'deleted': 1},
+                         update_dof_csv(self.csv_path, change_path, output_path))
@@ -0,0 +1,103 @@
+import math
+import types
+import unittest
+
+import numpy as np
+
+from . import geodesic_shapes
+from .azm_dist_to_lonlat import (ACCURACY_SPHERE, WGS84_A, WGS84_B, WGS84_F, GeodesicOrigin,
+                                 vincenty_inverse_solution_batch)
+from .geodesic_shapes import *
+
+
+class GeodesicShapesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.origin = get_origin('085 15 06.00 W', '31 34 35.00 N')
+
+    def distances_from_origin(self, vertices):
+        lon, lat = np.array(vertices).T
+        distances, _, _ = vincenty_inverse_solution_batch(self.origin.lon, self.origin.lat, lon, lat,
+                                                          WGS84_A, WGS84_B, WGS84_F)
+        return distances
+
+    @staticmethod
+    def spacings(vertices):
+        lon, lat = np.array(vertices).T
+        distances, _, _ = vincenty_inverse_solution_batch(lon[:-1], lat[:-1], lon[1:], lat[1:],
+                                                          WGS84_A, WGS84_B, WGS84_F)
+        return distances
+
+    def test_get_origin(self):
+        self.assertAlmostEqual(-85.251666666, self.origin.lon, places=8)
+        self.assertAlmostEqual(31.576388888, self.origin.lat, places=8)
+        with self.assertRaises(ValueError):
+            get_origin('085 15 06.00 X', '31 34 35.00 N')
+
+    def test_circle(self):
+        vertices = iter_circle(self.origin, 5000, spacing=200)
+        self.assertIsInstance(vertices, types.GeneratorType)
+        vertices = list(vertices)
+        self.assertEqual(vertices[0], vertices[-1])
+        np.testing.assert_allclose(self.distances_from_origin(vertices), 5000, atol=1e-6)
+        self.assertLessEqual(self.spacings(vertices).max(), 200)
+
+    def test_circle_max_chord_error(self):
+        vertices = list(iter_circle(self.origin, 20000, max_chord_error=5))
+        # Sagitta of the chord between vertices (approximated with plane circle)
+        step = math.radians(360 / (len(vertices) - 1))
+        self.assertLessEqual(20000 * (1 - math.cos(step / 2)), 5)
+        self.assertGreater(20000 * (1 - math.cos(step)), 5)
+
+    def test_arc_chunks(self):
+        vertices = list(iter_arc(self.origin, 10000, 350, 20, spacing=10))
+        chunk_vertices = geodesic_shapes.CHUNK_VERTICES
+        geodesic_shapes.CHUNK_VERTICES = 7
+        try:
+            self.assertEqual(vertices, list(iter_arc(self.origin, 10000, 350, 20, spacing=10)))
+        finally:
+            geodesic_shapes.CHUNK_VERTICES = chunk_vertices
+        lon_first, lat_first = self.origin.direct(350, 10000)
+        lon_last, lat_last = self.origin.direct(20, 10000)
+        self.assertAlmostEqual(lon_first, vertices[0][0], places=10)
+        self.assertAlmostEqual(lat_first, vertices[0][1], places=10)
+        self.assertAlmostEqual(lon_last, vertices[-1][0], places=10)
+        self.assertAlmostEqual(lat_last, vertices[-1][1], places=10)
+
+    def test_sector(self):
+        vertices = list(iter_sector(self.origin, 0, 10000, 350, 20, spacing=500))
+        self.assertEqual(vertices[0], vertices[-1])
+        self.assertIn((self.origin.lon, self.origin.lat), vertices)
+        self.assertLessEqual(self.spacings(vertices).max(), 500)
+        self.assertGreater(self.spacings(vertices).min(), 0)
+
+    def test_annular_sector(self):
+        vertices = list(iter_sector(self.origin, 2000, 10000, 350, 20, spacing=500))
+        self.assertEqual(vertices[0], vertices[-1])
+        distances = self.distances_from_origin(vertices)
+        self.assertAlmostEqual(2000, distances.min(), places=5)
+        self.assertAlmostEqual(10000, distances.max(), places=5)
+        self.assertLessEqual(self.spacings(vertices).max(), 500)
+        self.assertGreater(self.spacings(vertices).min(), 0)
+
+    def test_fan_vertices_pairs(self):
+        azimuths = np.array([0, 45, 90, 90, 300.5])
+        distances = np.array([1000, 2000, 2000, 50000, 7])
+        for origin in (self.origin, get_origin('085 15 06.00 W', '31 34 35.00 N', accuracy=ACCURACY_SPHERE)):
+            vertices = list(iter_fan_vertices(origin, azimuths, distances))
+            for vertex, azimuth, distance in zip(vertices, azimuths.tolist(), distances.tolist()):
+                expected = origin.direct(azimuth, distance)
+                self.assertAlmostEqual(expected[0], vertex[0], places=10)
+                self.assertAlmostEqual(expected[1], vertex[1], places=10)
+
+    def test_radius(self):
+        self.assertRaises(ValueError, list, iter_circle(self.origin, 0))
+        self.assertRaises(ValueError, get_azimuth_step, -1)
+        # Circle of quarter meridian of sphere has plane radius equal to radius of sphere
+        origin = GeodesicOrigin(-85, 31, 1000000.0, 1000000.0, 0.0)
+        vertices = list(iter_circle(origin, 1000000 * math.pi / 2, spacing=100000))
+        self.assertEqual(math.ceil(360 / math.degrees(0.1)) + 1, len(vertices))
+
+
+if __name__ == '__main__':
+    unittest.main()
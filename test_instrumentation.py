@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from . import instrumentation
+from .azm_dist_to_lonlat import *
+from .faa_dof_dat_to_csv import faa_dof2csv
+from .instrumentation import instrument
+from .test_faa_dof_dat_to_csv import DOF_HEADER, DOF_RECORDS
+
+
+class InstrumentationTests(unittest.TestCase):
+
+    def test_faa_dof2csv(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dof_path = os.path.join(tmp_dir, 'DOF.DAT')
+            csv_path = os.path.join(tmp_dir, 'DOF.csv')
+            with open(dof_path, 'w') as dof_file:
+                dof_file.write('\n'.join(DOF_HEADER + DOF_RECORDS) + '\n')
+
+            self.assertIsNone(instrumentation.ACTIVE)
+            with instrument() as collector:
+                self.assertIs(collector, instrumentation.ACTIVE)
+                faa_dof2csv(dof_path, csv_path, block_size=200)
+            self.assertIsNone(instrumentation.ACTIVE)
+
+        report = collector.report()
+        self.assertEqual(3, report['counters']['faa_dof2csv.records'])
+        self.assertGreater(report['counters']['faa_dof2csv.blocks'], 1)
+        self.assertGreater(report['timings']['faa_dof2csv.parse'], 0)
+        self.assertGreater(report['timings']['faa_dof2csv.write'], 0)
+        self.assertGreaterEqual(report['timings']['faa_dof2csv.total'],
+                                report['timings']['faa_dof2csv.parse'] + report['timings']['faa_dof2csv.write'])
+        self.assertGreater(report['rates']['faa_dof2csv.records_per_second'], 0)
+        self.assertNotIn('profile', report)
+        self.assertNotIn('memory', report)
+
+    def test_vincenty(self):
+        with instrument() as collector:
+            vincenty_direct_solution(-100.5, -63.5, 127.5, 26377.435, WGS84_A, WGS84_B, WGS84_F)
+            vincenty_direct_solution(-100.5, -63.5, 127.5, 26377.435, WGS84_A, WGS84_B, WGS84_F, ACCURACY_M)
+            vincenty_direct_solution_batch(-100.5, -63.5, [0, 90, 180], 26377.435, WGS84_A, WGS84_B, WGS84_F)
+            vincenty_inverse_solution(0, 0, 179.7, 0.5, WGS84_A, WGS84_B, WGS84_F)
+            vincenty_inverse_solution_batch(0, 0, [10, 179.7], [10, 0.5], WGS84_A, WGS84_B, WGS84_F)
+        counters = collector.report()['counters']
+        self.assertEqual(2, counters['vincenty_direct.calls'])
+        self.assertEqual(1, counters['vincenty_direct.not_converged'])
+        self.assertGreater(counters['vincenty_direct.iterations'], 2)
+        self.assertNotIn('vincenty_direct.fallbacks', counters)
+        self.assertEqual(1, collector.report()['histograms']['vincenty_direct.iterations'][1])
+        self.assertEqual(3, sum(collector.report()['histograms']['vincenty_direct_batch.iterations'].values()))
+        self.assertEqual(3, counters['vincenty_direct_batch.points'])
+        self.assertEqual(0, counters['vincenty_direct_batch.not_converged'])
+        self.assertGreaterEqual(counters['vincenty_direct_batch.point_iterations'], 3)
+        self.assertEqual(1, counters['vincenty_inverse.antipodal_fallbacks'])
+        self.assertEqual(2, counters['vincenty_inverse_batch.points'])
+        self.assertEqual(1, counters['vincenty_inverse_batch.antipodal_fallbacks'])
+        self.assertEqual(0, counters['vincenty_inverse_batch.failures'])
+
+    def test_profile_and_memory(self):
+        with instrument(profile=True, trace_memory=True) as collector:
+            vincenty_direct_solution_batch(-100.5, -63.5, np.arange(360), 26377.435, WGS84_A, WGS84_B, WGS84_F)
+        report = collector.report()
+        self.assertIn('vincenty_direct_from_terms_batch', report['profile'])
+        self.assertGreater(report['memory']['peak'], 0)
+        self.assertTrue(report['memory']['top'])
+
+
+if __name__ == '__main__':
+    unittest.main()
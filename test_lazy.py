@@ -0,0 +1,46 @@
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+from .lazy import *
+
+
+class LazyTests(unittest.TestCase):
+
+    def test_lazy_module(self):
+        module = LazyModule('json')
+        self.assertIn('lazy module json>', repr(module))
+        self.assertEqual('[1]', module.dumps([1]))
+        self.assertIn('imported', repr(module))
+        self.assertIn('dumps', vars(module))
+        self.assertRaises(AttributeError, getattr, module, 'missing')
+        self.assertRaises(ImportError, getattr, LazyModule('missing_module'), 'x')
+
+    def test_lazy_pattern(self):
+        pattern = LazyPattern(r'''(?P<deg>\d{2})  # Degrees
+                                  (?P<hem>[NS])''', re.VERBOSE)
+        self.assertIsNone(pattern._compiled)
+        self.assertEqual('31', pattern.match('31N').group('deg'))
+        self.assertIsNone(pattern.fullmatch('31NX'))
+        self.assertEqual(re.VERBOSE, pattern.compiled.flags & re.VERBOSE)
+
+    def test_fast_start(self):
+        # Scalar conversions import neither NumPy nor modules needed only by bulk paths
+        code = 'import sys\n' \
+               'sys.path.insert(0, {!r})\n' \
+               'import arinc424_shorthand_conversion as arinc, azm_dist_to_lonlat as azm\n' \
+               'arinc.Arinc424CoordinatesConversion.arinc424_to_coordinates("50N60")\n' \
+               'azm.vincenty_direct_solution(-85.25, 31.57, 45, 5, azm.WGS84_A, azm.WGS84_B, azm.WGS84_F, uom="NM")\n' \
+               'azm.lon_dms_to_dd("085 15 06.00 W")\n' \
+               'azm.VINCENTY_DIRECT_MAX_ITERATIONS = 1\n' \
+               'azm.vincenty_direct_solution(-85.25, 31.57, 45, 5e6, azm.WGS84_A, azm.WGS84_B, azm.WGS84_F)\n' \
+               'print(sorted({{"numpy", "json", "cProfile"}} & set(sys.modules)))'.format(
+                   os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual('[]', output.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
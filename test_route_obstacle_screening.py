@@ -0,0 +1,51 @@
+import csv
+import io
+import unittest
+
+import numpy as np
+
+from .azm_dist_to_lonlat import UOM_NM
+from .faa_dof_dat_to_csv import DOF_COLUMN_DTYPES
+from .route_obstacle_screening import *
+
+
+def make_index():
+    records = np.zeros(4, dtype=DOF_COLUMN_DTYPES)
+    records['obs_number'] = [1, 2, 3, 4]
+    records['lon_dd'] = [-85.5, -85.5, -85.55, -60.5]
+    records['lat_dd'] = [30.5, 30.52, 30.8, 50]
+    records['ams_height'] = [300, 500, 900, 100]
+    records['obs_type'] = [b'TOWER', b'STACK', b'BLDG', b'TOWER']
+    return ObstacleIndex(records)
+
+
+class RouteObstacleScreeningTests(unittest.TestCase):
+
+    def test_parse_fixes(self):
+        self.assertEqual([('5060N', -60.0, 50.0), ('50N60', -160.0, 50.0)], parse_fixes(['5060N', '50N60']))
+        fixes = parse_fixes(['085 30 00.00 W', '30 30 00.00 N', '5060N'])
+        self.assertEqual(('085 30 00.00 W 30 30 00.00 N', -85.5, 30.5), fixes[0])
+        self.assertRaises(ValueError, parse_fixes, ['5060N'])
+        self.assertRaises(ValueError, parse_fixes, ['5060N', '085 30 00.00 W'])
+        self.assertRaises(ValueError, parse_fixes, ['5060N', '95N10'])
+
+    def test_screen_routes(self):
+        in_file = io.StringIO('085 30 00.00 W,30 00 00.00 N,085 30 00.00 W,31 00 00.00 N,5060N\n'
+                              '\n'
+                              '5060N,test\n')
+        out_file = io.StringIO()
+        self.assertEqual((2, 1), screen_routes(make_index(), in_file, out_file, 1, UOM_NM))
+        rows = list(csv.DictReader(io.StringIO(out_file.getvalue())))
+        self.assertEqual(3, len(rows))
+        self.assertEqual(['1', '1', '2'], [rows[0]['row'], rows[0]['segment'], rows[0]['obstacles']])
+        self.assertEqual(['2', 'STACK', '500'], [rows[0]['obs_number'], rows[0]['obs_type'], rows[0]['ams_height']])
+        self.assertAlmostEqual(31.2, float(rows[0]['along_track']), delta=0.1)
+        self.assertAlmostEqual(0, float(rows[0]['cross_track']), delta=0.01)
+        self.assertEqual(['2', '5060N', '0', ''], [rows[1]['segment'], rows[1]['to_fix'], rows[1]['obstacles'],
+                                                   rows[1]['obs_number']])
+        self.assertEqual('3', rows[2]['row'])
+        self.assertTrue(rows[2]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()